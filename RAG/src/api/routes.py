@@ -1,9 +1,12 @@
 import os
+import asyncio
 import sys
 import logging
 import json
+import hashlib
 from fastapi import APIRouter, Depends, HTTPException, Body, Request, UploadFile, File, Form
 from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from datetime import datetime
 import glob
 import traceback
@@ -11,6 +14,8 @@ from pydantic import BaseModel
 from typing import List, Dict, Optional, Tuple
 import time
 import shutil
+import threading
+from contextlib import aclosing
 from pathlib import Path
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -21,13 +26,26 @@ from rag_app.core.interfaces.domain_manager_interface import DomainManagerInterf
 
 # Implementations
 from rag_app.core.implementations.conversation.conversation import Conversation
-from rag_app.core.implementations.query_engine.query_engine import QueryEngine
-from rag_app.core.implementations.query_optimizer.query_optimizer import QueryOptimizer
-from rag_app.core.implementations.reranker.reranker import ResultReRanker
+from rag_app.core.utils.repetition import RepetitionDetector
+from rag_app.core.utils.ingestion_jobs import IngestionJob, IngestionJobManager, IngestionJobRunning
+from rag_app.core.utils.engine_holder import EngineGeneration, EngineHolder, EngineLease
+from rag_app.core.utils.index_versions import IndexVersions
+from rag_app.core.utils.answer_cache import SemanticAnswerCache
+from rag_app.core.utils.lru_cache import LRUCache
+from rag_app.core.utils.request_metrics import RequestMetrics
+from rag_app.core.utils.session_store import SessionStore
+from rag_app.core.implementations.session.file_session_backend import FileSessionBackend
 from rag_app.private_config import private_settings
 
 # Config
-from rag_app.initialization import initialize_rag_components
+from rag_app.initialization import (
+    INDEX_CONFIG_KEYS,
+    get_changed_index_config,
+    get_index_directories,
+    initialize_chat_model,
+    initialize_query_engine,
+    initialize_rag_components,
+)
 
 # Logs
 logger = logging.getLogger(__name__)
@@ -35,19 +53,166 @@ logger = logging.getLogger(__name__)
 # App
 router = APIRouter()
 
-# These will be updated in the /setup_RAG endpoint
-query_engine: QueryEngine = None
-domain_manager = None
+# The active DomainManager/QueryEngine pair, swapped in by the /setup_RAG endpoint
+engine_holder = EngineHolder()
+
+# Every /setup_rag run builds into its own index version
+index_versions = IndexVersions(private_settings.INDEX_FOLDER)
+
+# Serializes writes to the active index with copying it into a new version
+index_write_lock = threading.Lock()
+
+# Background /setup_rag runs
+ingestion_jobs = IngestionJobManager()
+
+# Held while /setup_rag rebuilds the query engine for serving-only changes; like a running
+# job, it keeps another /setup_rag from building on the generation being replaced
+serving_rebuild_lock = threading.Lock()
+
+# Generated /init greetings, see init_greeting_key
+init_greetings = LRUCache(max_entries=8)
+
+# Outcomes of the streamed /ask and /init requests, served by /metrics
+request_metrics = RequestMetrics()
+
+# History, last results and last answer of every conversation. Requests without a
+# conversation_id share the default session, used by the avatar front end, which is
+# never idle long enough to expire, hence the cap on messages per session.
+session_store = SessionStore(
+    max_sessions=private_settings.SESSION_MAX_SESSIONS,
+    ttl_seconds=private_settings.SESSION_TTL,
+    max_messages=private_settings.SESSION_MAX_MESSAGES,
+    backend=FileSessionBackend(private_settings.SESSION_FOLDER) if private_settings.SESSION_FOLDER else None
+)
+
+def acquire_engine() -> EngineLease:
+    lease = engine_holder.acquire()
+    if lease is None:
+        raise HTTPException(status_code=500, detail="Query engine not initialized")
+    return lease
 
 def get_query_engine():
-    if query_engine is None:
+    generation = engine_holder.current
+    if generation is None:
         raise HTTPException(status_code=500, detail="Query engine not initialized")
-    return query_engine
+    return generation.query_engine
 
 def get_domain_manager():
-    if domain_manager is None:
+    generation = engine_holder.current
+    if generation is None:
         raise HTTPException(status_code=500, detail="Domain manager not initialized")
-    return domain_manager
+    return generation.domain_manager
+
+def leased_streaming_response(generator, lease: EngineLease, name: str) -> StreamingResponse:
+    """
+    Stream an SSE response and release the lease when it ends. The background task also
+    covers clients that disconnect before the generator has started.
+
+    When the client disconnects, Starlette cancels the stream; the generator is then
+    closed, which stops the retrieval or the chat model stream it is waiting on, and the
+    request is counted as '<name>.cancelled' in the request metrics.
+    """
+    outcome = "cancelled"
+
+    async def leased_generator():
+        nonlocal outcome
+        try:
+            async with aclosing(generator):
+                async for item in generator:
+                    yield item
+            outcome = "completed"
+        except (asyncio.CancelledError, GeneratorExit):
+            raise
+        except Exception:
+            outcome = "failed"
+            raise
+        finally:
+            lease.release()
+
+    stream = leased_generator()
+
+    async def finish():
+        # A generator left suspended by a disconnect is closed here rather than when collected
+        await stream.aclose()
+        lease.release()
+        request_metrics.increment(f"{name}.{outcome}")
+        if outcome == "cancelled":
+            logger.info(f"Client disconnected, /{name} cancelled")
+
+    return StreamingResponse(stream, media_type="text/event-stream", background=BackgroundTask(finish))
+
+def retire_index(generation: EngineGeneration) -> None:
+    """
+    Close the query engine of a generation once its last request has finished, and delete
+    its index unless it is still served.
+    """
+    close_query_engine(generation.query_engine)
+    current = engine_holder.current
+    if generation.version is not None and (current is None or current.version != generation.version):
+        index_versions.remove(generation.version)
+
+def close_query_engine(query_engine) -> None:
+    close = getattr(query_engine, "close", None)
+    if close is not None:
+        close()
+
+def init_greeting_key(generation: EngineGeneration, prompt: str) -> Optional[Tuple[str, str, str]]:
+    """
+    (model id, prompt hash, generation params) of the /init greeting. Generation is
+    deterministic, so the greeting only changes with these, e.g. when /setup_rag changes
+    the chat model.
+    """
+    chat_config = (generation.config or {}).get('chat_model')
+    if not chat_config:
+        return None
+    params = {key: value for key, value in chat_config.items() if key != 'MODEL_ID'}
+    return (
+        str(chat_config.get('MODEL_ID')),
+        hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        json.dumps(params, sort_keys=True, default=str)
+    )
+
+def clear_answer_cache(query_engine) -> None:
+    answer_cache = getattr(query_engine, "answer_cache", None)
+    if answer_cache is not None:
+        answer_cache.clear()
+
+async def warm_answer_cache() -> None:
+    """
+    Answer the configured ANSWER_CACHE_WARM_QUESTIONS with the current query engine, so
+    the first visitors asking them (or a paraphrase) get a cached answer.
+    """
+    lease = engine_holder.acquire()
+    if lease is None:
+        return
+    with lease:
+        answer_cache: Optional[SemanticAnswerCache] = getattr(lease.query_engine, "answer_cache", None)
+        questions = (lease.generation.config or {}).get('query_engine', {}).get('ANSWER_CACHE_WARM_QUESTIONS', [])
+        if answer_cache is None or not questions:
+            return
+
+        start_time = time.time()
+        for question in questions:
+            try:
+                revision = answer_cache.revision
+                embedding = await asyncio.to_thread(lease.query_engine.embedding_model.generate_embedding, question)
+                if answer_cache.lookup(embedding) is not None:
+                    continue
+                chunks, sources = [], []
+                async for chunk, chunk_sources in await lease.query_engine.ask_question(
+                    question=question,
+                    conversation=Conversation(),
+                    domain_names=None,
+                    stream=True
+                ):
+                    if chunk_sources is not None:
+                        sources = chunk_sources
+                    else:
+                        chunks.append(chunk)
+                answer_cache.store(question, embedding, chunks, sources, revision)
+            except Exception as e:
+                logger.warning(f"Could not warm the answer cache with question {question!r}: {str(e)}")
+        logger.info(f"Answer cache warmed with {len(questions)} question(s) in {time.time() - start_time:.2f} seconds: {answer_cache.stats()}")
 
 
 # Add this new model
@@ -62,50 +227,112 @@ class InitRequest(BaseModel):
     genModel: str
     conversation_id: Optional[str] = None
 
-# Add this global variable to store the single conversation
-global_conversation: Optional[Conversation] = Conversation()
-
-# Add this global variable to store the last response for the avatar
-last_avatar_response: str = ""
+class CleanConversationRequest(BaseModel):
+    conversation_id: Optional[str] = None
 
 @router.post("/clean_conversation")
-async def clean_conversation():
-    global global_conversation, last_avatar_response
-    global_conversation = Conversation()
-    last_avatar_response = ""
+async def clean_conversation(request: Optional[CleanConversationRequest] = Body(None)):
+    await asyncio.to_thread(session_store.reset, request.conversation_id if request else None)
     return {"message": "Conversation has been cleaned."}
 
 @router.get("/get_string")
-async def get_string():
+async def get_string(conversation_id: Optional[str] = None):
     """
     Get the last response string for the avatar to read.
     """
-    global last_avatar_response
-    return {"response": last_avatar_response}
+    session = await asyncio.to_thread(session_store.get, conversation_id)
+    return {"response": session.last_response}
 
-@router.post("/setup_rag")
-async def setup_rag(config_data: dict = Body(...)):
-    global query_engine, domain_manager
+def run_setup_job(job: IngestionJob, config_data: dict, merged_config: dict) -> dict:
+    """
+    Build new RAG components into a fresh index version on the job's worker thread and
+    swap them in once ready.
+
+    The new version starts as a copy of the active index, so only new or changed documents
+    are re-ingested. Until the swap, /ask keeps being served by the previous query engine;
+    the previous index is deleted once the requests still using it have finished.
+    """
+    job.set_stage("copying index")
+    current = engine_holder.current
+    current_directory = index_versions.path(current.version) if current is not None and current.version else None
+    with index_write_lock:
+        version = index_versions.create(seed=get_index_directories(merged_config, current_directory))
+    index_directory = index_versions.path(version)
+
+    new_query_engine = None
+    try:
+        job.set_stage("initializing")
+        new_domain_manager, chat_model, embedding_model, chunk_strategy = initialize_rag_components(merged_config, index_directory)
+
+        job.set_stage("ingesting")
+        new_domain_manager.apply_chunking_strategy(progress_callback=job.report)
+
+        job.set_stage("building query engine")
+        new_query_engine = initialize_query_engine(merged_config, new_domain_manager, chat_model)
+        job.check_cancelled()
+    except BaseException:
+        if new_query_engine is not None:
+            close_query_engine(new_query_engine)
+        index_versions.remove(version)
+        raise
+
+    # Activate before swapping, so the previous version is no longer protected when it drains
+    index_versions.activate(version)
+    engine_holder.swap(EngineGeneration(new_query_engine, new_domain_manager, version, on_drained=retire_index, config=merged_config))
+    save_config(config_data)
+
+    return {"domains": [domain.name for domain in new_domain_manager.get_domains()], "index_version": version}
+
+def rebuild_query_engine(current: EngineGeneration, config_data: dict, merged_config: dict) -> EngineGeneration:
+    """
+    Apply a config that only changes serving settings: build a new chat model and
+    QueryEngine on top of the current domain manager, vector stores and index version.
+
+    Only the new QueryEngine gets the new chat model, the shared domain manager is left
+    untouched, so the current generation is unchanged if building it fails. The new
+    generation only replaces current, never a generation swapped in meanwhile.
+    """
+    chat_model = initialize_chat_model(merged_config)
+    new_query_engine = initialize_query_engine(merged_config, current.domain_manager, chat_model)
+    generation = EngineGeneration(new_query_engine, current.domain_manager, current.version, on_drained=retire_index, config=merged_config)
+    if not engine_holder.replace(current, generation):
+        close_query_engine(new_query_engine)
+        raise IngestionJobRunning("The query engine was replaced during the rebuild, retry")
+    save_config(config_data)
+    return generation
+
+def save_config(config_data: dict) -> None:
+    """Store the original config_data with timestamp."""
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    config_filename = f"config_{timestamp}.json"
+    config_path = os.path.join(private_settings.CONFIGS_FOLDER, config_filename)
     
+    logger.info(f"Saving configuration to file: {config_path}") 
     try:
-        # Setup paths
-        data_folder = Path(private_settings.DATA_FOLDER)
-        chunks_folder = Path(private_settings.DATA_FOLDER).parent / 'chunks'
-
-        # Clean chunks folder
-        if chunks_folder.exists():
-            # Remove all contents but keep the folder
-            for item in chunks_folder.iterdir():
-                if item.is_file():
-                    item.unlink()
-                elif item.is_dir():
-                    shutil.rmtree(item)
-            logger.info(f"Cleaned chunks directory: {chunks_folder}")
-        else:
-            # Create chunks folder if it doesn't exist
-            chunks_folder.mkdir(parents=True, exist_ok=True)
-            logger.info(f"Created chunks directory: {chunks_folder}")
+        with open(config_path, "w") as config_file:
+            json.dump(config_data, config_file, indent=4)
+        logger.info("Configuration saved successfully.")
+    except IOError as e:
+        logger.error(f"Error writing configuration file: {str(e)}")
+
+def get_ingestion_job(job_id: str) -> IngestionJob:
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@router.post("/setup_rag", status_code=202)
+async def setup_rag(config_data: dict = Body(...)):
+    """
+    Apply a new configuration, reporting in "path" how it was applied.
 
+    If it differs from the config of the current index only in serving settings (chat
+    model, query engine), the chat model and QueryEngine are rebuilt against the existing
+    index right away ("serving"). Otherwise a background job rebuilds the RAG components
+    ("reindex"); its progress can be followed at /setup_rag/jobs/{job_id} (polling) or
+    /setup_rag/jobs/{job_id}/events (SSE), and the job cancelled at /setup_rag/jobs/{job_id}/cancel.
+    """
+    try:
         # Merge public settings with incoming config_data
         merged_config = merge_configs(private_settings.dict(), config_data)
         
@@ -113,40 +340,101 @@ async def setup_rag(config_data: dict = Body(...)):
         merged_config_path = os.path.join(private_settings.DOCS_FOLDER, "rag_setup_merged.json")
         with open(merged_config_path, "w") as merged_config_file:
             json.dump(merged_config, merged_config_file, indent=4)
-        
-        # Initialize components using the merged configuration
-        domain_manager, chat_model, embedding_model, chunk_strategy = initialize_rag_components(merged_config)
-        domain_manager.apply_chunking_strategy()
-        
-        # Initialize the query engine with the components
-        query_engine = QueryEngine(
-            domain_manager=domain_manager,
-            vector_stores=domain_manager.vector_stores,
-            embedding_model=embedding_model,
-            chat_model=chat_model,
-            chunk_strategy=chunk_strategy,
-            query_optimizer=QueryOptimizer(chat_model=chat_model) if merged_config['query_engine'].get('USE_QUERY_OPTIMIZER', True) else None,
-            result_re_ranker=ResultReRanker() if merged_config['query_engine'].get('USE_RESULT_RE_RANKER', True) else None
-        )
-        
-        # Store the original config_data with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        config_filename = f"config_{timestamp}.json"
-        config_path = os.path.join(private_settings.CONFIGS_FOLDER, config_filename)
-        
-        logger.info(f"Saving configuration to file: {config_path}") 
-        try:
-            with open(config_path, "w") as config_file:
-                json.dump(config_data, config_file, indent=4)
-            logger.info("Configuration saved successfully.")
-        except IOError as e:
-            logger.error(f"Error writing configuration file: {str(e)}")
-        
-        return {"message": "RAG system setup successfully"}
+
+        active_job = ingestion_jobs.active_job
+        if active_job is not None:
+            raise IngestionJobRunning(f"Job {active_job.id} is still {active_job.status}")
+        if serving_rebuild_lock.locked():
+            raise IngestionJobRunning("A query engine rebuild is still running")
+
+        current = engine_holder.current
+        changed_sections = get_changed_index_config(current.config, merged_config) if current is not None and current.config is not None else None
+        if changed_sections == []:
+            # Free since the check above, there is no await in between; the rebuild releases it
+            serving_rebuild_lock.acquire()
+
+            def rebuild() -> EngineGeneration:
+                try:
+                    return rebuild_query_engine(current, config_data, merged_config)
+                finally:
+                    serving_rebuild_lock.release()
+
+            start_time = time.time()
+            # Shielded, so the lock is released by the rebuild even if the client goes away
+            generation = await asyncio.shield(asyncio.to_thread(rebuild))
+            logger.info(f"Query engine rebuilt on index version {generation.version} in {time.time() - start_time:.3f} seconds")
+            return JSONResponse(status_code=200, content={
+                "message": "RAG system updated, the existing index is reused",
+                "path": "serving",
+                "changed_sections": [],
+                "index_version": generation.version
+            })
+
+        job = ingestion_jobs.submit("setup_rag", lambda job: run_setup_job(job, config_data, merged_config))
+        return {
+            "message": "RAG system setup started",
+            "path": "reindex",
+            "changed_sections": changed_sections if changed_sections is not None else list(INDEX_CONFIG_KEYS),
+            "job_id": job.id,
+            "status_url": f"/setup_rag/jobs/{job.id}",
+            "events_url": f"/setup_rag/jobs/{job.id}/events"
+        }
+    except IngestionJobRunning as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        # Unsupported chat model
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Traceback:\n{traceback.format_exc()}")
         raise HTTPException(status_code=500, detail="An error occurred during setup")
 
+@router.get("/setup_rag/jobs")
+async def list_setup_rag_jobs():
+    return {"jobs": [job.to_dict(include_documents=False) for job in ingestion_jobs.list()]}
+
+@router.get("/setup_rag/jobs/{job_id}")
+async def get_setup_rag_job(job_id: str):
+    return get_ingestion_job(job_id).to_dict()
+
+@router.post("/setup_rag/jobs/{job_id}/cancel")
+async def cancel_setup_rag_job(job_id: str):
+    job = get_ingestion_job(job_id)
+    if job.finished:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} already {job.status}")
+    job.cancel()
+    return {"message": "Cancellation requested", "job_id": job_id}
+
+@router.get("/setup_rag/jobs/{job_id}/events")
+async def setup_rag_job_events(job_id: str, request: Request):
+    """
+    Stream the progress events of a job as server-sent events, ending with a 'done' event.
+    Reconnecting clients resume after the Last-Event-ID they received.
+    """
+    job = get_ingestion_job(job_id)
+    last_event_id = request.headers.get("last-event-id")
+    next_seq = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    async def event_generator():
+        seq = next_seq
+        last_sent = time.time()
+        while True:
+            events = job.events_since(seq)
+            for event in events:
+                yield f"id: {event['seq']}\ndata: {json.dumps(event)}\n\n"
+                seq = event["seq"] + 1
+            if events:
+                last_sent = time.time()
+            elif job.finished:
+                return
+            elif time.time() - last_sent > 15:
+                yield ": keep-alive\n\n"
+                last_sent = time.time()
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
 @router.get("/setup_rag_template")
 async def get_setup_rag_template():
     try:
@@ -157,53 +445,26 @@ async def get_setup_rag_template():
         logger.error(f"Error loading setup RAG template: {str(e)}")
         raise HTTPException(status_code=500, detail="An error occurred while loading the template")
 
-def has_consecutive_repetition(text: str, k: int = 10) -> bool:
-    """
-    Check if there is a consecutive repetition of at least k characters in the text.
-    Uses suffix arrays to find all possible repetitions.
-    """
-    n = len(text)
-    if n < 2*k:
-        return False
-        
-    # Create suffix array
-    suffixes = [(text[i:], i) for i in range(n)]
-    suffixes.sort()
-    
-    # Compare consecutive suffixes to find common prefixes
-    for i in range(n-1):
-        s1, pos1 = suffixes[i]
-        s2, pos2 = suffixes[i+1]
-        
-        # Find length of common prefix
-        common_len = 0
-        while common_len < len(s1) and common_len < len(s2) and s1[common_len] == s2[common_len]:
-            common_len += 1
-            
-        # Check if it's a consecutive repetition
-        if common_len >= k and abs(pos1 - pos2) == common_len:
-            return True
-            
-    return False
-
 @router.post("/ask")
 async def ask(
-    request: AskRequest,
-    query_engine: QueryEngineInterface = Depends(get_query_engine)
+    request: AskRequest
 ):
     """
     Ask a question within a specific domain.
+
+    The query engine is leased for the whole stream, so an index swapped out meanwhile
+    is only deleted after the answer is complete.
     """
+    lease = acquire_engine()
+    query_engine: QueryEngineInterface = lease.query_engine
     try:        
         if request.conversation_id:
             logger.info(f"Processing request for conversation ID: {request.conversation_id}")
+        session = await asyncio.to_thread(session_store.get, request.conversation_id)
         
         if not request.conversation:
-            global global_conversation
-            # Use the global conversation if the request doesn't provide one
-            if global_conversation is None:
-                global_conversation = Conversation()
-            conversation = global_conversation
+            # Use the session's conversation if the request doesn't provide one
+            conversation = session.conversation
         else:
             # Create a new Conversation instance with the provided messages
             conversation = Conversation()
@@ -212,131 +473,203 @@ async def ask(
         
         full_response = ""
         sources = []
-        
-        async def content_generator():
-            nonlocal full_response, sources
-            async for result in await query_engine.ask_question(
+        repetition_detector = RepetitionDetector()
+
+        # Paraphrases of an answered question replay its answer. Questions asked after earlier
+        # user turns, from the request or the session, are follow-ups whose answer depends on
+        # that history, so they are neither looked up nor stored and always go to the model.
+        # The /init greeting the front end sends back as history does not count as a turn.
+        answer_cache: Optional[SemanticAnswerCache] = getattr(query_engine, "answer_cache", None)
+        cached_answer = None
+        if answer_cache is not None and not any(message.role == "User" for message in conversation.get_history()):
+            answer_cache_revision = answer_cache.revision
+            question_embedding = await asyncio.to_thread(query_engine.embedding_model.generate_embedding, request.message)
+            cached_answer = answer_cache.lookup(question_embedding)
+        else:
+            answer_cache = None
+
+        async def answer_chunks():
+            if cached_answer is not None:
+                logger.info(f"Replaying cached answer to: {cached_answer.question}")
+                for chunk in cached_answer.chunks:
+                    yield chunk, None
+                yield "", cached_answer.sources
+                return
+            async with aclosing(await query_engine.ask_question(
                 question=request.message,
                 model_name=request.genModel,
                 conversation=conversation,
                 domain_names=None,
-                stream=True
-            ):
-                if isinstance(result, tuple):
-                    chunk, chunk_sources = result
-                    if chunk_sources is not None:
-                        # This is the last message containing sources, don't yield the chunk
-                        sources = chunk_sources
-                        continue
-                else:
-                    # If it's not a tuple, it's just a chunk
-                    chunk = result
+                stream=True,
+                session=session
+            )) as results:
+                async for result in results:
+                    yield result
 
-                full_response += chunk
+        async def content_generator():
+            nonlocal full_response, sources
+            chunks = []
+            async with aclosing(answer_chunks()) as results:
+                async for result in results:
+                    if isinstance(result, tuple):
+                        chunk, chunk_sources = result
+                        if chunk_sources is not None:
+                            # This is the last message containing sources, don't yield the chunk
+                            sources = chunk_sources
+                            continue
+                    else:
+                        # If it's not a tuple, it's just a chunk
+                        chunk = result
+
+                    full_response += chunk
+                    chunks.append(chunk)
                 
-                # Check for consecutive repetition
-                if has_consecutive_repetition(full_response):
-                    error_response = {
-                        'content': 'repetition',
-                        'type': 'error',
+                    # Check for consecutive repetition, feeding only the new chunk
+                    if repetition_detector.feed(chunk):
+                        error_response = {
+                            'content': 'repetition',
+                            'type': 'error',
+                            'timestamp': time.time()
+                        }
+                        yield f"data: {json.dumps(error_response)}\n\n"
+                        return
+                
+                    response = {
+                        'content': chunk, 
+                        'type': 'content',
                         'timestamp': time.time()
                     }
-                    yield f"data: {json.dumps(error_response)}\n\n"
-                    return
-                
-                response = {
-                    'content': chunk, 
-                    'type': 'content',
-                    'timestamp': time.time()
-                }
-                yield f"data: {json.dumps(response)}\n\n"
+                    yield f"data: {json.dumps(response)}\n\n"
+
+            if answer_cache is not None and cached_answer is None:
+                answer_cache.store(request.message, question_embedding, chunks, sources, answer_cache_revision)
             
             # Add the user's message to the conversation
             conversation.add_message("User", request.message)
 
             # Add the assistant's message to the conversation
-            global_conversation.add_message("Assistant", full_response)
+            session.conversation.add_message("Assistant", full_response)
             
             # Update the last response for the avatar
-            global last_avatar_response
-            last_avatar_response = full_response
+            session.last_response = full_response
+            # The backend writes a file, keep it off the event loop
+            await asyncio.to_thread(session_store.save, session)
             
             done_response = {
                 'type': 'done', 
                 'timestamp': time.time(),
-                'sources': sources
+                'sources': sources,
+                'cached': cached_answer is not None
             }
             yield f"data: {json.dumps(done_response)}\n\n"
         
         logging.debug("Successfully generated response, returning StreamingResponse")
-        return StreamingResponse(content_generator(), media_type="text/event-stream")
+        return leased_streaming_response(content_generator(), lease, "ask")
     except Exception as e:
+        lease.release()
         error_message = str(e)
         logging.error(f"Error in /ask endpoint: {error_message}")
         raise HTTPException(status_code=500, detail=error_message)
 
 @router.post("/init")
 async def initialize(
-    request: InitRequest,
-    query_engine: QueryEngineInterface = Depends(get_query_engine)
+    request: InitRequest
 ):
     """
     Initialize the chat model with the specified generation model.
     """
+    lease = acquire_engine()
+    query_engine: QueryEngineInterface = lease.query_engine
     try:
         init_prompt = private_settings.prompt.INIT
+        session = await asyncio.to_thread(session_store.get, request.conversation_id)
         full_response = ""
         sources = []
 
-        async def content_generator():
-            nonlocal full_response, sources
-
-            async for result in await query_engine.send_initial_message(
+        # Every page load asks for the same greeting, replay it once generated
+        greeting_key = init_greeting_key(lease.generation, init_prompt)
+        cached_greeting = init_greetings.get(greeting_key) if greeting_key is not None else None
+
+        async def greeting_chunks():
+            if cached_greeting is not None:
+                logger.debug(f"Replaying cached greeting, {init_greetings.stats()}")
+                for chunk in cached_greeting:
+                    yield chunk, None
+                yield "", []
+                return
+            async with aclosing(await query_engine.send_initial_message(
                 model_name=request.genModel,
                 prompt=init_prompt,
                 stream=True
-            ):
-                if isinstance(result, tuple):
-                    chunk, chunk_sources = result
-                    if chunk_sources is not None:
-                        # This is the last message containing sources, don't yield the chunk
-                        sources = chunk_sources
-                        continue
-                else:
-                    # If it's not a tuple, it's just a chunk
-                    chunk = result
-
-                full_response += chunk
-                response = {
-                    'content': chunk, 
-                    'type': 'content',
-                    'timestamp': time.time()
-                }
-                logging.info(f"Yielding content: {response}")
-                yield f"data: {json.dumps(response)}\n\n"
+            )) as results:
+                async for result in results:
+                    yield result
+
+        async def content_generator():
+            nonlocal full_response, sources
+            chunks = []
+
+            async with aclosing(greeting_chunks()) as results:
+                async for result in results:
+                    if isinstance(result, tuple):
+                        chunk, chunk_sources = result
+                        if chunk_sources is not None:
+                            # This is the last message containing sources, don't yield the chunk
+                            sources = chunk_sources
+                            continue
+                    else:
+                        # If it's not a tuple, it's just a chunk
+                        chunk = result
+
+                    full_response += chunk
+                    chunks.append(chunk)
+                    response = {
+                        'content': chunk, 
+                        'type': 'content',
+                        'timestamp': time.time()
+                    }
+                    logging.info(f"Yielding content: {response}")
+                    yield f"data: {json.dumps(response)}\n\n"
+
+            if cached_greeting is None and greeting_key is not None and chunks:
+                init_greetings.put(greeting_key, chunks)
             
             # Add the assistant's message to the conversation
-            global_conversation.add_message("Assistant", full_response)
+            session.conversation.add_message("Assistant", full_response)
             
             # Update the last response for the avatar
-            global last_avatar_response
-            last_avatar_response = full_response
+            session.last_response = full_response
+            # The backend writes a file, keep it off the event loop
+            await asyncio.to_thread(session_store.save, session)
             
             done_response = {
                 'type': 'done', 
                 'timestamp': time.time(),
-                #'conversation': [{"role": msg.role, "content": msg.content} for msg in global_conversation.get_history()],
+                #'conversation': [{"role": msg.role, "content": msg.content} for msg in session.conversation.get_history()],
                 'sources': sources
             }
             yield f"data: {json.dumps(done_response)}\n\n"
         
         logging.debug("Successfully generated response, returning StreamingResponse")
-        return StreamingResponse(content_generator(), media_type="text/event-stream")
+        return leased_streaming_response(content_generator(), lease, "init")
     except Exception as e:
+        lease.release()
         error_message = str(e)
         logging.error(f"Error in /init endpoint: {error_message}")
         raise HTTPException(status_code=500, detail=error_message)
 
+@router.get("/metrics")
+async def metrics():
+    """Counts of completed, cancelled and failed /ask and /init streams, and cache usage."""
+    generation = engine_holder.current
+    answer_cache = getattr(generation.query_engine, "answer_cache", None) if generation is not None else None
+    return {
+        "requests": request_metrics.snapshot(),
+        "answer_cache": answer_cache.stats() if answer_cache is not None else None,
+        "init_greetings": init_greetings.stats(),
+        "sessions": len(session_store),
+    }
+
 @router.get("/rag_config")
 async def rag_config():
     """
@@ -405,35 +738,25 @@ async def reload_rag_components():
         logger.error(f"Error recargando componentes RAG: {str(e)}")
         raise
 
-def move_files_preserving_structure(source_folder: Path, dest_folder: Path, timestamp: str):
-    """
-    Moves entire subdirectories and their contents from source folder to destination folder.
-    
-    Args:
-        source_folder (Path): Source directory path
-        dest_folder (Path): Destination directory path
-        timestamp (str): Timestamp to append to directory names
-    """
-    logger.info(f"Moving data")
-    try:
-        # Iterate through immediate subdirectories only
-        for item in source_folder.iterdir():
-            logger.info(f"Moving {item}")
-            if item.is_dir():
-                # Create timestamped directory name
-                timestamped_dirname = f"{item.name}_{timestamp}"
-                dest_dir = dest_folder / timestamped_dirname
-                
-                # Create destination directory
-                dest_dir.mkdir(parents=True, exist_ok=True)
-                
-                # Move the entire directory and its contents
-                shutil.move(str(item), str(dest_dir))
-                logger.info(f"Directory moved to: {dest_dir}")
-                
-    except Exception as e:
-        logger.error(f"Error moving directories: {str(e)}")
-        raise
+def get_known_domains() -> set:
+    """Domains of the serving index and the domain folders of the data folder."""
+    domains = set()
+    generation = engine_holder.current
+    if generation is not None and generation.domain_manager is not None:
+        domains.update(generation.domain_manager.vector_stores.keys())
+    data_folder = Path(private_settings.DATA_FOLDER)
+    if data_folder.is_dir():
+        domains.update(entry.name for entry in data_folder.iterdir() if entry.is_dir())
+    return domains
+
+def restore_previous_version(file_path: Path, archived_path: Optional[Path]) -> None:
+    """Put back the archived version of a document whose replacement could not be indexed."""
+    if archived_path is not None:
+        shutil.copy2(archived_path, file_path)
+        logger.info(f"Restored previous version of {file_path.name} from {archived_path}")
+    else:
+        file_path.unlink(missing_ok=True)
+        logger.info(f"Removed {file_path.name}, which could not be indexed")
 
 @router.post("/update_RAG_document")
 async def update_RAG_document(
@@ -441,10 +764,21 @@ async def update_RAG_document(
     domain: str = Form(...)
 ):
     """
-    Update the RAG document by moving the current document to old_data and saving the new document in the data folder.
-    Also removes the chroma_db directory and reinitializes RAG setup.
+    Add a document to a domain, or replace the document with the same name.
+
+    The previous version is archived to old_data and only the uploaded document is
+    parsed, chunked and embedded into the domain's existing vector store. Queries keep
+    being served from the current index while the document is being ingested.
     """
     try:
+        # The running job copied the index before this upload, which would be lost on the swap
+        active_job = ingestion_jobs.active_job
+        if active_job is not None:
+            raise HTTPException(
+                status_code=409,
+                detail=f"RAG setup job {active_job.id} is running, retry once it has finished"
+            )
+
         # Validate file extension
         allowed_extensions = {'.doc', '.docx', '.pdf', '.PDF'}
         file_ext = Path(file.filename).suffix
@@ -453,40 +787,74 @@ async def update_RAG_document(
                 status_code=400,
                 detail=f"Invalid file type. Allowed types are: {', '.join(allowed_extensions)}"
             )
+        if domain not in get_known_domains():
+            raise HTTPException(status_code=400, detail=f"Unknown domain: {domain}")
 
         # Setup paths
         data_folder = Path(private_settings.DATA_FOLDER)
-        old_data_folder = Path(private_settings.DATA_FOLDER).parent / 'old_data' / domain
-        chroma_db_folder = Path(private_settings.DATA_FOLDER).parent / 'chroma_db'
-        
-        # Create necessary directories
-        old_data_folder.mkdir(parents=True, exist_ok=True)
-        
-        # Move existing files to old_data with timestamp
         domain_folder = data_folder / domain
-        
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        move_files_preserving_structure(data_folder, old_data_folder, timestamp)
-            
-        # Remove and recreate chroma_db
-        if chroma_db_folder.exists():
-            shutil.rmtree(chroma_db_folder)
-            logger.info(f"Removed chroma_db directory: {chroma_db_folder}")
-        
-        # Save new file
+        old_data_folder = data_folder.parent / 'old_data' / domain
+        uploads_folder = data_folder.parent / 'uploads'
+
+        # Create necessary directories
         domain_folder.mkdir(parents=True, exist_ok=True)
-        
-        safe_filename = file.filename.replace(" ", "_")
+        uploads_folder.mkdir(parents=True, exist_ok=True)
+
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        safe_filename = Path(file.filename).name.replace(" ", "_")
         file_path = domain_folder / safe_filename
-        
-        # Save file in chunks to handle large files
-        with open(file_path, "wb") as buffer:
+
+        # Save the upload outside the data folder first, so a partial file is never ingested
+        staged_path = uploads_folder / f"{timestamp}_{safe_filename}"
+        with open(staged_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
-        
+
+        # Archive the version being replaced
+        archived_path = None
+        if file_path.exists():
+            old_data_folder.mkdir(parents=True, exist_ok=True)
+            archived_path = old_data_folder / f"{file_path.stem}_{timestamp}{file_path.suffix}"
+            shutil.copy2(file_path, archived_path)
+            logger.info(f"Previous version archived to: {archived_path}")
+
+        shutil.move(str(staged_path), str(file_path))
         logger.info(f"New file saved to: {file_path}")
-        
+
+        lease = engine_holder.acquire()
+        if lease is None:
+            return {
+                "message": "Document saved. Call /setup_rag to index it."
+            }
+
+        def add_or_update_document() -> bool:
+            with lease, index_write_lock:
+                try:
+                    return lease.domain_manager.add_or_update_document(domain, safe_filename)
+                finally:
+                    # Cached answers may come from the replaced document
+                    clear_answer_cache(lease.query_engine)
+                    current = engine_holder.current
+                    if current is not None and current.query_engine is not lease.query_engine:
+                        clear_answer_cache(current.query_engine)
+
+        start_time = time.time()
+        try:
+            ingested = await asyncio.to_thread(add_or_update_document)
+        except Exception:
+            restore_previous_version(file_path, archived_path)
+            raise
+        if not ingested:
+            restore_previous_version(file_path, archived_path)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Document {safe_filename} could not be indexed, the previous version was kept"
+            )
+        logger.info(f"Document {safe_filename} indexed in domain {domain} in {time.time() - start_time:.2f} seconds")
+
         return {
-            "message": "Document updated and RAG reinitialized successfully."
+            "message": "Document updated and indexed successfully.",
+            "domain": domain,
+            "document": safe_filename
         }
         
     except HTTPException as he:
@@ -497,6 +865,3 @@ async def update_RAG_document(
             status_code=500,
             detail=f"Error updating RAG document: {str(e)}"
         )
-
-
-
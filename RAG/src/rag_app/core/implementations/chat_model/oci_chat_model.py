@@ -3,10 +3,14 @@ from abc import ABC, abstractmethod
 from langchain_community.chat_models import ChatOCIGenAI
 from langchain_core.prompts import PromptTemplate
 from typing import Optional, Iterator, Union, AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
 import oci
 from rag_app.core.interfaces.chat_model_interface import ChatModelInterface
 from ...interfaces.conversation_interface import ConversationInterface
 from rag_app.core.implementations.conversation.conversation import Conversation
+from rag_app.core.utils.conversation_history import ConversationHistoryManager
+from rag_app.core.utils.thread_stream import iterate_in_thread
+from rag_app.private_config import private_settings
 import random
 
 # Enable debug logging for the entire oci package
@@ -20,6 +24,13 @@ logging.getLogger("oci").setLevel(logging.CRITICAL)
 
 
 class ChatModel(ChatModelInterface):
+    # Builds the history part of the prompt; without one the whole history is sent
+    history_manager: Optional[ConversationHistoryManager] = None
+    # The OCI SDK is blocking: streams are read on these threads, shared by all chat models
+    _stream_executor: Optional[ThreadPoolExecutor] = None
+    _stream_workers: int = 0
+    stream_buffer: int = 64
+
     @abstractmethod
     def __init__(self):
         pass
@@ -47,6 +58,31 @@ class ChatModel(ChatModelInterface):
             for key, default in keys_with_defaults.items()
         }
 
+    def _init_history_manager(self, settings: dict) -> None:
+        self.history_manager = ConversationHistoryManager(
+            token_budget=settings.get("HISTORY_TOKEN_BUDGET", 1500),
+            max_turns=settings.get("HISTORY_TURNS", 4),
+            summarize=self._summarize_history,
+        )
+
+    def _init_stream_executor(self, settings: dict) -> None:
+        workers = max(1, settings.get("STREAM_WORKERS", 16))
+        ChatModel.stream_buffer = max(1, settings.get("STREAM_BUFFER", 64))
+        if ChatModel._stream_executor is None or ChatModel._stream_workers != workers:
+            if ChatModel._stream_executor is not None:
+                # Running streams finish on the old threads
+                ChatModel._stream_executor.shutdown(wait=False)
+            ChatModel._stream_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-stream")
+            ChatModel._stream_workers = workers
+
+    async def _summarize_history(self, summary: str, messages: str) -> str:
+        """Fold older messages into the running summary of a conversation."""
+        system_prompt = private_settings.prompt.HISTORY_SUMMARY.format(summary=summary or "-", messages=messages)
+        # chat() treats the system prompt as a template
+        system_prompt = system_prompt.replace("{", "{{").replace("}", "}}")
+        response = await self.chat(system_prompt=system_prompt, query="", conversation=Conversation(), stream=False)
+        return response.content if hasattr(response, "content") else str(response)
+
     async def chat(
         self,
         system_prompt: str,
@@ -57,17 +93,22 @@ class ChatModel(ChatModelInterface):
         prompt_template = f"{system_prompt}\n\n"
         # logger.info(f"System prompt:\n\n {prompt_template}\n\n")
 
-        # if conversation:
-        if conversation.get_formatted_history() != "":
+        # Formatted once per call; the history manager keeps it within its token budget
+        if self.history_manager is not None and hasattr(conversation, "get_formatted_lines"):
+            history = self.history_manager.format_history(conversation)
+        else:
+            history = conversation.get_formatted_history()
+
+        if history != "":
             prompt_template += "### Histoire de la conversation \n\n"
-            prompt_template += f"{conversation.get_formatted_history()}\n\n"
+            # Braces in the messages must not be read as template variables
+            prompt_template += history.replace("{", "{{").replace("}", "}}") + "\n\n"
 
         if query == "":
             logger.info("query empty")
         
         prompt = PromptTemplate(input_variables=["query"], template=prompt_template)
         # Log the final prompt
-        history = conversation.get_formatted_history()
 
         # logger.info(f"History:\n\n {history}\n\n")
         # logger.info(f"Final prompt: {prompt.format(query=query)}")
@@ -95,11 +136,28 @@ class ChatModel(ChatModelInterface):
         logger.debug(
             f"Streaming response with {self.__class__.__name__} for query: {query[:50]}..."
         )
+        # Read on a worker thread so a slow generation never blocks the event loop
+        chunks = iterate_in_thread(
+            lambda: llm_chain.stream({"query": query}),
+            executor=self._stream_executor,
+            max_buffered=self.stream_buffer,
+            name=f"{self.__class__.__name__} stream",
+        )
+        texts = self._repair_stream(chunks)
+        try:
+            async for text in texts:
+                yield text
+        finally:
+            await texts.aclose()
+            await chunks.aclose()
+
+    async def _repair_stream(self, chunks: AsyncIterator) -> AsyncIterator[str]:
+        """Yield the content of the streamed chunks, fixing words with malformed characters."""
         full_response = ""
         buffer = ""
         is_fixing = False
 
-        async for chunk in llm_chain.astream({"query": query}):
+        async for chunk in chunks:
             if chunk.content is None:
                 continue
 
@@ -317,6 +375,8 @@ class OCI_CommandRplus(ChatModel, ChatModelInterface):
         }
 
         model_kwargs = self._process_model_params(settings, default_model_params)
+        self._init_history_manager(settings)
+        self._init_stream_executor(settings)
         logger.info(
             f"Model {self.__class__.__name__} initializing with model parameters: {model_kwargs}"
         )
@@ -353,6 +413,8 @@ class OCI_Llama3_70(ChatModel, ChatModelInterface):
         }
 
         model_kwargs = self._process_model_params(settings, default_model_params)
+        self._init_history_manager(settings)
+        self._init_stream_executor(settings)
         logger.info(
             f"Model {self.__class__.__name__} initializing with model parameters: {model_kwargs}"
         )
@@ -0,0 +1,141 @@
+import json
+import logging
+import os
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+from ...interfaces.chunk_store_interface import ChunkStoreInterface
+
+logger = logging.getLogger(__name__)
+
+class ChunkStore(ChunkStoreInterface):
+    """
+    In-memory index of the chunks produced during ingestion.
+
+    Keeps an O(1) chunk_id -> chunk map and, for chunks whose breadcrumb carries
+    "(part i/n)" information, the ordered list of parts of the section they belong to.
+    The store is filled by the DomainManager while chunking, so the query path never
+    has to read the chunk JSON files back from disk.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._chunks: Dict[str, Dict[str, Any]] = {}
+        self._sections: Dict[str, Tuple[Dict[str, Any], ...]] = {}
+        self._documents: Dict[str, List[str]] = {}
+        self._domains: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._chunks
+
+    def add_chunks(self, domain_name: str, document_id: str, chunks: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self.remove_document(document_id)
+
+            chunk_ids = []
+            section: List[Dict[str, Any]] = []
+            section_key = None
+            for chunk in chunks:
+                if not all(k in chunk for k in ['chunk_id', 'content', 'metadata']):
+                    logger.warning(f"Invalid chunk structure for document {document_id}: {list(chunk.keys())}")
+                    continue
+
+                chunk_id = chunk['chunk_id']
+                if chunk_id in self._chunks:
+                    logger.warning(f"Duplicate chunk_id found: {chunk_id}")
+                self._chunks[chunk_id] = chunk
+                chunk_ids.append(chunk_id)
+
+                # Group consecutive parts of the same section together
+                part_info = self._parse_part(chunk['metadata'])
+                if part_info is None:
+                    self._close_section(section)
+                    section, section_key = [], None
+                    continue
+
+                key, current_part = part_info
+                if current_part == 1 or key != section_key:
+                    self._close_section(section)
+                    section, section_key = [], key
+                section.append(chunk)
+
+            self._close_section(section)
+            self._documents[document_id] = chunk_ids
+            domain_documents = self._domains.setdefault(domain_name, [])
+            if document_id not in domain_documents:
+                domain_documents.append(document_id)
+
+        logger.debug(f"Registered {len(chunk_ids)} chunks for document {document_id} in domain {domain_name}")
+
+    def get(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        return self._chunks.get(chunk_id)
+
+    def get_section(self, chunk_id: str) -> Optional[List[Dict[str, Any]]]:
+        section = self._sections.get(chunk_id)
+        return list(section) if section is not None else None
+
+    def remove_document(self, document_id: str) -> None:
+        with self._lock:
+            for chunk_id in self._documents.pop(document_id, []):
+                self._chunks.pop(chunk_id, None)
+                self._sections.pop(chunk_id, None)
+            for domain_documents in self._domains.values():
+                if document_id in domain_documents:
+                    domain_documents.remove(document_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._chunks = {}
+            self._sections = {}
+            self._documents = {}
+            self._domains = {}
+        logger.info("Chunk store cleared")
+
+    def load_directory(self, domain_name: str, chunks_dir: str) -> int:
+        """
+        Load the chunk JSON files written by a previous ingestion for one domain.
+
+        Returns the number of chunks loaded.
+        """
+        if not os.path.isdir(chunks_dir):
+            logger.debug(f"No chunks directory to load: {chunks_dir}")
+            return 0
+
+        loaded = 0
+        for json_file in sorted(f for f in os.listdir(chunks_dir) if f.endswith('.json')):
+            try:
+                with open(os.path.join(chunks_dir, json_file), 'r', encoding='utf-8') as f:
+                    chunks = json.load(f)
+            except Exception as e:
+                logger.error(f"Error loading {json_file}: {str(e)}")
+                continue
+
+            if not chunks:
+                continue
+            document_id = chunks[0].get('metadata', {}).get('document_id', json_file)
+            self.add_chunks(domain_name, document_id, chunks)
+            loaded += len(chunks)
+
+        logger.info(f"Loaded {loaded} chunks for domain {domain_name} from {chunks_dir}")
+        return loaded
+
+    def _close_section(self, section: List[Dict[str, Any]]) -> None:
+        if not section:
+            return
+        parts = tuple(section)
+        for chunk in parts:
+            self._sections[chunk['chunk_id']] = parts
+
+    @staticmethod
+    def _parse_part(metadata: Dict[str, Any]) -> Optional[Tuple[Tuple[str, str], int]]:
+        breadcrumb = metadata.get('breadcrumb', '')
+        if '(part ' not in breadcrumb:
+            return None
+        try:
+            base_breadcrumb, part_info = breadcrumb.rsplit(' (part ', 1)
+            current_part = int(part_info.split(')')[0].split('/')[0])
+        except ValueError:
+            return None
+        return (base_breadcrumb, metadata.get('heading', '')), current_part
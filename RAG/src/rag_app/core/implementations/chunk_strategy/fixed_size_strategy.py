@@ -2,16 +2,18 @@ from typing import List, Dict
 import logging
 from src.rag_app.core.interfaces.chunk_strategy_interface import ChunkStrategyInterface
 from src.rag_app.core.interfaces.document_interface import Chunk
-from PyPDF2 import PdfReader
+from src.rag_app.core.utils.pdf_extraction import read_pdf_text
+from src.rag_app.core.utils.parsed_document_cache import ParsedDocumentCache
 import os
 
 logger = logging.getLogger(__name__)
 
 class FixedSizeChunkStrategy(ChunkStrategyInterface):
-    def __init__(self, chunk_size: int, overlap: int = 0):
+    def __init__(self, chunk_size: int, overlap: int = 0, parsed_cache: ParsedDocumentCache = None):
         self._strategy_name = "Fixed Size"
         self.chunk_size = chunk_size
         self.overlap = overlap
+        self.parsed_cache = parsed_cache
 
     @property
     def strategy_name(self) -> str:
@@ -35,39 +37,32 @@ class FixedSizeChunkStrategy(ChunkStrategyInterface):
 
         if file_extension == '.pdf':
             try:
-                with open(doc_path, 'rb') as f:
-                    pdf = PdfReader(f)
-                    page_texts = [page.extract_text() or '' for page in pdf.pages]
-                    full_text = '\n'.join(page_texts)
-                    # Build a list of (start, end, page_number) for each page
-                    page_boundaries = []
-                    cursor = 0
-                    for i, text in enumerate(page_texts):
-                        length = len(text)
-                        page_boundaries.append((cursor, cursor + length, i + 1))
-                        cursor += length + 1  # +1 for the '\n' join
-                    start = 0
-                    content_length = len(full_text)
-                    while start < content_length:
-                        end = start + self.chunk_size
-                        chunk_content = full_text[start:end]
-                        # Find all page numbers that overlap with this chunk
-                        page_numbers = []
-                        for (p_start, p_end, p_num) in page_boundaries:
-                            if not (end <= p_start or start >= p_end):
-                                page_numbers.append(p_num)
-                        # Convert to unique, sorted, comma-separated string
-                        page_numbers_str = ','.join(str(num) for num in sorted(set(page_numbers)))
-                        metadata = {"start": start, "end": end, "page_number": page_numbers_str}
-                        chunk = Chunk(
-                            document_id=document_id,
-                            chunk_id=f"{document_id}_chunk_{chunk_id}",
-                            metadata=metadata,
-                            content=chunk_content
-                        )
-                        chunks.append(chunk)
-                        start = end - self.overlap
-                        chunk_id += 1
+                parsed = read_pdf_text(doc_path, self.parsed_cache)
+                full_text = parsed["text"]
+                # (start, end, page_number) for each page
+                page_boundaries = parsed["page_boundaries"]
+                start = 0
+                content_length = len(full_text)
+                while start < content_length:
+                    end = start + self.chunk_size
+                    chunk_content = full_text[start:end]
+                    # Find all page numbers that overlap with this chunk
+                    page_numbers = []
+                    for (p_start, p_end, p_num) in page_boundaries:
+                        if not (end <= p_start or start >= p_end):
+                            page_numbers.append(p_num)
+                    # Convert to unique, sorted, comma-separated string
+                    page_numbers_str = ','.join(str(num) for num in sorted(set(page_numbers)))
+                    metadata = {"start": start, "end": end, "page_number": page_numbers_str}
+                    chunk = Chunk(
+                        document_id=document_id,
+                        chunk_id=f"{document_id}_chunk_{chunk_id}",
+                        metadata=metadata,
+                        content=chunk_content
+                    )
+                    chunks.append(chunk)
+                    start = end - self.overlap
+                    chunk_id += 1
             except Exception as e:
                 logger.error(f"Error reading PDF for chunking: {e}")
         else:
@@ -89,5 +84,5 @@ class FixedSizeChunkStrategy(ChunkStrategyInterface):
         
         return chunks
 
-    async def format_result(self, data_path, combined_results: List[dict], result_domains: List[str]) -> List[dict]:
+    async def format_result(self, data_path, combined_results: List[dict], result_domains: List[str], chunk_store=None) -> List[dict]:
         return combined_results
\ No newline at end of file
@@ -1,5 +1,6 @@
 from typing import List, Dict
 import logging
+import numpy as np
 from src.rag_app.core.interfaces.chunk_strategy_interface import ChunkStrategyInterface
 from src.rag_app.core.interfaces.embedding_model_interface import EmbeddingModelInterface
 from src.rag_app.core.interfaces.document_interface import Chunk
@@ -43,7 +44,7 @@ class SemanticChunkStrategy(ChunkStrategyInterface):
             logger.error(f"Rejoined: {repr(initial_joined)}")
             raise ValueError("Content loss detected during initial split")
 
-        print("No data loss detected. Sentences split successfully.")
+        logger.debug(f"Split document {document_id} into {len(sentences)} sentences without data loss")
         
         # Handle cases where sentences are too long
         processed_sentences = []
@@ -101,74 +102,79 @@ class SemanticChunkStrategy(ChunkStrategyInterface):
             raise ValueError("Content length validation failed")
         
         sentences = processed_sentences
-        sentence_ids = list(range(len(sentences)))
-        
-        embeddings = [self.embedding_model.generate_embedding(sentence) for sentence in sentences]
-        similarities = [
-            self.embedding_model.calculate_cosine_similarity(embeddings[i], embeddings[i - 1])
-            for i in range(1, len(embeddings))
-        ]
-        
-        current_chunk_seq = [0]
-        
-        def recursive_split(start_idx, end_idx):
-            logger.warning(f"Start index: {start_idx}, End index:{end_idx} ")
-            if start_idx < end_idx:
-                logger.warning(f"Similarities: {similarities[start_idx:end_idx]}")
-                logger.warning(f"Similarities max: {max(similarities[start_idx:end_idx])}")
-                logger.warning(f"Similarities max index: {similarities[start_idx:end_idx].index(max(similarities[start_idx:end_idx]))}")
-                logger.warning(f"Similarities max index absol: {start_idx + similarities[start_idx:end_idx].index(max(similarities[start_idx:end_idx]))}")
-            if start_idx > end_idx:
-                logger.error("Start index is greater than end index.")
-                return []
-            
-            chunk_content = ' '.join(sentences[start_idx:end_idx + 1])
-            
-            # If chunk is within size limit, create chunk
-            logger.warning(f"Length chunk size: {len(chunk_content)} ")
-            logger.warning(f"Chunk content: {chunk_content} ")
-            if len(chunk_content) <= self.max_chunk_size:
-                chunk_seq = current_chunk_seq[0]
-                current_chunk_seq[0] += 1
-                logger.warning(f"Saving chunks...")
-                return [Chunk(
-                    document_id=document_id,
-                    chunk_id=f"{document_id}_{chunk_seq}",
-                    content=chunk_content,
-                    metadata={
-                        "start_sentence": start_idx,
-                        "end_sentence": end_idx,
-                        "forced_split": False
-                    }
-                )]
+        if not sentences:
+            logger.error(f"No sentences to chunk in document {document_id}")
+            return []
+
+        # One batched call; single inputs come back unwrapped from some models
+        embeddings = np.asarray(self.embedding_model.generate_embedding(sentences), dtype=np.float64)
+        if embeddings.ndim == 1:
+            embeddings = embeddings.reshape(1, -1)
+        # similarities[i] is the cosine similarity of sentences i and i + 1
+        norms = np.linalg.norm(embeddings, axis=1)
+        similarities = (embeddings[1:] * embeddings[:-1]).sum(axis=1) / (norms[1:] * norms[:-1])
+        max_similarity = _RangeArgmax(similarities)
+
+        # Length of ' '.join(sentences[start:end + 1]) is lengths[end + 1] - lengths[start] + end - start
+        lengths = np.concatenate(([0], np.cumsum([len(sentence) for sentence in sentences])))
+
+        chunks = []
+
+        def add_chunk(start_idx: int, end_idx: int, forced_split: bool) -> None:
+            chunks.append(Chunk(
+                document_id=document_id,
+                chunk_id=f"{document_id}_{len(chunks)}",
+                content=' '.join(sentences[start_idx:end_idx + 1]),
+                metadata={
+                    "start_sentence": start_idx,
+                    "end_sentence": end_idx,
+                    "forced_split": forced_split
+                }
+            ))
+
+        # Split ranges that are too long at their most similar pair of adjacent sentences,
+        # depth first, left half before right half
+        ranges = [(0, len(sentences) - 1)]
+        while ranges:
+            start_idx, end_idx = ranges.pop()
+            chunk_size = int(lengths[end_idx + 1] - lengths[start_idx]) + end_idx - start_idx
+            if chunk_size <= self.max_chunk_size:
+                add_chunk(start_idx, end_idx, forced_split=False)
+            elif start_idx == end_idx:
+                # A single sentence can't be split further
+                logger.warning(f"Forced to create oversized chunk: {chunk_size} characters")
+                add_chunk(start_idx, end_idx, forced_split=True)
             else:
-                logger.warning(f"chunk size limit exceded.")
-            
-            # If we can't split further (only one sentence), force create the chunk
-            if start_idx == end_idx:
-                logger.warning(f"Forced to create oversized chunk: {len(chunk_content)} characters")
-                chunk_seq = current_chunk_seq[0]
-                current_chunk_seq[0] += 1
-                return [Chunk(
-                    document_id=document_id,
-                    chunk_id=f"{document_id}_{chunk_seq}",
-                    content=chunk_content,
-                    metadata={
-                        "start_sentence": start_idx,
-                        "end_sentence": end_idx,
-                        "forced_split": True
-                    }
-                )]
-            
-            # Find split point based on similarity
-            max_similarity_idx = start_idx + similarities[start_idx:end_idx].index(max(similarities[start_idx:end_idx]))
-            logger.warning(f"Maximum similarity index: {max_similarity_idx}")
-            
-            return recursive_split(start_idx, max_similarity_idx) + recursive_split(max_similarity_idx + 1, end_idx)
-        
-        chunks = recursive_split(0, len(sentences) - 1)
-        
+                split_idx = max_similarity.argmax(start_idx, end_idx - 1)
+                ranges.append((split_idx + 1, end_idx))
+                ranges.append((start_idx, split_idx))
+
+        logger.info(f"Semantic chunking of document {document_id}: {len(sentences)} sentences, {len(chunks)} chunks")
         return chunks
 
-    async def format_result(self, data_path, combined_results: List[dict], result_domains: List[str]) -> List[dict]:
-        return combined_results
\ No newline at end of file
+    async def format_result(self, data_path, combined_results: List[dict], result_domains: List[str], chunk_store=None) -> List[dict]:
+        return combined_results
+
+
+class _RangeArgmax:
+    """
+    Sparse table answering "index of the first maximum in values[start:end + 1]" in O(1)
+    after an O(n log n) build.
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+        self.levels = [np.arange(len(values), dtype=np.int64)]
+        width = 1
+        while 2 * width <= len(values):
+            previous = self.levels[-1]
+            left, right = previous[:-width], previous[width:]
+            # Ties keep the left index, the first occurrence
+            self.levels.append(np.where(values[left] >= values[right], left, right))
+            width *= 2
+
+    def argmax(self, start: int, end: int) -> int:
+        level = (end - start + 1).bit_length() - 1
+        left = self.levels[level][start]
+        right = self.levels[level][end - (1 << level) + 1]
+        return int(left if self.values[left] >= self.values[right] else right)
@@ -2,17 +2,22 @@ from typing import List, Dict
 import logging
 from src.rag_app.core.interfaces.chunk_strategy_interface import ChunkStrategyInterface
 from src.rag_app.core.interfaces.document_interface import Chunk
+from src.rag_app.core.interfaces.chunk_store_interface import ChunkStoreInterface
+from src.rag_app.core.implementations.chunk_store.chunk_store import ChunkStore
+from src.rag_app.core.utils.pdf_extraction import read_pdf_text
+from src.rag_app.core.utils.parsed_document_cache import ParsedDocumentCache
 from docx import Document
 import json
 import os
-from pypdf import PdfReader
 import re
 
 logger = logging.getLogger(__name__)
 
 class StructuredDocumentStrategy(ChunkStrategyInterface):
-    def __init__(self, chunk_size: int = 1000, overlap: int = 100, max_chunk_size: int = 4000, min_chunk_size: int = 350):
+    def __init__(self, chunk_size: int = 1000, overlap: int = 100, max_chunk_size: int = 4000, min_chunk_size: int = 350,
+                 parsed_cache: ParsedDocumentCache = None):
         self._strategy_name = "Structured Document"
+        self.parsed_cache = parsed_cache
         self.chunk_size = chunk_size
         self.max_chunk_size = max_chunk_size
         self.overlap = overlap if overlap is not None else 0
@@ -279,19 +284,40 @@ class StructuredDocumentStrategy(ChunkStrategyInterface):
         return chunks
 
     def extract_docx_with_structure(self, file_path: str) -> Dict:
-        """Extract structure from a document file (DOCX or PDF)."""
+        """
+        Extract structure from a document file (DOCX or PDF). The structure only depends on
+        the file, not on the chunking parameters, so it is taken from the parsed document
+        cache when there is one.
+        """
         file_extension = os.path.splitext(file_path)[1].lower()
         
         if file_extension in ['.doc', '.docx']:
-            return self._extract_docx_structure(file_path)
+            return self._get_structure(file_path, "docx_structure", self._extract_docx_structure)
         elif file_extension == '.pdf':
-            return self._extract_pdf_structure(file_path)
+            try:
+                return self._get_structure(file_path, "pdf_structure", self._extract_pdf_structure)
+            except Exception as e:
+                logger.error(f"Error processing PDF file: {str(e)}")
+                return {"file": file_path, "sections": []}
         else:
             logger.warning(f"Unsupported file type: {file_extension}")
             return {"file": file_path, "sections": []}
 
+    def _get_structure(self, file_path: str, kind: str, parse) -> Dict:
+        if self.parsed_cache is None:
+            return parse(file_path)
+        structure = self.parsed_cache.get_or_parse(file_path, kind, parse)
+        structure["file"] = file_path
+        return structure
+
     def _extract_docx_structure(self, docx_path: str) -> Dict:
-        """Extract structure specifically from DOCX files."""
+        """
+        Extract structure specifically from DOCX files.
+
+        A single pass over the body XML: paragraphs, paragraph style names, tables and
+        image targets are resolved through maps built once per document, instead of
+        searching the paragraph and style lists for every element.
+        """
         doc = Document(docx_path)
         structure = {"file": docx_path, "sections": []}
         current_section = None
@@ -301,37 +327,55 @@ class StructuredDocumentStrategy(ChunkStrategyInterface):
                 structure["default"] = {"content": [], "tables": [], "images": []}
             return structure["default"]
 
+        paragraphs = {paragraph._element: paragraph for paragraph in doc.paragraphs}
+        tables = doc.tables
+        rels = doc.part.rels
+        style_names: Dict[str, str] = {}
+
+        def get_style_name(paragraph) -> str:
+            style_id = paragraph._p.style
+            if style_id not in style_names:
+                style = paragraph.style
+                style_names[style_id] = style.name if style is not None else ""
+            return style_names[style_id]
+
         body = doc.element.body
         current_table_index = 0
 
         for child in body.iter():
-            if child.tag.endswith('}p'):
-                for paragraph in doc.paragraphs:
-                    if paragraph._element is child:
-                        text = paragraph.text.strip()
-                        if not text:
-                            continue
-
-                        style_name = paragraph.style.name
-
-                        if style_name.startswith("Heading"):
-                            heading_level = int(style_name.split()[-1])
-                            current_section = {
-                                "title": text,
-                                "level": heading_level,
-                                "content": [],
-                                "tables": [],
-                                "images": []
-                            }
-                            structure["sections"].append(current_section)
-                        else:
-                            target_section = current_section if current_section else get_default_section()
-                            target_section["content"].append(text)
-                        break
+            tag = child.tag
+            if not isinstance(tag, str):
+                # XML comments and processing instructions
+                continue
+
+            if tag.endswith('}p'):
+                paragraph = paragraphs.get(child)
+                if paragraph is None:
+                    # Only paragraphs directly in the body carry text; those in tables are read with the table
+                    continue
+                text = paragraph.text.strip()
+                if not text:
+                    continue
+
+                style_name = get_style_name(paragraph)
+
+                if style_name.startswith("Heading"):
+                    heading_level = int(style_name.split()[-1])
+                    current_section = {
+                        "title": text,
+                        "level": heading_level,
+                        "content": [],
+                        "tables": [],
+                        "images": []
+                    }
+                    structure["sections"].append(current_section)
+                else:
+                    target_section = current_section if current_section else get_default_section()
+                    target_section["content"].append(text)
 
-            elif child.tag.endswith('}tbl'):
-                if current_table_index < len(doc.tables):
-                    table = doc.tables[current_table_index]
+            elif tag.endswith('}tbl'):
+                if current_table_index < len(tables):
+                    table = tables[current_table_index]
                     table_content = []
                     for row in table.rows:
                         row_content = [cell.text.strip() for cell in row.cells]
@@ -342,12 +386,12 @@ class StructuredDocumentStrategy(ChunkStrategyInterface):
                     target_section["tables"].append({"id": current_table_index, "content": table_content})
                     current_table_index += 1
 
-            elif child.tag.endswith('}drawing'):
+            elif tag.endswith('}drawing'):
                 blip = child.find('.//a:blip', namespaces={'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
                 if blip is not None:
                     rel_id = blip.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-                    if rel_id and rel_id in doc.part.rels:
-                        image_path = doc.part.rels[rel_id].target_ref
+                    if rel_id and rel_id in rels:
+                        image_path = rels[rel_id].target_ref
                         target_section = current_section if current_section else get_default_section()
                         target_section["content"].append(f"![Image]({image_path})")
                         target_section["images"].append({"id": image_path, "content": image_path})
@@ -359,56 +403,50 @@ class StructuredDocumentStrategy(ChunkStrategyInterface):
         structure = {"file": pdf_path, "sections": []}
         current_section = None
         
-        try:
-            reader = PdfReader(pdf_path)
+        parsed = read_pdf_text(pdf_path, self.parsed_cache)
+        
+        # Initialize default section
+        structure["default"] = {"content": [], "tables": [], "images": []}
+        
+        for (start, end, _), images in zip(parsed["page_boundaries"], parsed["page_images"]):
+            text = parsed["text"][start:end]
             
-            # Initialize default section
-            structure["default"] = {"content": [], "tables": [], "images": []}
+            # Split text into lines
+            lines = text.split('\n')
             
-            for page_num, page in enumerate(reader.pages):
-                text = page.extract_text()
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
                 
-                # Split text into lines
-                lines = text.split('\n')
+                # Heading detection heuristics
+                is_heading = self._is_potential_heading(line)
                 
-                for line in lines:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    # Heading detection heuristics
-                    is_heading = self._is_potential_heading(line)
+                if is_heading:
+                    # Determine heading level based on characteristics
+                    heading_level = self._determine_heading_level(line)
                     
-                    if is_heading:
-                        # Determine heading level based on characteristics
-                        heading_level = self._determine_heading_level(line)
-                        
-                        current_section = {
-                            "title": line,
-                            "level": heading_level,
-                            "content": [],
-                            "tables": [],
-                            "images": []
-                        }
-                        structure["sections"].append(current_section)
-                    else:
-                        # Add content to current section or default
-                        target_section = current_section if current_section else structure["default"]
-                        target_section["content"].append(line)
-                
-                # Extract images if available
-                if page.images:
+                    current_section = {
+                        "title": line,
+                        "level": heading_level,
+                        "content": [],
+                        "tables": [],
+                        "images": []
+                    }
+                    structure["sections"].append(current_section)
+                else:
+                    # Add content to current section or default
                     target_section = current_section if current_section else structure["default"]
-                    for i, image in enumerate(page.images):
-                        image_id = f"page_{page_num}_image_{i}"
-                        target_section["content"].append(f"![Image]({image_id})")
-                        target_section["images"].append({"id": image_id, "content": image_id})
-            
-            return structure
+                    target_section["content"].append(line)
             
-        except Exception as e:
-            logger.error(f"Error processing PDF file: {str(e)}")
-            return {"file": pdf_path, "sections": []}
+            # Image placeholders, recorded without decoding the images
+            if images:
+                target_section = current_section if current_section else structure["default"]
+                for image_id in images:
+                    target_section["content"].append(f"![Image]({image_id})")
+                    target_section["images"].append({"id": image_id, "content": image_id})
+        
+        return structure
 
     def _is_potential_heading(self, line: str) -> bool:
         """
@@ -481,46 +519,13 @@ class StructuredDocumentStrategy(ChunkStrategyInterface):
             content=full_content
         ) 
 
-    async def format_result(self, data_path, combined_results: List[dict], result_domains: List[str]) -> List[dict]:
+    async def format_result(self, data_path, combined_results: List[dict], result_domains: List[str], chunk_store: ChunkStoreInterface = None) -> List[dict]:
         """Format and enhance results based on chunk strategy."""
 
-        # 1. Load chunks with validation
-        base_chunks_dir = os.path.join(data_path, '../chunks')
-        all_chunks = []
-        
-        if not os.path.exists(base_chunks_dir):
-            logger.error(f"Chunks directory not found: {base_chunks_dir}")
-            return combined_results
-
-        structured_dirs = [d for d in os.listdir(base_chunks_dir) 
-                        if os.path.isdir(os.path.join(base_chunks_dir, d)) 
-                        and d.endswith('_Structured Document')]
-
-        # Load chunks with content validation
-        for dir_name in structured_dirs:
-            dir_path = os.path.join(base_chunks_dir, dir_name)
-            json_files = [f for f in os.listdir(dir_path) if f.endswith('.json')]
-            
-            for json_file in json_files:
-                try:
-                    with open(os.path.join(dir_path, json_file), 'r', encoding='utf-8') as f:
-                        chunks = json.load(f)
-                        # Validate chunk structure
-                        for chunk in chunks:
-                            if not all(k in chunk for k in ['chunk_id', 'content', 'metadata']):
-                                logger.warning(f"Invalid chunk structure in {json_file}: {chunk.keys()}")
-                                continue
-                            all_chunks.append(chunk)
-                except Exception as e:
-                    logger.error(f"Error loading {json_file}: {str(e)}")
-
-        # Create chunks dictionary with validation
-        chunks_dict = {}
-        for chunk in all_chunks:
-            chunk_id = chunk['chunk_id']
-            if chunk_id in chunks_dict:
-                logger.warning(f"Duplicate chunk_id found: {chunk_id}")
-            chunks_dict[chunk_id] = chunk
+        # 1. Resolve chunks from the in-memory store filled at ingestion time
+        if chunk_store is None:
+            logger.warning("No chunk store provided, loading chunks from disk")
+            chunk_store = self._load_chunk_store(data_path)
 
         # Add before processing results:
         processed_breadcrumbs = set()  # Track which breadcrumbs we've already processed
@@ -534,13 +539,13 @@ class StructuredDocumentStrategy(ChunkStrategyInterface):
                     metadata = metadata[0]
                 
                 chunk_id = metadata.get('chunk_id', '')
-                if not chunk_id or chunk_id not in chunks_dict:
-                    logger.warning(f"Chunk ID {chunk_id} not found in chunks_dict")
+                current_chunk = chunk_store.get(chunk_id) if chunk_id else None
+                if current_chunk is None:
+                    logger.warning(f"Chunk ID {chunk_id} not found in chunk store")
                     formatted_results.append(result)
                     continue
 
                 # Get current chunk content from the correct source
-                current_chunk = chunks_dict[chunk_id]
                 #logger.info(f"Current chunk {current_chunk['metadata']['chunk_id']}")
 
                 breadcrumb = current_chunk['metadata']['breadcrumb']
@@ -560,35 +565,21 @@ class StructuredDocumentStrategy(ChunkStrategyInterface):
 
                 part_info = breadcrumb.split('(part ')[-1].split(')')[0]
                 current_part, total_parts = map(int, part_info.split('/'))
-                document_id = current_chunk['metadata']['document_id']
                 #logger.info(f"Current part {current_part}, total parts {total_parts}")
                 
                 # Create section header
                 breadcrumb_without_part = breadcrumb.split(' (part ')[0]
                 section_header = f"\n\n\Ενότητα: {breadcrumb_without_part} > {current_chunk['metadata']['heading']}"
                 
-                contents = []
-                is_first_chunk = (current_part == 1)
-                
-                document_id = current_chunk['metadata']['document_id']
-                # Extract the base and number from document_id
-                base_id, current_num = current_chunk["chunk_id"].rsplit('_', 1)
-                current_num = int(current_num)
-
-                #logger.info(f"base_id {base_id}")
-                #logger.info(f"current_num {current_num}")
                 max_parts_threshold = 99
                 contents = []
 
                 if total_parts <= max_parts_threshold:
-
-                    first_chunk = current_num - current_part + 1
                     # Get all parts in sequence
-                    for i in range(total_parts):
-                        logging.debug(f"Appending {base_id}_{first_chunk + i}")
-                        #fetch_num = parts_before + i
-                        fetch_id = f"{base_id}_{first_chunk + i}"
-                        contents.append(chunks_dict[fetch_id]['content'])
+                    section_parts = chunk_store.get_section(chunk_id) or [current_chunk]
+                    for part in section_parts:
+                        logging.debug(f"Appending {part['chunk_id']}")
+                        contents.append(part['content'])
 
                 # Combine contents with section header and continuation marker if needed
                 combined_content = section_header + "\n"
@@ -614,4 +605,19 @@ class StructuredDocumentStrategy(ChunkStrategyInterface):
                 formatted_results.append(result)
 
         #logger.info(f"Final formatted results length: {len(formatted_results)}")
-        return formatted_results
\ No newline at end of file
+        return formatted_results
+
+    def _load_chunk_store(self, data_path) -> ChunkStore:
+        """Build a throwaway chunk store from the chunk JSON files on disk."""
+        chunk_store = ChunkStore()
+        base_chunks_dir = os.path.join(data_path, '../chunks')
+        if not os.path.exists(base_chunks_dir):
+            logger.error(f"Chunks directory not found: {base_chunks_dir}")
+            return chunk_store
+
+        suffix = f"_{self.strategy_name}"
+        for dir_name in os.listdir(base_chunks_dir):
+            dir_path = os.path.join(base_chunks_dir, dir_name)
+            if os.path.isdir(dir_path) and dir_name.endswith(suffix):
+                chunk_store.load_directory(dir_name[:-len(suffix)], dir_path)
+        return chunk_store
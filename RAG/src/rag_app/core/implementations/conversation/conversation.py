@@ -1,35 +1,68 @@
-from typing import List
+from typing import List, Optional
 from ...interfaces.conversation_interface import ConversationInterface, Message
 
+def translate_role(role: str) -> str:
+    if role == "Assistant":
+        return "Assistant"
+    elif role == "User":
+        return "Utilisateur"
+    return role
+
 class Conversation(ConversationInterface):
-    def __init__(self, initial_messages: List[Message] = None):
+    def __init__(self, initial_messages: List[Message] = None, summary: str = "", summarized_count: int = 0,
+                 persistent: bool = False):
         self.history: List[Message] = initial_messages or []
+        # Running summary of the first summarized_count messages, see ConversationHistoryManager
+        self.summary = summary
+        self.summarized_count = summarized_count
+        # Kept across requests (a session's conversation), so older turns may be summarized
+        self.persistent = persistent
+        # Formatted lines are kept in step with the history instead of being rebuilt on every prompt
+        self._formatted_lines: List[str] = [self._format(msg) for msg in self.history]
+        self._formatted_history: Optional[str] = None
+
+    @staticmethod
+    def _format(msg: Message) -> str:
+        return f"{translate_role(msg.role)}: {msg.content}"
 
     def add_message(self, role: str, content: str) -> None:
-        self.history.append(Message(role=role, content=content))
+        message = Message(role=role, content=content)
+        self.history.append(message)
+        self._formatted_lines.append(self._format(message))
+        self._formatted_history = None
 
     def get_history(self) -> List[Message]:
         return self.history
 
+    def get_formatted_lines(self) -> List[str]:
+        """One formatted line per message, in order."""
+        return self._formatted_lines
+
     def get_formatted_history(self) -> str:
-        def translate_role(role: str) -> str:
-            if role == "Assistant":
-                return "Assistant"
-            elif role == "User":
-                return "Utilisateur"
-            return role
-        return "\n".join([f"{translate_role(msg.role)}: {msg.content}" for msg in self.history])
+        if self._formatted_history is None:
+            self._formatted_history = "\n".join(self._formatted_lines)
+        return self._formatted_history
+
+    def trim(self, max_messages: int) -> int:
+        """Drop the oldest messages beyond max_messages and return how many were dropped."""
+        dropped = len(self.history) - max_messages
+        if dropped <= 0:
+            return 0
+        del self.history[:dropped]
+        del self._formatted_lines[:dropped]
+        self._formatted_history = None
+        # The running summary still covers the dropped messages
+        self.summarized_count = max(0, self.summarized_count - dropped)
+        return dropped
 
     def clear(self) -> None:
         self.history.clear()
+        self._formatted_lines.clear()
+        self._formatted_history = None
+        self.summary = ""
+        self.summarized_count = 0
 
     def get_last_n_messages_by_role(self, role: str, n: int) -> str:
-        def translate_role(role: str) -> str:
-            if role == "Assistant":
-                return "Assistant"
-            elif role == "User":
-                return "Utilisateur"
-            return role
         filtered_messages = [msg for msg in self.history if msg.role == role]
         last_n_messages = filtered_messages[-n:] if filtered_messages else []
-        return "\n".join([f"{translate_role(msg.role)}: {msg.content}" for msg in last_n_messages]) or "No messages found."
+        return "\n".join([self._format(msg) for msg in last_n_messages]) or "No messages found."
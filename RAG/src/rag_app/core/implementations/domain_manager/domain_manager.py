@@ -1,7 +1,9 @@
 import logging
 import json
 import os
-from typing import Dict, List
+import shutil
+import threading
+from typing import Callable, Dict, List
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from ...interfaces.domain_manager_interface import DomainManagerInterface
 from ...interfaces.domain_interface import DomainInterface, DomainFactoryInterface
@@ -11,7 +13,10 @@ from ...interfaces.chunk_strategy_interface import ChunkStrategyInterface
 from ...interfaces.chat_model_interface import ChatModelInterface
 from ...interfaces.vector_store_interface import VectorStoreInterface, VectorStoreFactoryInterface
 from ...interfaces.embedding_model_interface import EmbeddingModelInterface
+from ...interfaces.chunk_store_interface import ChunkStoreInterface
 from ..domain.domain import Domain
+from ..chunk_store.chunk_store import ChunkStore
+from .ingestion_manifest import IngestionManifest
 from ....private_config import private_settings  # Import settings from config
 
 logger = logging.getLogger(__name__)
@@ -24,7 +29,9 @@ class DomainManager(DomainManagerInterface):
                  document_factory: DocumentFactoryInterface,
                  vector_stores_config: Dict[str, str], # As per config.vector_store
                  embedding_model: EmbeddingModelInterface,
-                 vector_store_factory: VectorStoreFactoryInterface):
+                 vector_store_factory: VectorStoreFactoryInterface,
+                 chunk_store: ChunkStoreInterface = None,
+                 chunks_folder: str = None):
         self.storage = storage
         self.chunk_strategy = chunk_strategy
         self.chat_model = chat_model
@@ -35,8 +42,17 @@ class DomainManager(DomainManagerInterface):
         self.domains: Dict[str, DomainInterface] = {}
         self.vector_stores: Dict[str, VectorStoreInterface] = {}
         self.vector_store_factory = vector_store_factory
+        self.chunk_store = chunk_store if chunk_store is not None else ChunkStore()
+        # Chunks and ingestion manifests, next to the vector stores of the index version
+        self.chunks_folder = chunks_folder or os.path.join(private_settings.DATA_FOLDER, '../chunks')
+        self.manifests: Dict[str, IngestionManifest] = {}
+        # Manifest entries of documents whose vectors are still in the write buffer, by domain
+        self._unflushed_records: Dict[str, List[tuple]] = {}
+        self._ingestion_lock = threading.Lock()
+        self._progress_callback: Callable[..., None] = None
         self._create_domains()
         self.initialize_vector_stores(self.vector_stores_config)
+        self._load_chunk_store()
 
     def _create_domains(self) -> None:
         domain_names = self.storage.get_all_collections()
@@ -51,16 +67,44 @@ class DomainManager(DomainManagerInterface):
                 except Exception as exc:
                     logger.error(f"Error creating domain {domain_name}: {exc}")
 
+    def _get_chunks_dir(self, domain_name: str, strategy_name: str = None) -> str:
+        return os.path.join(self.chunks_folder, f"{domain_name}_{strategy_name or self.chunk_strategy.strategy_name}")
+
+    def _get_manifest_path(self, domain_name: str) -> str:
+        # One manifest per domain, shared by all strategies, since they share the vector store
+        return os.path.join(self.chunks_folder, f"{domain_name}.manifest.json")
+
+    def _get_fingerprint(self, domain_name: str) -> Dict:
+        return {
+            "chunk_strategy": self.chunk_strategy.strategy_name,
+            "chunk_parameters": self.chunk_strategy.get_parameters(),
+            "embedding_model": self.embedding_model.model_name,
+            "vector_store": self._get_vector_store_type(domain_name, self.vector_stores_config),
+        }
+
+    def _get_manifest(self, domain_name: str) -> IngestionManifest:
+        if domain_name not in self.manifests:
+            self.manifests[domain_name] = IngestionManifest(self._get_manifest_path(domain_name), self._get_fingerprint(domain_name))
+        return self.manifests[domain_name]
+
+    def _load_chunk_store(self) -> None:
+        # Warm the chunk store with the chunks of a previous ingestion, if any
+        for domain_name in self.domains:
+            self.chunk_store.load_directory(domain_name, self._get_chunks_dir(domain_name))
+
     def _create_domain(self, domain_name: str) -> DomainInterface:
         documents = self._create_documents(domain_name)
         description = self._get_domain_description(domain_name)
         return self.domain_factory.create_domain(domain_name, description, documents)
 
     def _create_documents(self, domain_name: str) -> List[DocumentInterface]:
+        # Documents keep the id of the previous ingestion, so unchanged documents keep their chunk ids
+        manifest = self._get_manifest(domain_name)
+        known_ids = {name: entry["document_id"] for name, entry in manifest.documents.items()}
+
         documents = []
-        for idx, doc_name in enumerate(self.storage.get_collection_items(domain_name), start=1):
-            # Create a string ID using domain name and sequential number
-            document_id = f"{domain_name}_{idx}"
+        for doc_name in sorted(self.storage.get_collection(domain_name)):
+            document_id = known_ids.get(doc_name) or self._next_document_id(domain_name, documents)
             # Create document without content, implement lazy loading
             document = self.document_factory.create_document(
                 id=document_id,
@@ -72,6 +116,16 @@ class DomainManager(DomainManagerInterface):
             documents.append(document)
         return documents
 
+    def _next_document_id(self, domain_name: str, documents: List[DocumentInterface]) -> str:
+        """Lowest free sequential id, skipping ids used by the given documents or the manifest."""
+        used_ids = {document.id for document in documents}
+        used_ids.update(entry["document_id"] for entry in self._get_manifest(domain_name).documents.values())
+        idx = 1
+        # Create a string ID using domain name and sequential number
+        while f"{domain_name}_{idx}" in used_ids:
+            idx += 1
+        return f"{domain_name}_{idx}"
+
     def _get_collection_description(self, collection_name):
         # Implement this method
         pass
@@ -89,44 +143,238 @@ class DomainManager(DomainManagerInterface):
             raise ValueError(f"Domain '{domain_name}' not found")
         return self.domains[domain_name]
 
-    def apply_chunking_strategy(self) -> None:
+    def apply_chunking_strategy(self, progress_callback: Callable[..., None] = None) -> None:
+        """
+        Ingest new and changed documents of every domain.
+
+        progress_callback, if given, is called as (domain_name, document_name, stage, **details)
+        for the stages parsed, chunked, embedded, stored, unchanged, removed and failed.
+        An exception raised by the callback aborts the run; documents completed so far
+        stay recorded in the manifests.
+        """
         strategy_name = self.chunk_strategy.strategy_name
         strategy_params = self.chunk_strategy.get_parameters()
         
         logger.info(f"Applying chunking strategy: {strategy_name}")
         logger.info(f"Strategy parameters: {strategy_params}")
 
-        for domain in self.domains.values():
-            logger.info(f"Applying chunking strategy to domain: {domain.name}")
+        with self._ingestion_lock:
+            self._progress_callback = progress_callback
+            try:
+                for domain in self.domains.values():
+                    self._apply_chunking_strategy_to_domain(domain)
+            finally:
+                self._progress_callback = None
+
+    def _report(self, domain_name: str, document_name: str, stage: str, **details) -> None:
+        if self._progress_callback is not None:
+            self._progress_callback(domain_name, document_name, stage, **details)
+
+    def _apply_chunking_strategy_to_domain(self, domain: DomainInterface) -> None:
+        logger.info(f"Applying chunking strategy to domain: {domain.name}")
+        manifest = self._get_manifest(domain.name)
+        if not manifest.is_compatible or self._is_index_missing(domain.name, manifest):
+            self._reset_domain(domain.name, manifest)
+
+        # Documents that are no longer in storage
+        current_names = {document.name for document in domain.documents}
+        removed = [name for name in manifest.documents if name not in current_names]
+        for document_name in removed:
+            self.remove_document(domain.name, document_name)
+            self._report(domain.name, document_name, "removed")
+
+        ingested, unchanged = 0, 0
+        try:
             for document in domain.documents:
-                if document.content is None:
-                    content, doc_path = self.storage.get_item(domain.name, document.name)
-                    document.content = content
-                content = document.content
-                if content is None:
-                    logger.warning(f"Document {document.name} in domain {domain.name} has no content after attempted load")
+                stat = self.storage.get_item_stat(domain.name, document.name)
+                if manifest.is_unchanged(document.name, stat, lambda: self.storage.get_item_hash(domain.name, document.name)):
+                    unchanged += 1
+                    self._report(domain.name, document.name, "unchanged")
                     continue
-                # Chunking text
-                chunks = self.chunk_strategy.chunk_text(content=content, document_id=document.id, doc_path=doc_path)
-
-                for chunk in chunks:
-                    chunk.metadata['document_name'] = document.name
-                    chunk.metadata['document_id'] = document.id
-                document.chunks = chunks
-                
-                # Store embeddings and clear chunks from memory
-                self.embed_and_store_documents(domain.name, document)
-                
-                # Store chunks in JSON file - Debug
-                self.store_chunks(domain.name, document)
-                
-                document.chunks = [] 
-                document.content = None
+                if self.ingest_document(domain.name, document, stat):
+                    ingested += 1
+        finally:
+            # Keep what was ingested so far, also when the run is aborted; documents whose
+            # vectors could not be flushed stay out of the manifest and are re-ingested
+            try:
+                self.flush_vector_store(domain.name)
+            finally:
+                manifest.save()
+        logger.info(f"Domain {domain.name}: {ingested} document(s) ingested, {unchanged} unchanged, {len(removed)} removed")
+
+    def add_or_update_document(self, domain_name: str, document_name: str) -> bool:
+        """
+        Ingest a single new or replaced document of a domain without touching the others.
+
+        The document keeps its id when it replaces an existing one, so its new vectors
+        overwrite the old ones in place and queries are served from the previous
+        version until the upserts land. Creates the domain and its vector store if
+        needed. Returns False if the document could not be ingested.
+        """
+        with self._ingestion_lock:
+            if domain_name not in self.domains:
+                logger.info(f"Creating domain {domain_name}")
+                self.domains[domain_name] = self.domain_factory.create_domain(domain_name, self._get_domain_description(domain_name), [])
+                self._initialize_vector_store(self.domains[domain_name], self.vector_stores_config)
+            domain = self.domains[domain_name]
+
+            document = next((document for document in domain.documents if document.name == document_name), None)
+            if document is None:
+                document = self.document_factory.create_document(
+                    id=self._next_document_id(domain_name, domain.documents),
+                    name=document_name,
+                    collection=domain_name,
+                    title=document_name,
+                    content=None
+                )
+                domain.documents.append(document)
+            document.content = None
+
+            manifest = self._get_manifest(domain_name)
+            if not manifest.is_compatible and not manifest.documents:
+                # Nothing ingested yet, e.g. a new domain
+                manifest.reset()
+            if not manifest.is_compatible:
+                # Entries of another configuration cannot be updated piecemeal
+                logger.warning(f"Ingestion settings of domain {domain_name} changed since the last setup, run /setup_rag to re-ingest it")
+
+            ingested = self.ingest_document(domain_name, document)
+            self.flush_vector_store(domain_name)
+            if ingested and manifest.is_compatible:
+                manifest.save()
+            return ingested
+
+    def ingest_document(self, domain_name: str, document: DocumentInterface, stat: Dict = None) -> bool:
+        """
+        Chunk, embed and store a single document. It is recorded in the domain manifest
+        by the next flush_vector_store that writes its vectors.
+
+        Vectors of chunk ids the previous version produced but the new one does not
+        are deleted. Returns False if the document could not be ingested.
+        """
+        stat = stat or self.storage.get_item_stat(domain_name, document.name)
+        doc_path = stat["path"] if stat else None
+        if document.content is None:
+            item = self.storage.get_item(domain_name, document.name)
+            if item:
+                document.content, doc_path = item
+        content = document.content
+        if content is None:
+            logger.warning(f"Document {document.name} in domain {domain_name} has no content after attempted load")
+            self._report(domain_name, document.name, "failed", error="no content")
+            return False
+        self._report(domain_name, document.name, "parsed", characters=len(content))
+
+        # Chunking text
+        chunks = self.chunk_strategy.chunk_text(content=content, document_id=document.id, doc_path=doc_path)
+        self._report(domain_name, document.name, "chunked", chunks=len(chunks))
+
+        for chunk in chunks:
+            chunk.metadata['document_name'] = document.name
+            chunk.metadata['document_id'] = document.id
+        document.chunks = chunks
+
+        try:
+            # Store embeddings and clear chunks from memory
+            if chunks and not self.embed_and_store_documents(domain_name, document):
+                self._report(domain_name, document.name, "failed", error="embedding failed")
+                return False
+
+            # Store chunks in JSON file - Debug
+            self.store_chunks(domain_name, document)
+
+            manifest = self._get_manifest(domain_name)
+            chunk_ids = [chunk.chunk_id for chunk in chunks]
+            previous = manifest.get(document.name)
+            if previous:
+                stale_ids = set(previous["chunk_ids"]) - set(chunk_ids)
+                if stale_ids:
+                    self.vector_stores[domain_name].delete(sorted(stale_ids))
+            if stat:
+                # Recorded in the manifest once the vectors are flushed, see flush_vector_store
+                self._unflushed_records.setdefault(domain_name, []).append(
+                    (document.name, document.id, stat, self.storage.get_item_hash(domain_name, document.name), chunk_ids)
+                )
+            self._report(domain_name, document.name, "stored", chunks=len(chunk_ids))
+            return True
+        finally:
+            document.chunks = []
+            document.content = None
+
+    def remove_document(self, domain_name: str, document_name: str) -> None:
+        """Delete the vectors, stored chunks and manifest entry of a document."""
+        manifest = self._get_manifest(domain_name)
+        entry = manifest.remove(document_name)
+        if entry is None:
+            return
+
+        vector_store = self.vector_stores.get(domain_name)
+        if vector_store:
+            try:
+                vector_store.delete(entry["chunk_ids"])
+            except Exception as e:
+                logger.error(f"Error deleting embeddings of document {document_name} in domain {domain_name}: {str(e)}")
+        self.chunk_store.remove_document(entry["document_id"])
+
+        chunks_file = os.path.join(self._get_chunks_dir(domain_name), f"{document_name}.json")
+        if os.path.exists(chunks_file):
+            os.remove(chunks_file)
+        logger.info(f"Removed document {document_name} ({len(entry['chunk_ids'])} chunks) from domain {domain_name}")
+
+    def _reset_domain(self, domain_name: str, manifest: IngestionManifest) -> None:
+        """Forget everything a previous ingestion produced for a domain."""
+        logger.info(f"Re-ingesting every document of domain {domain_name}")
+        vector_store = self.vector_stores.get(domain_name)
+        chunk_ids = [chunk_id for entry in manifest.documents.values() for chunk_id in entry["chunk_ids"]]
+        if vector_store and chunk_ids:
+            try:
+                vector_store.delete(chunk_ids)
+            except Exception as e:
+                logger.error(f"Error deleting embeddings of domain {domain_name}: {str(e)}")
+        for entry in manifest.documents.values():
+            self.chunk_store.remove_document(entry["document_id"])
+
+        chunks_dirs = {self._get_chunks_dir(domain_name)}
+        previous_strategy = (manifest.previous_fingerprint or {}).get("chunk_strategy")
+        if previous_strategy:
+            chunks_dirs.add(self._get_chunks_dir(domain_name, previous_strategy))
+        for chunks_dir in chunks_dirs:
+            if os.path.isdir(chunks_dir):
+                shutil.rmtree(chunks_dir)
+        manifest.reset()
+
+    def _is_index_missing(self, domain_name: str, manifest: IngestionManifest) -> bool:
+        # e.g. the vector store directory was deleted after the last ingestion
+        vector_store = self.vector_stores.get(domain_name)
+        if not manifest.documents or not vector_store:
+            return False
+        if vector_store.count() == 0:
+            logger.warning(f"Vector store of domain {domain_name} is empty but the manifest lists {len(manifest.documents)} documents")
+            return True
+        return False
+
+    def flush_vector_store(self, domain_name: str) -> None:
+        """
+        Write the buffered vectors of a domain, then record the documents they belong to in
+        its manifest. If the flush fails those documents are not recorded, so the next run
+        ingests them again, and the error is raised.
+        """
+        records = self._unflushed_records.pop(domain_name, [])
+        vector_store = self.vector_stores.get(domain_name)
+        if vector_store:
+            try:
+                vector_store.flush()
+            except Exception as e:
+                logger.error(f"Error flushing vector store for domain {domain_name}, "
+                             f"{len(records)} document(s) left out of the manifest: {str(e)}")
+                raise
+            logger.info(f"Flushed vector store for domain {domain_name}")
+        manifest = self._get_manifest(domain_name)
+        for record in records:
+            manifest.record(*record)
 
     def store_chunks(self, domain_name: str, document: DocumentInterface) -> None:
-        strategy_name = self.chunk_strategy.strategy_name
-        data_path = private_settings.DATA_FOLDER  # Use DATA_FOLDER from settings
-        chunks_dir = os.path.join(data_path, '../chunks', f"{domain_name}_{strategy_name}")
+        chunks_dir = self._get_chunks_dir(domain_name)
         
         # Create directory if it doesn't exist
         os.makedirs(chunks_dir, exist_ok=True)
@@ -144,6 +392,9 @@ class DomainManager(DomainManagerInterface):
             }
             for chunk in document.chunks
         ]
+
+        # Keep chunks in memory for the query path
+        self.chunk_store.add_chunks(domain_name, document.id, chunks_data)
         
         # Write chunks to JSON file
         try:
@@ -153,12 +404,16 @@ class DomainManager(DomainManagerInterface):
         except Exception as e:
             logger.error(f"Error storing chunks for document {document.name} in {file_path}: {str(e)}")
 
-    def embed_and_store_documents(self, domain_name: str, document: DocumentInterface) -> None:
+    def embed_and_store_documents(self, domain_name: str, document: DocumentInterface) -> bool:
         vector_store = self.vector_stores.get(domain_name)
         if not vector_store:
             raise ValueError(f"No vector store found for domain: {domain_name}")
 
         embeddings = self.embedding_model.generate_embedding([chunk.content for chunk in document.chunks])
+        if len(document.chunks) == 1:
+            # A single input comes back as a single vector
+            embeddings = [embeddings]
+        self._report(domain_name, document.name, "embedded", chunks=len(document.chunks))
         metadata = [chunk.metadata for chunk in document.chunks]
         ids = [chunk.chunk_id for chunk in document.chunks]
 
@@ -166,7 +421,7 @@ class DomainManager(DomainManagerInterface):
 
         if not embeddings or not ids:
             logger.warning(f"No embeddings or IDs generated for document {document.name} in domain {domain_name}")
-            return
+            return False
 
         try:
             vector_store.store_embeddings(
@@ -176,8 +431,10 @@ class DomainManager(DomainManagerInterface):
                 documents=[chunk.content for chunk in document.chunks]
             )
             logger.info(f"Successfully stored embeddings for document {document.name} in domain {domain_name}")
+            return True
         except Exception as e:
             logger.error(f"Error storing embeddings for document {document.name} in domain {domain_name}: {str(e)}")
+            return False
 
     def get_domain_documents(self, domain_name: str) -> List[DocumentInterface]:
         domain = self.get_domain(domain_name)
@@ -195,39 +452,54 @@ class DomainManager(DomainManagerInterface):
                 return document
         raise ValueError(f"Document '{document_name}' not found in domain '{domain_name}'")
 
+    @staticmethod
+    def _get_vector_store_type(domain_name: str, vector_store_configs: Dict[str, str]) -> str:
+        # Use get() method with a default value to safely access DOMAIN_CONFIG
+        domain_config = vector_store_configs.get("DOMAIN_CONFIG", {})
+        return domain_config.get(domain_name, vector_store_configs["DEFAULT_PROVIDER"])
+
+    @staticmethod
+    def _get_persist_directory(vector_store_type: str, vector_store_configs: Dict[str, str]) -> str:
+        if vector_store_type == "Chroma":
+            return vector_store_configs.get("CHROMA_PERSIST_DIRECTORY")
+        elif vector_store_type == "NumpyFlat":
+            return vector_store_configs.get("NUMPY_PERSIST_DIRECTORY")
+        return None
+
     def initialize_vector_stores(self, vector_store_configs: Dict[str,str]):
         for domain in self.get_domains():
-            collection_name = f"{domain.name.lower().replace(' ', '_')}"
-            logger.info(f"Initializing vector store for domain {domain} - collection: {collection_name}")
-            logger.info(f"vector_store_configs: {vector_store_configs}")
-            
-            # Use get() method with a default value to safely access DOMAIN_CONFIG
-            domain_config = vector_store_configs.get("DOMAIN_CONFIG", {})
-            vector_store_type = domain_config.get(domain.name, vector_store_configs["DEFAULT_PROVIDER"])
+            self._initialize_vector_store(domain, vector_store_configs)
+
+    def _initialize_vector_store(self, domain: DomainInterface, vector_store_configs: Dict[str,str]) -> None:
+        collection_name = f"{domain.name.lower().replace(' ', '_')}"
+        logger.info(f"Initializing vector store for domain {domain} - collection: {collection_name}")
+        logger.info(f"vector_store_configs: {vector_store_configs}")
+        
+        vector_store_type = self._get_vector_store_type(domain.name, vector_store_configs)
+        
+        try:
+            # Create vector store using the factory method
+            vector_store = self.vector_store_factory.create_vector_store(
+                store_type=vector_store_type,
+                collection_name=collection_name,
+                persist_directory=self._get_persist_directory(vector_store_type, vector_store_configs)
+            )
             
+            # Update the vector_stores of the domain manager
+            self.vector_stores[domain.name] = vector_store
+            logger.info(f"Created {vector_store_type} for collection: {collection_name}")
+        except ValueError as e:
+            logger.error(f"Failed to create vector store for collection '{collection_name}': {str(e)}")
+            # Use default vector store type if the specified type is not supported
+            default_type = vector_store_configs['DEFAULT_PROVIDER']
+            logger.info(f"Attempting to create vector store with default type: {default_type}")
             try:
-                # Create vector store using the factory method
                 vector_store = self.vector_store_factory.create_vector_store(
-                    store_type=vector_store_type,
+                    store_type=default_type,
                     collection_name=collection_name,
-                    persist_directory=vector_store_configs.get("CHROMA_PERSIST_DIRECTORY") if vector_store_type == "Chroma" else None
+                    persist_directory=self._get_persist_directory(default_type, vector_store_configs)
                 )
-                
-                # Update the vector_stores of the domain manager
                 self.vector_stores[domain.name] = vector_store
-                logger.info(f"Created {vector_store_type} for collection: {collection_name}")
-            except ValueError as e:
-                logger.error(f"Failed to create vector store for collection '{collection_name}': {str(e)}")
-                # Use default vector store type if the specified type is not supported
-                default_type = vector_store_configs['DEFAULT_PROVIDER']
-                logger.info(f"Attempting to create vector store with default type: {default_type}")
-                try:
-                    vector_store = self.vector_store_factory.create_vector_store(
-                        store_type=default_type,
-                        collection_name=collection_name,
-                        persist_directory=vector_store_configs.get("CHROMA_PERSIST_DIRECTORY")
-                    )
-                    self.vector_stores[domain.name] = vector_store
-                    logger.info(f"Created default {default_type} vector store for collection: {collection_name}")
-                except Exception as e:
-                    logger.error(f"Failed to create default vector store for collection '{collection_name}': {str(e)}")
+                logger.info(f"Created default {default_type} vector store for collection: {collection_name}")
+            except Exception as e:
+                logger.error(f"Failed to create default vector store for collection '{collection_name}': {str(e)}")
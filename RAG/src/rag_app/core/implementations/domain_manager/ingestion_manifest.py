@@ -0,0 +1,94 @@
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class IngestionManifest:
+    """
+    Record of what the last ingestion of a domain produced.
+
+    For every document it keeps the file path, size, modification time, sha256 and
+    the chunk ids written to the vector store, together with a fingerprint of the
+    chunking strategy, its parameters, the embedding model and the vector store type.
+    A later ingestion with the same fingerprint only has to process the documents
+    whose size/mtime and content hash changed, and can delete the vectors of the
+    documents that are gone. A different fingerprint invalidates every entry.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, fingerprint: Dict[str, Any]):
+        self.path = path
+        # Round-trip through JSON so the fingerprint compares equal to the stored one
+        self.fingerprint = json.loads(json.dumps(fingerprint, default=str))
+        self.previous_fingerprint: Optional[Dict[str, Any]] = None
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    @property
+    def is_compatible(self) -> bool:
+        """True if the stored entries were produced with the current fingerprint."""
+        return self.previous_fingerprint == self.fingerprint
+
+    def get(self, document_name: str) -> Optional[Dict[str, Any]]:
+        return self.documents.get(document_name)
+
+    def is_unchanged(self, document_name: str, stat: Dict[str, Any], get_sha256: Callable[[], Optional[str]]) -> bool:
+        """
+        Check a document against its entry. The content hash is only computed when the
+        size or mtime differ, so a file that was merely touched is not re-ingested.
+        """
+        entry = self.documents.get(document_name)
+        if entry is None or stat is None:
+            return False
+        if entry["size"] == stat["size"] and entry["mtime"] == stat["mtime"]:
+            return True
+        sha256 = get_sha256()
+        if sha256 is not None and entry["sha256"] == sha256:
+            entry.update(path=stat["path"], size=stat["size"], mtime=stat["mtime"])
+            return True
+        return False
+
+    def record(self, document_name: str, document_id: str, stat: Dict[str, Any], sha256: Optional[str], chunk_ids: List[str]) -> None:
+        self.documents[document_name] = {
+            "document_id": document_id,
+            "path": stat["path"],
+            "size": stat["size"],
+            "mtime": stat["mtime"],
+            "sha256": sha256,
+            "chunk_ids": list(chunk_ids),
+        }
+
+    def remove(self, document_name: str) -> Optional[Dict[str, Any]]:
+        return self.documents.pop(document_name, None)
+
+    def reset(self) -> None:
+        """Drop every entry, e.g. after the fingerprint changed."""
+        self.documents = {}
+        self.previous_fingerprint = self.fingerprint
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": self.VERSION, "fingerprint": self.fingerprint, "documents": self.documents}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.previous_fingerprint = self.fingerprint
+        logger.info(f"Saved ingestion manifest with {len(self.documents)} documents to {self.path}")
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading ingestion manifest {self.path}: {str(e)}")
+            return
+        if data.get("version") != self.VERSION:
+            logger.info(f"Ignoring ingestion manifest {self.path} with version {data.get('version')}")
+            return
+        self.previous_fingerprint = data.get("fingerprint")
+        self.documents = data.get("documents", {})
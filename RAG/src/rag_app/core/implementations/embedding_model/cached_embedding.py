@@ -0,0 +1,42 @@
+from typing import List, Union
+import logging
+from ...interfaces.embedding_model_interface import EmbeddingModelInterface
+from .embedding_cache import EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+class CachedEmbedding(EmbeddingModelInterface):
+    """Embedding model wrapper that only sends texts missing from an EmbeddingCache to the provider."""
+
+    def __init__(self, embedding_model: EmbeddingModelInterface, cache: EmbeddingCache):
+        self.embedding_model = embedding_model
+        self.cache = cache
+        logger.info(f"Caching embeddings of model {embedding_model.model_name} in {cache.directory}")
+
+    @property
+    def model_name(self) -> str:
+        return self.embedding_model.model_name
+
+    def generate_embedding(self, chunks: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
+        if isinstance(chunks, str):
+            chunks = [chunks]
+
+        keys = [EmbeddingCache.key(chunk) for chunk in chunks]
+        embeddings = self.cache.get_many(keys)
+
+        # Each distinct missing text is embedded once, even if repeated in the batch
+        missing = {}
+        for key, chunk in zip(keys, chunks):
+            if key not in embeddings and key not in missing:
+                missing[key] = chunk
+
+        if missing:
+            new_embeddings = self.embedding_model.generate_embedding(list(missing.values()))
+            if len(missing) == 1:
+                new_embeddings = [new_embeddings]
+            embeddings.update(zip(missing.keys(), new_embeddings))
+            self.cache.put_many(list(zip(missing.keys(), new_embeddings)))
+
+        logger.debug(f"Embedding cache: {len(chunks) - len(missing)} of {len(chunks)} chunk(s) served from cache, {self.cache.stats()}")
+        results = [embeddings[key] for key in keys]
+        return results[0] if len(results) == 1 else results
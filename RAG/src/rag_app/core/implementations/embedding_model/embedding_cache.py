@@ -0,0 +1,175 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import logging
+import os
+import re
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by (provider, model name, dimension, sha256 of text).
+
+    Each (provider, model, dimension) namespace is a directory holding an append-only
+    float32 blob (``vectors.f32``, one row per cached text) and an append-only index
+    (``index.log``, one ``<sha256> <row>`` line per entry). The blob is memory-mapped
+    for reads. Entries are evicted least recently used first once the cache holds more
+    than ``max_entries``; evicted rows stay in the blob until it is compacted, which
+    happens when dead rows outnumber live ones.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    INDEX_FILE = "index.log"
+
+    def __init__(self, cache_directory: str, provider: str, model_name: str, dimension: int,
+                 max_entries: int = 200_000):
+        namespace = re.sub(r"[^A-Za-z0-9._-]+", "_", f"{provider}_{model_name}_{dimension}")
+        self.directory = os.path.join(cache_directory, namespace)
+        self.dimension = dimension
+        self.max_entries = max(1, max_entries)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.RLock()
+        self._rows: "OrderedDict[str, int]" = OrderedDict()  # sha256 -> row, least recently used first
+        self._row_count = 0
+        self._vectors: Optional[np.ndarray] = None
+
+        self._load()
+        logger.info(f"Embedding cache at {self.directory}: {len(self._rows)} entries")
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.directory, self.VECTORS_FILE)
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, self.INDEX_FILE)
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._rows),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """Return the cached embeddings for the given keys, counting hits and misses."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                row = self._rows.get(key)
+                if row is None:
+                    self.misses += 1
+                    continue
+                self._rows.move_to_end(key)
+                found[key] = self._vectors[row].tolist()
+                self.hits += 1
+        return found
+
+    def put_many(self, items: List[Tuple[str, List[float]]]) -> None:
+        """Append embeddings to the cache; keys already present are skipped."""
+        with self._lock:
+            new_items = []
+            seen = set()
+            for key, embedding in items:
+                if key in self._rows or key in seen:
+                    continue
+                if len(embedding) != self.dimension:
+                    logger.warning(f"Not caching embedding of dimension {len(embedding)}, expected {self.dimension}")
+                    continue
+                seen.add(key)
+                new_items.append((key, embedding))
+            if not new_items:
+                return
+
+            vectors = np.asarray([embedding for _, embedding in new_items], dtype=np.float32)
+            first_row = self._row_count
+            with open(self.vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.writelines(f"{key} {first_row + offset}\n" for offset, (key, _) in enumerate(new_items))
+
+            for offset, (key, _) in enumerate(new_items):
+                self._rows[key] = first_row + offset
+            self._row_count += len(new_items)
+            self._map_vectors()
+            self._evict()
+
+    def _evict(self) -> None:
+        while len(self._rows) > self.max_entries:
+            self._rows.popitem(last=False)
+            self.evictions += 1
+        if self._row_count > 2 * max(len(self._rows), 1):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the blob and the index with the live entries only, in LRU order."""
+        keys = list(self._rows)
+        vectors = self._vectors[[self._rows[key] for key in keys]] if keys else np.empty((0, self.dimension), dtype=np.float32)
+
+        vectors_tmp = f"{self.vectors_path}.tmp"
+        index_tmp = f"{self.index_path}.tmp"
+        with open(vectors_tmp, "wb") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        with open(index_tmp, "w", encoding="utf-8") as f:
+            f.writelines(f"{key} {row}\n" for row, key in enumerate(keys))
+        self._vectors = None
+        os.replace(vectors_tmp, self.vectors_path)
+        os.replace(index_tmp, self.index_path)
+
+        self._rows = OrderedDict((key, row) for row, key in enumerate(keys))
+        self._row_count = len(keys)
+        self._map_vectors()
+        logger.info(f"Compacted embedding cache at {self.directory} to {len(keys)} entries")
+
+    def _map_vectors(self) -> None:
+        if self._row_count == 0:
+            self._vectors = None
+            return
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                                  shape=(self._row_count, self.dimension))
+
+    def _load(self) -> None:
+        if not os.path.exists(self.vectors_path) or not os.path.exists(self.index_path):
+            return
+        row_size = self.dimension * np.dtype(np.float32).itemsize
+        # A crash between the two appends can leave a partial row or index entries without vectors
+        size = os.path.getsize(self.vectors_path)
+        self._row_count = size // row_size
+        if size % row_size:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(self._row_count * row_size)
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) != 2:
+                        continue
+                    key, row = parts[0], int(parts[1])
+                    if row < self._row_count:
+                        self._rows[key] = row
+                        self._rows.move_to_end(key)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading embedding cache index {self.index_path}: {str(e)}")
+            self._rows.clear()
+            self._row_count = 0
+            os.remove(self.vectors_path)
+            os.remove(self.index_path)
+            return
+        self._map_vectors()
+        self._evict()
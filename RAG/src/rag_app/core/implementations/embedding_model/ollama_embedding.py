@@ -1,20 +1,40 @@
-from typing import List, Union
+from typing import List, Union, Optional
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 import numpy as np
 from ...interfaces.embedding_model_interface import EmbeddingModelInterface
 
 logger = logging.getLogger(__name__)
 
 # https://github.com/ollama/ollama/blob/main/docs/faq.md
-# Add Environment=OLLAMA_HOST=0.0.0.0:11434 to /etc/systemd/system/ollama.service 
+# Add Environment=OLLAMA_HOST=0.0.0.0:11434 to /etc/systemd/system/ollama.service
 class OllamaEmbedding(EmbeddingModelInterface):
-    def __init__(self, model_name: str, ollama_host: str = "localhost", ollama_port: int = 11434):
+    def __init__(self, model_name: str, ollama_host: str = "localhost", ollama_port: int = 11434,
+                 batch_size: int = 32, max_concurrency: int = 4, keep_alive: Optional[str] = "5m",
+                 timeout: float = 120.0):
         self._model_name = model_name
         self.base_url = f"http://{ollama_host}:{ollama_port}"
-        
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+
+        # Persistent keep-alive connections, one per in-flight batch
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="ollama-embed")
+
+        # None until the first request tells us whether the server supports /api/embed
+        self._batch_endpoint_supported: Optional[bool] = None
+        self._endpoint_lock = threading.Lock()
+
         logger.info(f"Initializing Ollama embedding model: {model_name}")
-        logger.info(f"Ollama API URL: {self.base_url}")
+        logger.info(f"Ollama API URL: {self.base_url} (batch size {self.batch_size}, concurrency {self.max_concurrency}, keep_alive {keep_alive})")
 
     @property
     def model_name(self) -> str:
@@ -23,29 +43,72 @@ class OllamaEmbedding(EmbeddingModelInterface):
     def generate_embedding(self, chunks: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
         if isinstance(chunks, str):
             chunks = [chunks]
-        
+
         logger.debug(f"Generating embeddings for {len(chunks)} chunk(s)")
-        
-        all_embeddings = []
-        
-        for chunk in chunks:
-            try:
-                response = requests.post(
-                    f"{self.base_url}/api/embeddings",
-                    json={
-                        "model": self.model_name,
-                        "prompt": chunk
-                    }
-                )
-                response.raise_for_status()
-                embedding = response.json()["embedding"]
-                all_embeddings.append(embedding)
-            except requests.RequestException as e:
-                logger.error(f"Error generating embedding: {str(e)}")
-                raise
-            except KeyError as e:
-                logger.error(f"Unexpected response structure: {str(e)}")
-                raise
-        
+
+        batches = [chunks[i:i + self.batch_size] for i in range(0, len(chunks), self.batch_size)]
+        if len(batches) == 1:
+            results = [self._embed_batch(batches[0])]
+        else:
+            # map() keeps the batches in order while up to max_concurrency are in flight
+            results = list(self._executor.map(self._embed_batch, batches))
+
+        all_embeddings = [embedding for batch in results for embedding in batch]
         return all_embeddings[0] if len(all_embeddings) == 1 else all_embeddings
 
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        if self._batch_endpoint_supported is not False:
+            embeddings = self._post_embed(batch)
+            if embeddings is not None:
+                return embeddings
+        return [self._post_embeddings(prompt) for prompt in batch]
+
+    def _post_embed(self, batch: List[str]) -> Optional[List[List[float]]]:
+        """Embed a batch with /api/embed. Returns None if the server does not support it."""
+        payload = {"model": self.model_name, "input": batch}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        try:
+            response = self.session.post(f"{self.base_url}/api/embed", json=payload, timeout=self.timeout)
+            if response.status_code == 404 and "model" not in response.text.lower():
+                with self._endpoint_lock:
+                    if self._batch_endpoint_supported is not False:
+                        logger.warning("Ollama server does not support /api/embed, falling back to /api/embeddings")
+                    self._batch_endpoint_supported = False
+                return None
+            response.raise_for_status()
+            embeddings = response.json()["embeddings"]
+        except requests.RequestException as e:
+            logger.error(f"Error generating embedding: {str(e)}")
+            raise
+        except KeyError as e:
+            logger.error(f"Unexpected response structure: {str(e)}")
+            raise
+
+        if len(embeddings) != len(batch):
+            raise ValueError(f"Ollama returned {len(embeddings)} embeddings for {len(batch)} inputs")
+        self._batch_endpoint_supported = True
+        return embeddings
+
+    def _post_embeddings(self, prompt: str) -> List[float]:
+        """
+        Embed a single prompt with the legacy /api/embeddings endpoint. Its vectors are not
+        normalized, unlike those of /api/embed, so they are L2-normalized here: both
+        endpoints give the same vectors, whichever filled the embedding cache.
+        """
+        payload = {"model": self.model_name, "prompt": prompt}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        try:
+            response = self.session.post(f"{self.base_url}/api/embeddings", json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            embedding = np.asarray(response.json()["embedding"], dtype=np.float64)
+        except requests.RequestException as e:
+            logger.error(f"Error generating embedding: {str(e)}")
+            raise
+        except KeyError as e:
+            logger.error(f"Unexpected response structure: {str(e)}")
+            raise
+
+        norm = np.linalg.norm(embedding)
+        return (embedding / norm if norm else embedding).tolist()
@@ -0,0 +1,49 @@
+from typing import List, Union
+import logging
+from ...interfaces.embedding_model_interface import EmbeddingModelInterface
+from ...utils.lru_cache import LRUCache, normalize_query
+
+logger = logging.getLogger(__name__)
+
+class QueryCachedEmbedding(EmbeddingModelInterface):
+    """
+    Embedding model wrapper for questions: repeated queries are answered from an in-memory
+    LRUCache keyed by (model name, normalized query text) instead of calling the provider.
+    """
+
+    def __init__(self, embedding_model: EmbeddingModelInterface, cache: LRUCache):
+        self.embedding_model = embedding_model
+        self.cache = cache
+        logger.info(f"Caching up to {cache.max_entries} query embeddings of model {embedding_model.model_name}")
+
+    @property
+    def model_name(self) -> str:
+        return self.embedding_model.model_name
+
+    def generate_embedding(self, chunks: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
+        if isinstance(chunks, str):
+            chunks = [chunks]
+
+        keys = [(self.model_name, normalize_query(chunk)) for chunk in chunks]
+        embeddings = {}
+        missing = {}
+        for key, chunk in zip(keys, chunks):
+            if key in embeddings or key in missing:
+                continue
+            embedding = self.cache.get(key)
+            if embedding is None:
+                missing[key] = chunk
+            else:
+                embeddings[key] = embedding
+
+        if missing:
+            new_embeddings = self.embedding_model.generate_embedding(list(missing.values()))
+            if len(missing) == 1:
+                new_embeddings = [new_embeddings]
+            for key, embedding in zip(missing.keys(), new_embeddings):
+                embeddings[key] = embedding
+                self.cache.put(key, embedding)
+
+        logger.debug(f"Query embedding cache: {len(chunks) - len(missing)} of {len(chunks)} query(ies) served from cache, {self.cache.stats()}")
+        results = [embeddings[key] for key in keys]
+        return results[0] if len(results) == 1 else results
@@ -9,8 +9,16 @@ from ...interfaces.embedding_model_interface import EmbeddingModelInterface
 from ...interfaces.chat_model_interface import ChatModelInterface
 from ...interfaces.chunk_strategy_interface import ChunkStrategyInterface
 from ...interfaces.conversation_interface import ConversationInterface
+from ...utils.answer_cache import SemanticAnswerCache
+from ...utils.context_packer import ContextPacker
+from ...utils.result_deduplicator import ResultDeduplicator
+from ...utils.tokens import estimate_tokens
+from ...utils.session_store import Session
 
 from rag_app.private_config import private_settings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+import asyncio
 import time
 import json
 import os
@@ -26,7 +34,12 @@ class QueryEngine(QueryEngineInterface):
                  chunk_strategy: ChunkStrategyInterface,
                  query_optimizer: QueryOptimizerInterface,
                  result_re_ranker: ReRankerInterface,
-                 n_results: int = 10): #here we can change the number of results
+                 n_results: int = 10, #here we can change the number of results
+                 max_search_parallelism: int = 4,
+                 search_timeout: float = 10.0,
+                 answer_cache: Optional[SemanticAnswerCache] = None,
+                 context_packer: Optional[ContextPacker] = None,
+                 result_deduplicator: Optional[ResultDeduplicator] = None):
         self.domain_manager = domain_manager
         self.vector_stores = vector_stores
         self.embedding_model = embedding_model
@@ -35,7 +48,18 @@ class QueryEngine(QueryEngineInterface):
         self.result_re_ranker = result_re_ranker
         self.n_results = n_results
         self.chunk_strategy = chunk_strategy
-        self.last_results = None
+        self.search_timeout = search_timeout
+        # Answers replayed by /ask for paraphrases of questions already answered by this engine
+        self.answer_cache = answer_cache
+        # Keeps the search results within the prompt's token budget, unbounded without it
+        self.context_packer = context_packer
+        # Merges overlapping hits and drops repeated passages before they reach the prompt
+        self.result_deduplicator = result_deduplicator
+        # Bounded pool for the blocking vector store searches
+        self._search_executor = ThreadPoolExecutor(
+            max_workers=max(1, max_search_parallelism),
+            thread_name_prefix="vector-search"
+        )
         logger.info("QueryEngine initialized")
 
     @property
@@ -49,6 +73,12 @@ class QueryEngine(QueryEngineInterface):
         self._n_results = value
         logger.debug(f"n_results updated to {value}")
 
+    def close(self) -> None:
+        """Stop the search threads once no request uses this engine anymore."""
+        # Waits for searches that outlived their timeout, before their index can be deleted
+        self._search_executor.shutdown(wait=True)
+        logger.info("QueryEngine closed")
+
     async def send_initial_message(self, model_name: str, prompt: str, stream: bool = True) -> Union[str, AsyncIterator[str]]:
         """
         Send the initial prompt to the chat model and yield responses in chunks.
@@ -67,7 +97,8 @@ class QueryEngine(QueryEngineInterface):
         domain_names: Optional[List[str]] = None, 
         model_name: str = "OCI_CommandRplus",
         conversation: ConversationInterface = None, 
-        stream: bool = True
+        stream: bool = True,
+        session: Optional[Session] = None
     ) -> Union[Tuple[str, List], AsyncIterator[Tuple[str, List]]]:
         """
         Ask a question across multiple domains and stream the response in chunks.
@@ -76,7 +107,11 @@ class QueryEngine(QueryEngineInterface):
         :param domain_names: List of domain names to query. If None, query all available domains.
         :param conversation: The conversation interface.
         :param stream: Whether to stream the response.
+        :param session: The conversation session, which keeps the ranked results as its last_results.
         :return: The answer as a string or an asynchronous iterator of string chunks.
+
+        Cancelling the call cancels the searches still pending, and closing the returned
+        iterator stops the chat model stream.
         """
         logger.debug(f"Processing question: '{question}'")
 
@@ -90,7 +125,7 @@ class QueryEngine(QueryEngineInterface):
         combined_results = await self._process_queries(queries_to_process, domain_names)
 
         # Process results and generate response
-        return await self._generate_response(question, combined_results, conversation, stream)
+        return await self._generate_response(question, combined_results, conversation, stream, session)
 
     async def _validate_domains(self, domain_names: Optional[List[str]]) -> List[str]:
         """Validate and return list of domains to query."""
@@ -141,35 +176,21 @@ class QueryEngine(QueryEngineInterface):
         
         return list(all_ids)
     
+    def _get_chunk_overlap(self) -> int:
+        """Return the overlap configured on the active chunk strategy."""
+        return self.chunk_strategy.get_parameters().get('overlap') or 0
+
     def _get_chunk_content(self, vector_store, chunk_id: str) -> str:
         """Helper function to get chunk content safely."""
-        try:
-            result = vector_store.collection.get(
-                ids=[chunk_id],
-                include=['documents']
-            )
-            return result['documents'][0] if result and result['documents'] else ""
-        except Exception as e:
-            logger.warning(f"Could not retrieve chunk {chunk_id}: {str(e)}")
+        chunk = self.domain_manager.chunk_store.get(chunk_id)
+        if chunk is None:
+            logger.warning(f"Could not retrieve chunk {chunk_id}")
             return ""
+        return chunk['content']
 
     def _combine_adjacent_chunks(self, vector_store, chunk_id: str, distance: float = None) -> dict:
         """Combine content of previous, current and next chunks while maintaining original chunk structure."""
-        import json
-        import glob
-        import os
-        
-        # Obtener el archivo de configuración más reciente
-        config_path = "/home/ubuntu/gonareva/RAG-IDIKA-2CTORS/RAG/configs"
-        config_files = glob.glob(os.path.join(config_path, "*.json"))
-        latest_config = max(config_files, key=os.path.getctime)
-        
-        # Leer la configuración
-        with open(latest_config, 'r') as f:
-            config = json.load(f)
-        
-        
-        chunk_overlap = config['chunking']['CHUNK_OVERLAP']
+        chunk_overlap = self._get_chunk_overlap()
         logger.debug(f"Chunk overlap: {chunk_overlap}")
 
         parts = chunk_id.rsplit('_', 1)
@@ -179,7 +200,7 @@ class QueryEngine(QueryEngineInterface):
         next_id = f"{base}_{current_num + 1}"
         
         prev_content = self._get_chunk_content(vector_store, prev_id)
-        if prev_content:
+        if prev_content and chunk_overlap:
             prev_content = prev_content[:-chunk_overlap]
         logger.debug(f"Previous content: {prev_content}")
         current_content = self._get_chunk_content(vector_store, chunk_id)
@@ -189,12 +210,8 @@ class QueryEngine(QueryEngineInterface):
             next_content = next_content[chunk_overlap:]
         logger.debug(f"Next content: {next_content}")
         
-        original_result = vector_store.collection.get(
-            ids=[chunk_id],
-            include=['documents', 'metadatas']
-        )
-        
-        if not original_result or not original_result['documents']:
+        original_chunk = self.domain_manager.chunk_store.get(chunk_id)
+        if original_chunk is None:
             return None
 
         # Combine the contents
@@ -205,8 +222,7 @@ class QueryEngine(QueryEngineInterface):
             'id': chunk_id,
             'distance': distance,  # Include the distance from the original result
             'document': combined_document,
-            'metadata': original_result['metadatas']
-            #'metadata': original_result['metadatas'][0] if original_result.get('metadatas') else {}
+            'metadata': [original_chunk['metadata']]
         }
         
         logger.debug(f"Combined chunks for {chunk_id}")
@@ -214,97 +230,72 @@ class QueryEngine(QueryEngineInterface):
     
     def _combine_structured_adjacent_chunks(self, vector_store, chunk_id: str, distance: float = None) -> dict:
         """Combine content of previous, current and next chunks while maintaining original chunk structure."""
-        import json
-        import glob
-        import os
-        
-        # Obtener el archivo de configuración más reciente
-        config_path = "/home/ubuntu/gonareva/RAG-IDIKA-2CTORS/RAG/configs"
-        config_files = glob.glob(os.path.join(config_path, "*.json"))
-        latest_config = max(config_files, key=os.path.getctime)
-        
-        # Leer la configuración
-        with open(latest_config, 'r') as f:
-            config = json.load(f)
-        
-        
-        chunk_overlap = config['chunking']['CHUNK_OVERLAP']
-        logger.debug(f"Chunk overlap: {chunk_overlap}")
-
-        parts = chunk_id.rsplit('_', 1)
-        base = parts[0]
-        current_num = int(parts[1])
-        prev_id = f"{base}_{current_num - 1}"
-        next_id = f"{base}_{current_num + 1}"
-        
-        prev_content = self._get_chunk_content(vector_store, prev_id)
-        if prev_content:
-            prev_content = prev_content[:-chunk_overlap]
-        logger.debug(f"Previous content: {prev_content}")
-        current_content = self._get_chunk_content(vector_store, chunk_id)
-        logger.debug(f"Current content: {current_content}")
-        next_content = self._get_chunk_content(vector_store, next_id)
-        if next_content:
-            next_content = next_content[chunk_overlap:]
-        logger.debug(f"Next content: {next_content}")
-        
-        original_result = vector_store.collection.get(
-            ids=[chunk_id],
-            include=['documents', 'metadatas']
-        )
-        
-        if not original_result or not original_result['documents']:
-            return None
-
-        # Combine the contents
-        combined_document = f"{prev_content}\n\n{current_content}\n\n{next_content}"
-        
-        # Create result maintaining original structure with distance
-        combined_result = {
-            'id': chunk_id,
-            'distance': distance,  # Include the distance from the original result
-            'document': combined_document,
-            'metadata': original_result['metadatas']
-            #'metadata': original_result['metadatas'][0] if original_result.get('metadatas') else {}
-        }
-        
-        logger.debug(f"Combined chunks for {chunk_id}")
-        return combined_result
+        return self._combine_adjacent_chunks(vector_store, chunk_id, distance)
     
     async def _process_queries(self, queries: List[str], domain_names: List[str]) -> List[dict]:
         """Process all queries across specified domains."""
         combined_results = []
         result_domains = []  # List to track domains for each result
-        
-        for domain_name in domain_names:
-            #logger.info(f"Querying domain: {domain_name}")
-            vector_store = self.domain_manager.vector_stores[domain_name]
-            
-            for query in queries:
-                query_embedding = self.embedding_model.generate_embedding(query)
-                results = vector_store.query(
-                    query_embedding=query_embedding, 
-                    n_results=self.n_results
-                )
-                #logger.info(f"Query results from chromadb: {results}")
-                
-                # Append results with domain context
-                for result in results:
-                    result['domain'] = domain_name
-                    combined_results.append(result)
-                    result_domains.append(domain_name)
+
+        # Embed every query in a single batched call, off the event loop
+        query_embeddings = await asyncio.to_thread(self.embedding_model.generate_embedding, queries)
+        if len(queries) == 1:
+            query_embeddings = [query_embeddings]
+
+        # Search all domains concurrently; a slow or failing domain only loses its own results
+        domain_results = await asyncio.gather(*[
+            self._search_domain(domain_name, query_embeddings) for domain_name in domain_names
+        ])
+
+        for domain_name, results in zip(domain_names, domain_results):
+            # Append results with domain context
+            for result in results:
+                result['domain'] = domain_name
+                combined_results.append(result)
+                result_domains.append(domain_name)
         
         # Format results based on chunk strategy, passing all relevant domains
-        formatted_results = await self.chunk_strategy.format_result(data_path = private_settings.DATA_FOLDER, combined_results = combined_results, result_domains = result_domains)
+        formatted_results = await self.chunk_strategy.format_result(data_path = private_settings.DATA_FOLDER, combined_results = combined_results, result_domains = result_domains, chunk_store = self.domain_manager.chunk_store)
         
         return formatted_results
     
+    async def _search_domain(self, domain_name: str, query_embeddings: List[List[float]]) -> List[dict]:
+        """Run the vector searches of one domain on the search executor."""
+        vector_store = self.domain_manager.vector_stores[domain_name]
+
+        def search() -> List[dict]:
+            results = []
+            for query_embedding in query_embeddings:
+                results.extend(vector_store.query(
+                    query_embedding=query_embedding, 
+                    n_results=self.n_results
+                ))
+            return results
+
+        start_time = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            results = await asyncio.wait_for(
+                loop.run_in_executor(self._search_executor, search),
+                timeout=self.search_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"Search in domain {domain_name} timed out after {self.search_timeout:.2f} seconds")
+            return []
+        except Exception as e:
+            logger.error(f"Search in domain {domain_name} failed: {str(e)}")
+            return []
+
+        logger.info(f"Domain {domain_name}: {len(results)} results in {time.perf_counter() - start_time:.3f} seconds")
+        return results
+    
     async def _generate_response(
         self, 
         question: str, 
         combined_results: List[dict], 
         conversation: Optional[ConversationInterface],
-        stream: bool
+        stream: bool,
+        session: Optional[Session] = None
     ) -> Union[Tuple[str, List], AsyncIterator[Tuple[str, List]]]:
         """Generate final response from processed results."""
         # Re-rank results if available
@@ -313,12 +304,15 @@ class QueryEngine(QueryEngineInterface):
         else:
             ranked_results = combined_results
 
+        if self.result_deduplicator is not None:
+            ranked_results = self.result_deduplicator.deduplicate(ranked_results)
+
         """
-        if not ranked_results and not self.last_results:
+        if not ranked_results and not session.last_results:
             context = private_settings.prompt.NO_RESULTS
-        elif not ranked_results and self.last_results:
+        elif not ranked_results and session.last_results:
             context = private_settings.prompt.USING_LAST_RESULTS.format(
-                last_results="\n".join([result["document"] for result in self.last_results[:self.n_results]])
+                last_results="\n".join([result["document"] for result in session.last_results[:self.n_results]])
             )
         else:
             context = "\n".join([result["document"] for result in ranked_results[:self.n_results]])
@@ -336,15 +330,22 @@ class QueryEngine(QueryEngineInterface):
 
                 else:
                     header = f"#### Partie {idx + 1} trouvée"
-                context_chunks.append(f"{header}\n{result['document']}")
-            context = "\n\n".join(context_chunks)
+                context_chunks.append((header, result['document']))
+            if self.context_packer is not None:
+                packed = self.context_packer.pack(context_chunks)
+                # Recorded in the sources, so clients see what the answer was based on
+                for result, part in zip(ranked_results, packed):
+                    result['context'] = part.report()
+                for rank, result in enumerate(ranked_results[len(packed):], start=len(packed) + 1):
+                    result['context'] = {"rank": rank, "status": "omitted", "tokens": 0,
+                                         "original_tokens": estimate_tokens(result['document'])}
+                context_chunks = [(part.header, part.text) for part in packed if part.included]
+            context = "\n\n".join(f"{header}\n{document}" for header, document in context_chunks)
             
         prompt = private_settings.prompt.QUESTION.format(context=context, query=question)
         
-        if ranked_results:
-            self.last_results = ranked_results
-        else:
-            self.last_results = []
+        if session is not None:
+            session.last_results = ranked_results or []
 
         logger.debug("Processing question")
         #logger.info(f"Risposta in document {ranked_results[0]['metadata']['document_name']}")
@@ -378,6 +379,8 @@ class QueryEngine(QueryEngineInterface):
             raise
 
     async def _stream_response(self, response: AsyncIterator[str], sources: List) -> AsyncIterator[Tuple[str, List]]:
-        async for chunk in response:
-            yield chunk, None
+        # Closing this stream, e.g. when the client disconnects, closes the chat model stream
+        async with aclosing(response):
+            async for chunk in response:
+                yield chunk, None
         yield "", sources
\ No newline at end of file
@@ -0,0 +1,47 @@
+from typing import Dict, Any, Optional
+import hashlib
+import json
+import logging
+import os
+import threading
+from ...interfaces.session_backend_interface import SessionBackendInterface
+
+logger = logging.getLogger(__name__)
+
+class FileSessionBackend(SessionBackendInterface):
+    """Stores every conversation session as a JSON file, named by the hash of its id."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        logger.info(f"Persisting conversation sessions in {self.directory}")
+
+    def _path(self, conversation_id: str) -> str:
+        return os.path.join(self.directory, f"{hashlib.sha256(conversation_id.encode('utf-8')).hexdigest()}.json")
+
+    def load(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(conversation_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable session {conversation_id}: {str(e)}")
+            return None
+
+    def save(self, conversation_id: str, data: Dict[str, Any]) -> None:
+        path = self._path(conversation_id)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                # Search results may hold numpy scalars
+                json.dump(data, f, ensure_ascii=False, default=lambda value: value.item() if hasattr(value, "item") else str(value))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not save session {conversation_id}: {str(e)}")
+
+    def delete(self, conversation_id: str) -> None:
+        try:
+            os.remove(self._path(conversation_id))
+        except FileNotFoundError:
+            pass
@@ -1,10 +1,12 @@
+import hashlib
 import json
 import os
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 import logging
 from src.rag_app.core.interfaces.storage_interface import StorageInterface
 from docx import Document
-from PyPDF2 import PdfReader
+from src.rag_app.core.utils.pdf_extraction import read_pdf_text
+from src.rag_app.core.utils.parsed_document_cache import ParsedDocumentCache
 import chardet
 
 # Set up logging
@@ -12,8 +14,9 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 
 class FileStorage(StorageInterface):
-    def __init__(self, base_path: str):
+    def __init__(self, base_path: str, parsed_cache: ParsedDocumentCache = None):
         self.base_path = base_path
+        self.parsed_cache = parsed_cache
         
         # Check if the base folder exists
         if not os.path.exists(self.base_path):
@@ -63,6 +66,26 @@ class FileStorage(StorageInterface):
             logger.warning(f"Item '{item_name}' not found in collection '{collection_name}'")
         return None
 
+    def get_item_stat(self, collection_name: str, item_name: str) -> Optional[Dict[str, Any]]:
+        file_path = os.path.join(self.base_path, collection_name, item_name)
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            logger.warning(f"Item '{item_name}' not found in collection '{collection_name}'")
+            return None
+        return {"path": file_path, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+    def get_item_hash(self, collection_name: str, item_name: str) -> Optional[str]:
+        file_path = os.path.join(self.base_path, collection_name, item_name)
+        if not os.path.isfile(file_path):
+            logger.warning(f"Item '{item_name}' not found in collection '{collection_name}'")
+            return None
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(block)
+        return sha256.hexdigest()
+
     def _read_file_content(self, file_path: str) -> Optional[str]:
         _, file_extension = os.path.splitext(file_path)
         file_extension = file_extension.lower()
@@ -93,10 +116,14 @@ class FileStorage(StorageInterface):
             return raw_data.decode('latin-1')
 
     def _read_docx(self, file_path: str) -> str:
+        if self.parsed_cache is None:
+            return self._parse_docx(file_path)
+        return self.parsed_cache.get_or_parse(file_path, "docx_text", self._parse_docx)
+
+    @staticmethod
+    def _parse_docx(file_path: str) -> str:
         doc = Document(file_path)
         return '\n'.join([paragraph.text for paragraph in doc.paragraphs])
 
     def _read_pdf(self, file_path: str) -> str:
-        with open(file_path, 'rb') as f:
-            pdf = PdfReader(f)
-            return '\n'.join([page.extract_text() for page in pdf.pages])
+        return read_pdf_text(file_path, self.parsed_cache)["text"]
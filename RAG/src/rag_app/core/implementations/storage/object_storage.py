@@ -1,6 +1,6 @@
 import json
 import os
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 import logging
 from src.rag_app.core.interfaces.storage_interface import StorageInterface
 
@@ -28,4 +28,14 @@ class ObjectStorage(StorageInterface):
     def get_collection_items(self, collection_name: str) -> Dict[str, str]:
         # Implement database query to get file names and contents for a specific collection
         # This is a placeholder implementation
-        return {}
\ No newline at end of file
+        return {}
+
+    def get_item_stat(self, collection_name: str, item_name: str) -> Optional[Dict[str, Any]]:
+        # Implement database query to get the size and last modification of an item
+        # This is a placeholder implementation
+        return None
+
+    def get_item_hash(self, collection_name: str, item_name: str) -> Optional[str]:
+        # Implement database query to get the content hash of an item
+        # This is a placeholder implementation
+        return None
@@ -0,0 +1,205 @@
+from typing import List, Dict, Any, Optional
+import json
+import logging
+import os
+import threading
+import numpy as np
+from src.rag_app.core.interfaces.vector_store_interface import VectorStoreInterface
+
+logger = logging.getLogger(__name__)
+
+class NumpyFlatVectorStore(VectorStoreInterface):
+    """
+    Exact in-process vector index backed by a single float32 matrix.
+
+    Embeddings are L2-normalized and kept as one contiguous matrix persisted to
+    ``<persist_directory>/<collection_name>/embeddings.npy``, which is memory-mapped
+    on load so several workers share the same page-cached index. A query is one
+    matrix-vector product followed by an argpartition top-k.
+
+    Distances are squared L2 distances between normalized vectors (2 - 2 * cosine),
+    matching the scale of Chroma's default "l2" space used by the re-ranker.
+    """
+
+    EMBEDDINGS_FILE = "embeddings.npy"
+    RECORDS_FILE = "records.json"
+
+    def __init__(self, collection_name: str, persist_directory: str = "./numpy_db"):
+        self.collection_name = collection_name
+        self.directory = os.path.join(persist_directory or "./numpy_db", collection_name)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._matrix: np.ndarray = np.empty((0, 0), dtype=np.float32)
+        self._ids: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._documents: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._pending: List[np.ndarray] = []
+        self._dirty = False
+        self._loaded_version: Optional[int] = None
+
+        self._load()
+        logger.info(f"Initialized NumpyFlat vector store with collection: {collection_name} ({len(self._ids)} vectors)")
+
+    @property
+    def embeddings_path(self) -> str:
+        return os.path.join(self.directory, self.EMBEDDINGS_FILE)
+
+    @property
+    def records_path(self) -> str:
+        return os.path.join(self.directory, self.RECORDS_FILE)
+
+    def store_embeddings(self, embeddings: List[List[float]], metadata: List[Dict[str, Any]], ids: List[str], documents: List[str]) -> None:
+        logger.info(f"Storing {len(embeddings)} embeddings")
+        if not embeddings:
+            return
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1))
+
+        with self._lock:
+            self._materialize()
+            if self._matrix.size and vectors.shape[1] != self._matrix.shape[1]:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self._matrix.shape[1]}")
+
+            # Existing ids are overwritten in place, new ids are appended; an id given
+            # several times in one call keeps its last row, as with Chroma's upsert
+            last_rows = {id: row for row, id in enumerate(ids)}
+            new_rows = []
+            for row, (id, meta, document) in enumerate(zip(ids, metadata, documents)):
+                if last_rows[id] != row:
+                    continue
+                position = self._positions.get(id)
+                if position is None:
+                    self._positions[id] = len(self._ids)
+                    self._ids.append(id)
+                    self._metadatas.append(meta)
+                    self._documents.append(document)
+                    new_rows.append(row)
+                else:
+                    if not self._matrix.flags.writeable:
+                        self._matrix = np.array(self._matrix)
+                    self._matrix[position] = vectors[row]
+                    self._metadatas[position] = meta
+                    self._documents[position] = document
+
+            if new_rows:
+                self._pending.append(vectors[new_rows])
+            self._dirty = True
+
+    def persist(self) -> None:
+        """Write the index to disk and re-open it memory-mapped."""
+        with self._lock:
+            self._materialize()
+            embeddings_tmp = f"{self.embeddings_path}.tmp"
+            records_tmp = f"{self.records_path}.tmp"
+            with open(embeddings_tmp, 'wb') as f:
+                np.save(f, self._matrix)
+            with open(records_tmp, 'w', encoding='utf-8') as f:
+                json.dump({"ids": self._ids, "metadatas": self._metadatas, "documents": self._documents}, f, ensure_ascii=False)
+            # Records first, so a reader that sees the new matrix also sees its records
+            os.replace(records_tmp, self.records_path)
+            os.replace(embeddings_tmp, self.embeddings_path)
+            self._dirty = False
+            self._load()
+        logger.info(f"Persisted {len(self._ids)} vectors for collection {self.collection_name}")
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            self._materialize()
+            positions = {self._positions[id] for id in ids if id in self._positions}
+            if not positions:
+                return
+            keep = [position for position in range(len(self._ids)) if position not in positions]
+            self._matrix = np.ascontiguousarray(self._matrix[keep], dtype=np.float32)
+            self._ids = [self._ids[position] for position in keep]
+            self._metadatas = [self._metadatas[position] for position in keep]
+            self._documents = [self._documents[position] for position in keep]
+            self._positions = {id: position for position, id in enumerate(self._ids)}
+            self._dirty = True
+        logger.info(f"Deleted {len(positions)} embeddings from collection {self.collection_name}")
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def flush(self) -> None:
+        if self._dirty:
+            self.persist()
+
+    def query(self, query_embedding: List[float], n_results: int = 10) -> List[Dict[str, Any]]:
+        logger.info(f"Querying vector store for top {n_results} results")
+        with self._lock:
+            if self._dirty:
+                # Unflushed writes are served from memory, ingestion persists them with flush()
+                self._materialize()
+            else:
+                self._refresh()
+            matrix, ids, metadatas, documents = self._matrix, self._ids, self._metadatas, self._documents
+
+        if not ids or n_results <= 0:
+            return []
+
+        query = self._normalize(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+        scores = matrix @ query
+        n_results = min(n_results, len(ids))
+        top = np.argpartition(-scores, n_results - 1)[:n_results]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            {
+                "id": ids[i],
+                "distance": float(2.0 - 2.0 * scores[i]),
+                "metadata": metadatas[i],
+                "document": documents[i]
+            }
+            for i in top
+        ]
+
+    def _materialize(self) -> None:
+        """Append pending vectors to the matrix."""
+        if not self._pending:
+            return
+        blocks = ([self._matrix] if self._matrix.size else []) + self._pending
+        self._matrix = np.ascontiguousarray(np.concatenate(blocks), dtype=np.float32)
+        self._pending = []
+
+    def _refresh(self) -> None:
+        """Reload the index if another worker persisted a newer version."""
+        version = self._version()
+        if version is not None and version != self._loaded_version:
+            logger.info(f"Index for collection {self.collection_name} changed on disk, reloading")
+            self._load()
+
+    def _load(self) -> None:
+        version = self._version()
+        if version is None:
+            return
+        try:
+            with open(self.records_path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            matrix = np.load(self.embeddings_path, mmap_mode='r')
+        except Exception as e:
+            logger.error(f"Error loading index for collection {self.collection_name}: {str(e)}")
+            return
+
+        if matrix.shape[0] != len(records["ids"]):
+            logger.error(f"Index for collection {self.collection_name} is inconsistent: {matrix.shape[0]} vectors, {len(records['ids'])} records")
+            return
+
+        self._matrix = matrix
+        self._ids = records["ids"]
+        self._metadatas = records["metadatas"]
+        self._documents = records["documents"]
+        self._positions = {id: position for position, id in enumerate(self._ids)}
+        self._loaded_version = version
+
+    def _version(self) -> Optional[int]:
+        try:
+            return os.stat(self.embeddings_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32, copy=False)
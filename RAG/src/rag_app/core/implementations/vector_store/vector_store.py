@@ -1,5 +1,6 @@
 from typing import List, Dict, Any
 import logging
+import threading
 import chromadb
 from chromadb.api.client import SharedSystemClient
 from src.rag_app.core.interfaces.vector_store_interface import VectorStoreInterface
@@ -7,28 +8,64 @@ from src.rag_app.core.interfaces.vector_store_interface import VectorStoreInterf
 logger = logging.getLogger(__name__)
 
 class ChromaVectorStore(VectorStoreInterface):
-    def __init__(self, collection_name: str, persist_directory: str = "./chroma_db"):
+    def __init__(self, collection_name: str, persist_directory: str = "./chroma_db", write_buffer_size: int = 4096):
         self.collection_name = collection_name
         self.client = chromadb.PersistentClient(path=persist_directory)
         self.collection = self.client.get_or_create_collection(name=collection_name)
+        # Chroma rejects writes larger than the max batch size of its SQLite backend
+        self.max_batch_size = self.client.get_max_batch_size()
+        self.write_buffer_size = max(1, write_buffer_size)
+        self._buffer: Dict[str, list] = {"ids": [], "embeddings": [], "metadatas": [], "documents": []}
+        self._lock = threading.RLock()
         logger.info(f"Initialized Chroma vector store with collection: {collection_name}")
 
     def store_embeddings(self, embeddings: List[List[float]], metadata: List[Dict[str, Any]], ids: List[str], documents: List[str]) -> None:
-        logger.info(f"Storing {len(embeddings)} embeddings")
-        collections = self.client.get_or_create_collection(self.collection_name)
-        for collection in list(collections.get()):
-            if collection == self.collection_name:
-                self.client.delete_collection(name=collection)
+        logger.info(f"Buffering {len(embeddings)} embeddings")
+        with self._lock:
+            self._buffer["ids"].extend(ids)
+            self._buffer["embeddings"].extend(embeddings)
+            self._buffer["metadatas"].extend(metadata)
+            self._buffer["documents"].extend(documents)
+            if len(self._buffer["ids"]) >= self.write_buffer_size:
+                self.flush()
 
-        self.collection.add(
-            embeddings=embeddings,
-            metadatas=metadata,
-            ids=ids,
-            documents=documents
-        )
+    def delete(self, ids: List[str]) -> None:
+        if not ids:
+            return
+        with self._lock:
+            # Pending upserts must land first, or they would resurrect the deleted ids
+            self.flush()
+            for start in range(0, len(ids), self.max_batch_size):
+                self.collection.delete(ids=ids[start:start + self.max_batch_size])
+        logger.info(f"Deleted {len(ids)} embeddings from collection {self.collection_name}")
+
+    def count(self) -> int:
+        with self._lock:
+            return self.collection.count() + len(self._buffer["ids"])
+
+    def flush(self) -> None:
+        """Upsert buffered embeddings in batches below Chroma's max batch size."""
+        with self._lock:
+            buffer = self._buffer
+            total = len(buffer["ids"])
+            if not total:
+                return
+            for start in range(0, total, self.max_batch_size):
+                end = start + self.max_batch_size
+                # upsert keeps re-ingestion idempotent: existing ids are overwritten
+                self.collection.upsert(
+                    embeddings=buffer["embeddings"][start:end],
+                    metadatas=buffer["metadatas"][start:end],
+                    ids=buffer["ids"][start:end],
+                    documents=buffer["documents"][start:end]
+                )
+            self._buffer = {"ids": [], "embeddings": [], "metadatas": [], "documents": []}
+        logger.info(f"Flushed {total} embeddings to collection {self.collection_name}")
 
     def query(self, query_embedding: List[float], n_results: int = 10) -> List[Dict[str, Any]]:
         logger.info(f"Querying vector store for top {n_results} results")
+        if self._buffer["ids"]:
+            self.flush()
         results = self.collection.query(
             query_embeddings=[query_embedding],
             n_results=n_results,
@@ -1,6 +1,7 @@
 from ...interfaces.vector_store_interface import VectorStoreInterface, VectorStoreFactoryInterface
 from src.rag_app.core.implementations.vector_store.vector_store import ChromaVectorStore
 from src.rag_app.core.implementations.vector_store.oracle_23ai import Oracle23aiVectorStore
+from src.rag_app.core.implementations.vector_store.numpy_flat import NumpyFlatVectorStore
 
 class VectorStoreFactory(VectorStoreFactoryInterface):  # Implementing the interface
     @staticmethod
@@ -9,5 +10,7 @@ class VectorStoreFactory(VectorStoreFactoryInterface):  # Implementing the inter
             return ChromaVectorStore(collection_name, persist_directory)
         elif store_type == "Oracle23ai":
             return Oracle23aiVectorStore(collection_name)  # No persist_directory needed
+        elif store_type == "NumpyFlat":
+            return NumpyFlatVectorStore(collection_name, persist_directory)
         else:
             raise ValueError(f"Unsupported vector store type: {store_type}")
@@ -0,0 +1,23 @@
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional
+
+class ChunkStoreInterface(ABC):
+    @abstractmethod
+    def add_chunks(self, domain_name: str, document_id: str, chunks: List[Dict[str, Any]]) -> None:
+        """Register the ordered chunks produced for a document, replacing any previous version."""
+        pass
+
+    @abstractmethod
+    def get(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        """Return the chunk with the given id, or None if it is unknown."""
+        pass
+
+    @abstractmethod
+    def get_section(self, chunk_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the ordered parts of the section the chunk belongs to, or None if it has no part information."""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every chunk, invalidating the store before a new ingestion."""
+        pass
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from typing import Callable, Dict, List
 from .domain_interface import DomainInterface, DomainFactoryInterface
 from .document_interface import DocumentInterface, DocumentFactoryInterface
 from .storage_interface import StorageInterface
@@ -29,7 +29,7 @@ class DomainManagerInterface(ABC):
         pass
 
     @abstractmethod
-    def apply_chunking_strategy(self) -> None:
+    def apply_chunking_strategy(self, progress_callback: Callable[..., None] = None) -> None:
         pass
 
     @abstractmethod
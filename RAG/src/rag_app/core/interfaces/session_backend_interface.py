@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional
+
+class SessionBackendInterface(ABC):
+    @abstractmethod
+    def load(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Return the stored state of a conversation session, or None if it is unknown."""
+        pass
+
+    @abstractmethod
+    def save(self, conversation_id: str, data: Dict[str, Any]) -> None:
+        """Store the state of a conversation session, replacing any previous one."""
+        pass
+
+    @abstractmethod
+    def delete(self, conversation_id: str) -> None:
+        """Forget a conversation session; unknown ids are ignored."""
+        pass
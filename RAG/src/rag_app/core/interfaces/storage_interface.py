@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 class StorageInterface(ABC):
     @abstractmethod
@@ -21,3 +21,13 @@ class StorageInterface(ABC):
     def get_item(self, collection_name: str, item_name: str) -> tuple[Optional[str], Optional[str]]:
         """Return the contents of a specific item in the specified collection."""
         pass
+
+    @abstractmethod
+    def get_item_stat(self, collection_name: str, item_name: str) -> Optional[Dict[str, Any]]:
+        """Return the path, size and modification time of an item without reading it."""
+        pass
+
+    @abstractmethod
+    def get_item_hash(self, collection_name: str, item_name: str) -> Optional[str]:
+        """Return the sha256 of the raw bytes of an item."""
+        pass
@@ -10,6 +10,18 @@ class VectorStoreInterface(ABC):
     def query(self, query_embedding: List[float], n_results: int = 10) -> List[Dict[str, Any]]:
         pass
 
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        pass
+
+    @abstractmethod
+    def flush(self) -> None:
+        pass
+
 class VectorStoreFactoryInterface(ABC):
     @abstractmethod
     def create_vector_store(self, store_type: str, collection_name: str, persist_directory: str = None) -> VectorStoreInterface:
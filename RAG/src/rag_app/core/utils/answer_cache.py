@@ -0,0 +1,128 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+import itertools
+import logging
+import threading
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CachedAnswer:
+    """A generated answer, as the streamed chunks and the sources sent at the end."""
+
+    def __init__(self, question: str, chunks: List[str], sources: List[Any]):
+        self.question = question
+        self.chunks = chunks
+        self.sources = sources
+        self.created_at = time.monotonic()
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+
+class SemanticAnswerCache:
+    """
+    In-memory cache of answers keyed by question embedding.
+
+    A lookup returns the answer of the most similar cached question if its cosine
+    similarity reaches ``similarity_threshold``. At most ``max_entries`` answers are kept,
+    least recently used evicted first, and answers older than ``ttl_seconds`` are ignored.
+
+    One cache belongs to one QueryEngine, so its answers were all generated by the same
+    chat model and prompt on the same index version; a new index or serving config comes
+    with a new, empty cache. ``clear`` drops every answer when the index changes in place,
+    and answers generated from before the clear are not stored afterwards: pass the
+    ``revision`` read when the question arrived to ``store``.
+    """
+
+    def __init__(self, max_entries: int = 256, similarity_threshold: float = 0.95,
+                 ttl_seconds: Optional[float] = None):
+        self.max_entries = max(1, max_entries)
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds or None
+        self.revision = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._answers: "OrderedDict[int, CachedAnswer]" = OrderedDict()  # least recently used first
+        self._embeddings: Dict[int, np.ndarray] = {}  # unit-length question embeddings
+        self._matrix: Optional[np.ndarray] = None  # rows of _embeddings in _matrix_ids order
+        self._matrix_ids: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._answers), "hits": self.hits, "misses": self.misses, "revision": self.revision}
+
+    def lookup(self, embedding: Sequence[float]) -> Optional[CachedAnswer]:
+        query = self._unit(embedding)
+        with self._lock:
+            self._expire()
+            if query is None or not self._answers:
+                self.misses += 1
+                return None
+            if self._matrix is None:
+                self._matrix_ids = list(self._embeddings)
+                self._matrix = np.stack([self._embeddings[i] for i in self._matrix_ids])
+            similarities = self._matrix @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+            answer_id = self._matrix_ids[best]
+            self._answers.move_to_end(answer_id)
+            self.hits += 1
+            answer = self._answers[answer_id]
+        logger.debug(f"Answer cache hit (similarity {similarities[best]:.4f}) for cached question: {answer.question}")
+        return answer
+
+    def store(self, question: str, embedding: Sequence[float], chunks: List[str], sources: List[Any],
+              revision: int) -> bool:
+        vector = self._unit(embedding)
+        if vector is None or not chunks:
+            return False
+        with self._lock:
+            if revision != self.revision:
+                logger.debug(f"Not caching answer generated before the index changed: {question}")
+                return False
+            answer_id = next(self._ids)
+            self._answers[answer_id] = CachedAnswer(question, list(chunks), sources)
+            self._embeddings[answer_id] = vector
+            while len(self._answers) > self.max_entries:
+                self._remove(next(iter(self._answers)))
+            self._matrix = None
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self.revision += 1
+            self._answers.clear()
+            self._embeddings.clear()
+            self._matrix = None
+        logger.info(f"Answer cache cleared (revision {self.revision})")
+
+    def _expire(self) -> None:
+        if not self.ttl_seconds:
+            return
+        oldest = time.monotonic() - self.ttl_seconds
+        expired = [answer_id for answer_id, answer in self._answers.items() if answer.created_at < oldest]
+        for answer_id in expired:
+            self._remove(answer_id)
+        if expired:
+            self._matrix = None
+
+    def _remove(self, answer_id: int) -> None:
+        del self._answers[answer_id]
+        del self._embeddings[answer_id]
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
@@ -0,0 +1,72 @@
+from typing import Any, Dict, List, Tuple
+import logging
+
+from .tokens import estimate_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# Appended to a truncated result
+TRUNCATION_MARKER = " […]"
+
+
+class PackedPart:
+    """One search result as placed in the prompt context."""
+
+    def __init__(self, rank: int, header: str, text: str, status: str, tokens: int, original_tokens: int):
+        self.rank = rank
+        self.header = header
+        self.text = text
+        self.status = status  # "included", "truncated" or "omitted"
+        self.tokens = tokens
+        self.original_tokens = original_tokens
+
+    @property
+    def included(self) -> bool:
+        return self.status != "omitted"
+
+    def report(self) -> Dict[str, Any]:
+        return {"rank": self.rank, "status": self.status, "tokens": self.tokens, "original_tokens": self.original_tokens}
+
+
+class ContextPacker:
+    """
+    Fits ranked search results into a prompt context of at most ``token_budget`` tokens.
+
+    Results are taken by rank, each as its header followed by its text. A result that does
+    not fit is truncated to the remaining budget if at least ``min_part_tokens`` of its
+    text fit, and omitted otherwise, as are all results after it. The top result's header
+    is always kept, even if none of its text fits.
+    """
+
+    def __init__(self, token_budget: int = 4000, min_part_tokens: int = 64):
+        self.token_budget = token_budget
+        self.min_part_tokens = min_part_tokens
+
+    def pack(self, parts: List[Tuple[str, str]]) -> List[PackedPart]:
+        """Pack (header, text) parts, best ranked first. Returns one PackedPart per part."""
+        packed = []
+        remaining = self.token_budget
+        for rank, (header, text) in enumerate(parts, start=1):
+            header_tokens = estimate_tokens(header)
+            text_tokens = estimate_tokens(text)
+            available = remaining - header_tokens
+            if remaining > 0 and text_tokens <= available:
+                packed.append(PackedPart(rank, header, text, "included", header_tokens + text_tokens, header_tokens + text_tokens))
+                remaining -= header_tokens + text_tokens
+            elif rank == 1 or (remaining > 0 and available >= self.min_part_tokens):
+                truncated = truncate_to_tokens(text, available - estimate_tokens(TRUNCATION_MARKER))
+                truncated = f"{truncated}{TRUNCATION_MARKER}" if truncated else ""
+                tokens = header_tokens + estimate_tokens(truncated)
+                packed.append(PackedPart(rank, header, truncated, "truncated", tokens, header_tokens + text_tokens))
+                remaining = 0
+            else:
+                packed.append(PackedPart(rank, header, "", "omitted", 0, header_tokens + text_tokens))
+                remaining = 0
+
+        used = sum(part.tokens for part in packed)
+        original = sum(part.original_tokens for part in packed)
+        logger.info(f"Packed context: {used} of {original} estimated tokens, "
+                    f"{sum(part.status == 'included' for part in packed)} included, "
+                    f"{sum(part.status == 'truncated' for part in packed)} truncated, "
+                    f"{sum(part.status == 'omitted' for part in packed)} omitted")
+        return packed
@@ -0,0 +1,85 @@
+from typing import Awaitable, Callable, Optional, Set
+import asyncio
+import logging
+
+from .tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Label of the running summary in the formatted history, after the role names of Conversation
+SUMMARY_LABEL = "Résumé des échanges précédents"
+
+
+class ConversationHistoryManager:
+    """
+    Builds the conversation history sent with every prompt.
+
+    The last ``max_turns`` turns (user message and answer) are kept verbatim, as long as
+    they fit in ``token_budget`` tokens together with the running summary; older turns
+    are replaced by the conversation's summary. Turns that fall out of the verbatim window
+    are folded into that summary by ``summarize(previous_summary, messages)``, run as a
+    background task so the request that triggered it does not wait for it.
+
+    Only persistent conversations, those of a session, are summarized. A history sent
+    with the request is rebuilt on every request and would lose its summary, so it is
+    only kept within the token budget, most recent messages first.
+    """
+
+    def __init__(self, token_budget: int = 1500, max_turns: int = 4,
+                 summarize: Optional[Callable[[str, str], Awaitable[str]]] = None):
+        self.token_budget = token_budget
+        self.max_turns = max(1, max_turns)
+        self.summarize = summarize
+        self._compacting: Set[int] = set()  # ids of conversations being summarized
+        self._tasks: Set[asyncio.Task] = set()
+
+    def format_history(self, conversation) -> str:
+        lines = conversation.get_formatted_lines()
+        summary = conversation.summary
+        persistent = getattr(conversation, "persistent", False)
+        start = max(conversation.summarized_count, len(lines) - 2 * self.max_turns) if persistent else 0
+
+        # Drop the oldest verbatim messages until the history fits the budget, keeping the last one
+        budget = self.token_budget - (estimate_tokens(summary) if summary else 0)
+        recent = lines[start:]
+        tokens = sum(estimate_tokens(line) for line in recent)
+        while len(recent) > 1 and tokens > budget:
+            tokens -= estimate_tokens(recent[0])
+            recent = recent[1:]
+
+        if persistent and len(lines) - 2 * self.max_turns > conversation.summarized_count:
+            self.compact_in_background(conversation)
+
+        parts = [f"{SUMMARY_LABEL}: {summary}"] if summary else []
+        return "\n".join(parts + recent)
+
+    def compact_in_background(self, conversation) -> None:
+        """Fold the messages older than the verbatim window into the conversation summary."""
+        if self.summarize is None or id(conversation) in self._compacting:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._compacting.add(id(conversation))
+        task = loop.create_task(self._compact(conversation))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _compact(self, conversation) -> None:
+        try:
+            lines = conversation.get_formatted_lines()
+            start = conversation.summarized_count
+            end = len(lines) - 2 * self.max_turns
+            if end <= start:
+                return
+            summary = await self.summarize(conversation.summary, "\n".join(lines[start:end]))
+            # Applied only if the conversation was not cleared or compacted meanwhile
+            if conversation.summarized_count == start and len(conversation.get_formatted_lines()) >= end:
+                conversation.summary = summary.strip()
+                conversation.summarized_count = end
+                logger.info(f"Summarized {end - start} message(s) of a conversation into {estimate_tokens(conversation.summary)} tokens")
+        except Exception as e:
+            logger.warning(f"Could not summarize conversation history: {str(e)}")
+        finally:
+            self._compacting.discard(id(conversation))
@@ -0,0 +1,119 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class EngineGeneration:
+    """A DomainManager/QueryEngine pair built from one index version."""
+
+    def __init__(self, query_engine: Any, domain_manager: Any, version: Optional[str] = None,
+                 on_drained: Optional[Callable[["EngineGeneration"], None]] = None,
+                 config: Optional[Dict[str, Any]] = None):
+        self.query_engine = query_engine
+        self.domain_manager = domain_manager
+        self.version = version
+        # Merged config the pair was built with
+        self.config = config
+        self.on_drained = on_drained
+        self.refcount = 0
+        self.retired = False
+
+    def __repr__(self):
+        return f"EngineGeneration(version={self.version!r}, refcount={self.refcount}, retired={self.retired})"
+
+
+class EngineLease:
+    """One request's reference to a generation; releasing it more than once is a no-op."""
+
+    def __init__(self, holder: "EngineHolder", generation: EngineGeneration):
+        self.generation = generation
+        self._holder = holder
+        self._released = False
+
+    @property
+    def query_engine(self) -> Any:
+        return self.generation.query_engine
+
+    @property
+    def domain_manager(self) -> Any:
+        return self.generation.domain_manager
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._holder._release(self.generation)
+
+    def __enter__(self) -> "EngineLease":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class EngineHolder:
+    """
+    Reference-counted holder of the active EngineGeneration.
+
+    Requests ``acquire`` a lease on the current generation and release it when their
+    response is complete. ``swap`` makes a new generation current at once; the previous one is
+    retired and its ``on_drained`` callback (e.g. deleting its index directory) runs on
+    a background thread as soon as its last request has released it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current: Optional[EngineGeneration] = None
+
+    @property
+    def current(self) -> Optional[EngineGeneration]:
+        return self._current
+
+    def acquire(self) -> Optional[EngineLease]:
+        with self._lock:
+            generation = self._current
+            if generation is None:
+                return None
+            generation.refcount += 1
+        return EngineLease(self, generation)
+
+    def _release(self, generation: EngineGeneration) -> None:
+        with self._lock:
+            generation.refcount -= 1
+            drained = generation.retired and generation.refcount == 0
+        if drained:
+            self._drain(generation)
+
+    def swap(self, generation: EngineGeneration) -> Optional[EngineGeneration]:
+        """Make generation current and retire the previous one, which is returned."""
+        with self._lock:
+            previous, drained = self._swap_locked(generation)
+        self._swapped(generation, previous, drained)
+        return previous
+
+    def replace(self, expected: Optional[EngineGeneration], generation: EngineGeneration) -> bool:
+        """Swap in generation only if expected is still current; returns whether it was swapped."""
+        with self._lock:
+            if self._current is not expected:
+                return False
+            previous, drained = self._swap_locked(generation)
+        self._swapped(generation, previous, drained)
+        return True
+
+    def _swap_locked(self, generation: EngineGeneration) -> Tuple[Optional[EngineGeneration], bool]:
+        """Make generation current; returns the previous one and whether it is already drained."""
+        previous, self._current = self._current, generation
+        if previous is not None:
+            previous.retired = True
+        return previous, previous is not None and previous.refcount == 0
+
+    def _swapped(self, generation: EngineGeneration, previous: Optional[EngineGeneration], drained: bool) -> None:
+        logger.info(f"Swapped query engine to index version {generation.version} (previous: {previous})")
+        if drained:
+            self._drain(previous)
+
+    def _drain(self, generation: EngineGeneration) -> None:
+        logger.info(f"Index version {generation.version} drained")
+        if generation.on_drained is not None:
+            threading.Thread(target=generation.on_drained, args=(generation,), name="engine-drain", daemon=True).start()
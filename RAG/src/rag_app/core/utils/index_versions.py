@@ -0,0 +1,72 @@
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class IndexVersions:
+    """
+    Versioned index directories for blue/green builds.
+
+    Every build gets its own ``<root>/<version>`` directory holding the vector stores,
+    the chunks and the ingestion manifests. The active version is recorded in
+    ``<root>/CURRENT``, which is replaced atomically when a build is swapped in.
+    """
+
+    CURRENT_FILE = "CURRENT"
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    @property
+    def active_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, self.CURRENT_FILE), 'r', encoding='utf-8') as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version if version and os.path.isdir(self.path(version)) else None
+
+    def create(self, seed: Optional[Dict[str, str]] = None) -> str:
+        """
+        Create a new version directory. ``seed`` maps subdirectory names to existing
+        directories that are copied in, so the build can ingest incrementally instead of
+        from scratch. Returns the version.
+        """
+        version = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        path = self.path(version)
+        os.makedirs(path)
+        for name, source in (seed or {}).items():
+            if source and os.path.isdir(source):
+                shutil.copytree(source, os.path.join(path, name))
+                logger.info(f"Seeded {name} of index version {version} from {source}")
+        return version
+
+    def activate(self, version: str) -> None:
+        tmp_path = os.path.join(self.root, f"{self.CURRENT_FILE}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(self.root, self.CURRENT_FILE))
+        logger.info(f"Activated index version {version}")
+
+    def remove(self, version: str) -> None:
+        if version == self.active_version:
+            logger.warning(f"Not removing active index version {version}")
+            return
+        shutil.rmtree(self.path(version), ignore_errors=True)
+        logger.info(f"Removed index version {version}")
+
+    def remove_inactive(self, keep: Iterable[str] = ()) -> None:
+        """Remove versions left behind by builds that failed or were interrupted."""
+        keep = set(keep) | {self.active_version}
+        for version in os.listdir(self.root):
+            if version not in keep and os.path.isdir(self.path(version)):
+                self.remove(version)
@@ -0,0 +1,183 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (COMPLETED, FAILED, CANCELLED)
+
+
+class IngestionCancelled(Exception):
+    """Raised inside a job's worker thread once cancellation has been requested."""
+
+
+class IngestionJobRunning(Exception):
+    """Raised when a job is submitted while another one is still running."""
+
+
+class IngestionJob:
+    """
+    State of one background ingestion run.
+
+    The worker reports progress through ``set_stage`` and ``report``; every call is
+    recorded as an event with a sequence number, so pollers can read a snapshot with
+    ``to_dict`` and streamers can follow ``events_since``. ``report`` is also where
+    cancellation takes effect: once ``cancel`` has been called, the next report raises
+    IngestionCancelled in the worker thread.
+    """
+
+    MAX_EVENTS = 50000
+
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = PENDING
+        self.stage = None
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.documents: Dict[str, Dict[str, Any]] = {}
+
+        self._lock = threading.Lock()
+        self._cancel_requested = threading.Event()
+        self._events: List[Dict[str, Any]] = []
+        self._next_seq = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_requested.is_set()
+
+    def cancel(self) -> None:
+        if not self.finished:
+            self._cancel_requested.set()
+            self._add_event({"type": "status", "status": self.status, "stage": self.stage, "cancel_requested": True})
+
+    def check_cancelled(self) -> None:
+        if self._cancel_requested.is_set():
+            raise IngestionCancelled(f"Job {self.id} was cancelled")
+
+    def set_stage(self, stage: str) -> None:
+        self.check_cancelled()
+        self.stage = stage
+        self._add_event({"type": "status", "status": self.status, "stage": stage})
+        logger.info(f"Job {self.id}: {stage}")
+
+    def report(self, domain_name: str, document_name: str, stage: str, **details: Any) -> None:
+        """Progress callback for DomainManager: one call per document and stage."""
+        with self._lock:
+            document = self.documents.setdefault(f"{domain_name}/{document_name}", {"domain": domain_name, "document": document_name})
+            document.update(details, stage=stage, updated_at=time.time())
+        self._add_event({"type": "progress", "domain": domain_name, "document": document_name, "stage": stage, **details})
+        self.check_cancelled()
+
+    def events_since(self, seq: int) -> List[Dict[str, Any]]:
+        """Events with a sequence number >= seq; older events may have been dropped."""
+        with self._lock:
+            if not self._events or seq > self._events[-1]["seq"]:
+                return []
+            start = max(0, seq - self._events[0]["seq"])
+            return self._events[start:]
+
+    def to_dict(self, include_documents: bool = True) -> Dict[str, Any]:
+        with self._lock:
+            stages: Dict[str, int] = {}
+            for document in self.documents.values():
+                stages[document["stage"]] = stages.get(document["stage"], 0) + 1
+            data = {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "stage": self.stage,
+                "cancel_requested": self.cancel_requested,
+                "error": self.error,
+                "result": self.result,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "documents_by_stage": stages,
+            }
+            if include_documents:
+                data["documents"] = list(self.documents.values())
+            return data
+
+    def _run(self, target: Callable[["IngestionJob"], Optional[Dict[str, Any]]]) -> None:
+        self.status = RUNNING
+        self.started_at = time.time()
+        self._add_event({"type": "status", "status": self.status, "stage": self.stage})
+        try:
+            self.check_cancelled()
+            self.result = target(self)
+            self.status = COMPLETED
+        except IngestionCancelled:
+            self.status = CANCELLED
+            logger.info(f"Job {self.id} cancelled")
+        except (Exception, SystemExit) as e:
+            # initialize_rag_components exits on configuration errors
+            self.status = FAILED
+            self.error = str(e) or e.__class__.__name__
+            logger.exception(f"Job {self.id} failed")
+        finally:
+            self.finished_at = time.time()
+            self._add_event({"type": "done", "status": self.status, "error": self.error, "result": self.result})
+
+    def _add_event(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            event.update(seq=self._next_seq, job_id=self.id, timestamp=time.time())
+            self._next_seq += 1
+            self._events.append(event)
+            if len(self._events) > self.MAX_EVENTS:
+                del self._events[:len(self._events) - self.MAX_EVENTS]
+
+
+class IngestionJobManager:
+    """Runs ingestion jobs one at a time on background threads and keeps recent jobs for inspection."""
+
+    def __init__(self, max_jobs: int = 20):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def active_job(self) -> Optional[IngestionJob]:
+        with self._lock:
+            return next((job for job in self._jobs.values() if not job.finished), None)
+
+    def submit(self, kind: str, target: Callable[[IngestionJob], Optional[Dict[str, Any]]]) -> IngestionJob:
+        with self._lock:
+            active = next((job for job in self._jobs.values() if not job.finished), None)
+            if active is not None:
+                raise IngestionJobRunning(f"Job {active.id} is still {active.status}")
+            job = IngestionJob(kind)
+            self._jobs[job.id] = job
+            # Forget the oldest finished jobs
+            while len(self._jobs) > self.max_jobs:
+                oldest = next((job_id for job_id, old in self._jobs.items() if old.finished), None)
+                if oldest is None:
+                    break
+                del self._jobs[oldest]
+
+        threading.Thread(target=job._run, args=(target,), name=f"ingestion-{job.id[:8]}", daemon=True).start()
+        logger.info(f"Started {kind} job {job.id}")
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[IngestionJob]:
+        with self._lock:
+            return list(self._jobs.values())
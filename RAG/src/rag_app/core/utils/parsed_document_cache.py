@@ -0,0 +1,138 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import threading
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Bump when a parser's output changes, so entries written by the old parser are ignored
+PARSER_VERSION = 1
+
+
+def _library_versions() -> str:
+    versions = []
+    for module_name in ("pypdf", "docx"):
+        try:
+            module = __import__(module_name)
+            versions.append(f"{module_name}-{getattr(module, '__version__', 'unknown')}")
+        except ImportError:
+            versions.append(f"{module_name}-missing")
+    return "_".join(versions)
+
+
+class ParsedDocumentCache:
+    """
+    On-disk cache of parse results keyed by (sha256 of the file content, kind, parser version).
+
+    A kind names one parse of a file, e.g. the plain text and page offsets of a PDF or the
+    section/table structure built by the structured chunker; its result must be JSON
+    serializable. Entries are stored as zlib-compressed JSON, one file per entry under
+    ``<cache_directory>/<sha256[:2]>/``. The parser version covers both PARSER_VERSION and
+    the versions of the PDF/DOCX libraries, so upgrading either re-parses documents.
+
+    The most recently used entries are also kept in memory, so the chunker re-reading a
+    document that FileStorage just parsed does not even touch the disk. Content hashes are
+    remembered per (path, size, mtime), so an unchanged file is hashed once per process.
+    """
+
+    def __init__(self, cache_directory: Optional[str], memory_entries: int = 16):
+        # Without a directory the cache only lives in memory
+        self.directory = cache_directory
+        self.memory_entries = max(0, memory_entries)
+        self.version = f"{PARSER_VERSION}_{_library_versions()}"
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, str]" = OrderedDict()  # entry key -> JSON
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        logger.info(f"Parsed document cache at {self.directory or 'memory only'} (parser version {self.version})")
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self._memory)}
+
+    def get_or_parse(self, file_path: str, kind: str, parse: Callable[[str], Any]) -> Any:
+        """
+        Return the cached result of ``parse(file_path)`` for this file content, parsing and
+        storing it on a miss. Exceptions raised by ``parse`` propagate and nothing is stored.
+        Every call returns a fresh copy, so callers may modify it.
+        """
+        key = self._entry_key(file_path, kind)
+        data = self._get(key)
+        if data is not None:
+            self.hits += 1
+            return json.loads(data)
+
+        self.misses += 1
+        result = parse(file_path)
+        self._put(key, json.dumps(result, ensure_ascii=False))
+        return result
+
+    def _entry_key(self, file_path: str, kind: str) -> str:
+        return f"{self._content_hash(file_path)}.{kind}.v{self.version}"
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json.z")
+
+    def _content_hash(self, file_path: str) -> str:
+        stat = os.stat(file_path)
+        stat_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        sha = self._hashes.get(stat_key)
+        if sha is None:
+            sha256 = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    sha256.update(block)
+            sha = sha256.hexdigest()
+            with self._lock:
+                self._hashes[stat_key] = sha
+        return sha
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+        if not self.directory:
+            return None
+        try:
+            with open(self._entry_path(key), 'rb') as f:
+                data = zlib.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable parsed document cache entry {key}: {str(e)}")
+            return None
+        self._remember(key, data)
+        return data
+
+    def _put(self, key: str, data: str) -> None:
+        self._remember(key, data)
+        if not self.directory:
+            return
+        path = self._entry_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(zlib.compress(data.encode("utf-8"), 6))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write parsed document cache entry {key}: {str(e)}")
+
+    def _remember(self, key: str, data: str) -> None:
+        if not self.memory_entries:
+            return
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
@@ -0,0 +1,162 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+from pypdf import PdfReader
+
+logger = logging.getLogger(__name__)
+
+# Below this many pages, starting work in other processes costs more than it saves
+MIN_PARALLEL_PAGES = 64
+# Page ranges per worker, so a range of image-heavy pages does not hold back the others
+RANGES_PER_WORKER = 4
+
+
+class PdfPage:
+    """Text of one page and the placeholder ids of the images it draws."""
+
+    def __init__(self, number: int, text: str, images: List[str]):
+        self.number = number  # 1-based
+        self.text = text
+        self.images = images
+
+
+class PdfExtraction:
+    """Per-page text of a PDF file, joined with '\\n' between pages."""
+
+    def __init__(self, path: str, pages: List[PdfPage]):
+        self.path = path
+        self.pages = pages
+
+    @property
+    def text(self) -> str:
+        return '\n'.join(page.text for page in self.pages)
+
+    @property
+    def page_boundaries(self) -> List[Tuple[int, int, int]]:
+        """(start, end, page number) of every page within ``text``."""
+        boundaries = []
+        cursor = 0
+        for page in self.pages:
+            boundaries.append((cursor, cursor + len(page.text), page.number))
+            cursor += len(page.text) + 1  # +1 for the '\n' join
+        return boundaries
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def extract_pdf(path: str, max_workers: Optional[int] = None, min_parallel_pages: int = MIN_PARALLEL_PAGES) -> PdfExtraction:
+    """
+    Extract the text of every page of a PDF file.
+
+    Files with at least ``min_parallel_pages`` pages are split into page ranges that are
+    extracted by a shared process pool of ``max_workers`` processes (default: one per
+    CPU); smaller files, or a single worker, are extracted in this process. Images are
+    only recorded as placeholders ``page_<index>_image_<n>``, found in the page resources
+    without decoding the image data.
+    """
+    reader = PdfReader(path)
+    page_count = len(reader.pages)
+    workers = min(max_workers or os.cpu_count() or 1, page_count // max(min_parallel_pages // 2, 1))
+
+    if page_count >= min_parallel_pages and workers > 1:
+        try:
+            return PdfExtraction(path, _extract_parallel(path, page_count, workers))
+        except BrokenProcessPool as e:
+            _reset_executor()
+            logger.warning(f"Process pool broke while extracting {path}, extracting sequentially: {str(e)}")
+        except Exception as e:
+            logger.warning(f"Parallel extraction of {path} failed, extracting sequentially: {str(e)}")
+
+    return PdfExtraction(path, [_extract_page(page, index) for index, page in enumerate(reader.pages)])
+
+
+def read_pdf_text(path: str, parsed_cache=None) -> Dict[str, Any]:
+    """
+    Text, page boundaries and per-page image placeholders of a PDF file, from the parsed
+    document cache when given. Shared by FileStorage and the chunk strategies, so a PDF
+    is parsed once for all of them.
+    """
+    if parsed_cache is None:
+        return _extract_pdf_text(path)
+    return parsed_cache.get_or_parse(path, "pdf_text", _extract_pdf_text)
+
+
+def _extract_pdf_text(path: str) -> Dict[str, Any]:
+    extraction = extract_pdf(path)
+    return {
+        "text": extraction.text,
+        "page_boundaries": extraction.page_boundaries,
+        "page_images": [page.images for page in extraction.pages],
+    }
+
+
+def _extract_parallel(path: str, page_count: int, workers: int) -> List[PdfPage]:
+    range_size = -(-page_count // (workers * RANGES_PER_WORKER))
+    ranges = [(start, min(start + range_size, page_count)) for start in range(0, page_count, range_size)]
+    executor = _get_executor(workers)
+    futures = [executor.submit(_extract_page_range, path, start, end) for start, end in ranges]
+    pages = []
+    for future in futures:
+        pages.extend(future.result())
+    logger.debug(f"Extracted {page_count} pages of {path} in {len(ranges)} ranges on {workers} processes")
+    return pages
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers < workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            # Spawned rather than forked: ingestion runs on threads that may hold locks
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _executor_workers = workers
+        return _executor
+
+
+def _reset_executor() -> None:
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor, _executor_workers = None, 0
+
+
+def _extract_page_range(path: str, start: int, end: int) -> List[PdfPage]:
+    reader = PdfReader(path)
+    return [_extract_page(reader.pages[index], index) for index in range(start, end)]
+
+
+def _extract_page(page, index: int) -> PdfPage:
+    images = [f"page_{index}_image_{i}" for i in range(_count_images(page.get("/Resources")))]
+    return PdfPage(index + 1, page.extract_text() or '', images)
+
+
+def _count_images(resources, seen: Optional[set] = None) -> int:
+    """Count image XObjects in a resource dictionary, including those of nested forms."""
+    if resources is None:
+        return 0
+    resources = resources.get_object()
+    xobjects = resources.get("/XObject")
+    if xobjects is None:
+        return 0
+    # Forms already walked, so self-referencing resources cannot recurse forever
+    seen = seen if seen is not None else set()
+    count = 0
+    for reference in xobjects.get_object().values():
+        xobject = reference.get_object()
+        subtype = xobject.get("/Subtype")
+        if subtype == "/Image":
+            count += 1
+        elif subtype == "/Form" and id(xobject) not in seen:
+            seen.add(id(xobject))
+            count += _count_images(xobject.get("/Resources"), seen)
+    return count
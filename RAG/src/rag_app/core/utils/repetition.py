@@ -0,0 +1,139 @@
+from bisect import bisect_left
+from typing import Dict, List
+
+_MOD = (1 << 61) - 1
+_BASE = 1_000_003
+
+
+def has_consecutive_repetition(text: str, k: int = 10) -> bool:
+    """
+    Check if there is a consecutive repetition of at least k characters in the text.
+    Uses suffix arrays to find all possible repetitions.
+
+    Kept as the reference implementation for RepetitionDetector; it rebuilds the
+    whole suffix array on every call, so it must not be used on the streaming path.
+    """
+    n = len(text)
+    if n < 2*k:
+        return False
+
+    # Create suffix array
+    suffixes = [(text[i:], i) for i in range(n)]
+    suffixes.sort()
+
+    # Compare consecutive suffixes to find common prefixes
+    for i in range(n-1):
+        s1, pos1 = suffixes[i]
+        s2, pos2 = suffixes[i+1]
+
+        # Find length of common prefix
+        common_len = 0
+        while common_len < len(s1) and common_len < len(s2) and s1[common_len] == s2[common_len]:
+            common_len += 1
+
+        # Check if it's a consecutive repetition
+        if common_len >= k and abs(pos1 - pos2) == common_len:
+            return True
+
+    return False
+
+
+class RepetitionDetector:
+    """
+    Incremental detector for consecutive repetitions in a streamed response.
+
+    A repetition is a square ``uu`` where the smallest period of ``u`` is at least k;
+    the detector fires on the first character that completes one. Every repetition
+    reported by ``has_consecutive_repetition`` is such a square, so the detector fires
+    on the same prefix or earlier. The converse does not hold: the suffix array check
+    only compares suffixes adjacent in sorted order and misses some squares, which the
+    detector does report. Runs with a period shorter than k ("=====", indentation) are
+    ignored by both.
+
+    The detector is fed only the new text of each chunk. Each k-gram is indexed by a
+    rolling hash; a square of period d completes once the k-grams at distance d have
+    matched d - k + 1 times in a row, so only the occurrences of the newest k-gram need
+    to be visited for every appended character.
+    """
+
+    def __init__(self, k: int = 10):
+        if k < 1:
+            raise ValueError("k must be a positive integer")
+        self.k = k
+        self.detected = False
+        self._text: List[str] = []
+        self._prefix_hashes: List[int] = [0]
+        self._powers: List[int] = [1]
+        # For every period p < k, number of consecutive positions ending at the last
+        # character where text[x] == text[x - p]
+        self._period_runs: List[int] = [0] * k
+        self._occurrences: Dict[int, List[int]] = {}
+        self._streaks: Dict[int, int] = {}
+        self._last_match: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._text)
+
+    @property
+    def text(self) -> str:
+        return "".join(self._text)
+
+    def feed(self, chunk: str) -> bool:
+        """Append a chunk of the response and return True once a repetition has been seen."""
+        for char in chunk:
+            if self.detected:
+                break
+            self._append(char)
+        return self.detected
+
+    def _append(self, char: str) -> None:
+        text = self._text
+        text.append(char)
+        i = len(text) - 1
+        self._prefix_hashes.append((self._prefix_hashes[-1] * _BASE + ord(char)) % _MOD)
+        self._powers.append((self._powers[-1] * _BASE) % _MOD)
+
+        k = self.k
+        period_runs = self._period_runs
+        for p in range(1, k):
+            period_runs[p] = period_runs[p] + 1 if i >= p and text[i - p] == char else 0
+
+        if i < k - 1:
+            return
+
+        j = i - k + 1
+        kgram_hash = self._hash(j, i + 1)
+
+        # If the k-gram sits in a run of period p < k, earlier occurrences inside the same
+        # run can only complete squares of a word with period < k, so skip them.
+        run_start = j
+        for p in range(1, k):
+            if period_runs[p] >= k - p:
+                run_start = i - period_runs[p] - p + 1
+                break
+
+        occurrences = self._occurrences.setdefault(kgram_hash, [])
+        candidates = occurrences[:bisect_left(occurrences, run_start)]
+        for previous in candidates:
+            d = j - previous
+            if d < k:
+                continue
+            streak = self._streaks.get(d, 0) + 1 if self._last_match.get(d) == j - 1 else 1
+            self._streaks[d] = streak
+            self._last_match[d] = j
+            if streak >= d - k + 1 and self._is_repetition(i + 1 - 2 * d, d):
+                self.detected = True
+                return
+        occurrences.append(j)
+
+    def _hash(self, start: int, end: int) -> int:
+        return (self._prefix_hashes[end] - self._prefix_hashes[start] * self._powers[end - start]) % _MOD
+
+    def _is_repetition(self, start: int, period: int) -> bool:
+        # Confirm the hashed match and require the repeated word to have a period >= k
+        first = "".join(self._text[start:start + period])
+        second = "".join(self._text[start + period:start + 2 * period])
+        if first != second:
+            return False
+        root = (first + first).find(first, 1)
+        return root >= self.k
@@ -0,0 +1,23 @@
+from collections import Counter
+from typing import Dict
+import threading
+
+
+class RequestMetrics:
+    """Thread-safe counters of request outcomes, e.g. 'ask.completed' or 'ask.cancelled'."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Counter = Counter()
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def get(self, name: str) -> int:
+        with self._lock:
+            return self._counters[name]
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
@@ -0,0 +1,153 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+_WORDS = re.compile(r"\w+")
+
+
+def _metadata(result: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = result.get('metadata') or {}
+    # Results of _combine_adjacent_chunks carry their metadata in a list
+    if isinstance(metadata, list):
+        metadata = metadata[0] if metadata else {}
+    return metadata
+
+
+def _shingles(text: str, size: int = 3) -> Set[Tuple[str, ...]]:
+    words = _WORDS.findall(text.casefold())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class ResultDeduplicator:
+    """
+    Removes repeated text from ranked search results before they go into the prompt.
+
+    Hits on the same document whose spans overlap or touch are merged into one result:
+    character spans (``start``/``end`` of fixed size chunks) are joined without their
+    overlap, sentence spans (``start_sentence``/``end_sentence`` of semantic chunks) are
+    concatenated, and hits on the same section are kept once. Then a result whose text
+    is, for at least ``near_duplicate_threshold`` of its word trigrams, already in a
+    better ranked result is dropped, which catches the same passage found in several
+    domains. Merged results take the rank and the distance of their best hit.
+    """
+
+    def __init__(self, near_duplicate_threshold: float = 0.9):
+        self.near_duplicate_threshold = near_duplicate_threshold
+
+    def deduplicate(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if len(results) < 2:
+            return results
+        merged = self._merge_spans(results)
+        deduplicated = self._drop_duplicates(merged)
+        if len(deduplicated) < len(results):
+            saved = sum(len(r.get('document') or "") for r in results) - sum(len(r.get('document') or "") for r in deduplicated)
+            logger.info(f"Deduplicated context: {len(results)} results -> {len(deduplicated)}, {saved} characters saved")
+        return deduplicated
+
+    @staticmethod
+    def _span(result: Dict[str, Any]) -> Optional[Tuple[tuple, int, int]]:
+        """(group key, start, end) of a result, with end exclusive, or None if it has no span."""
+        metadata = _metadata(result)
+        document_id = metadata.get('document_id') or result.get('document_id')
+        if document_id is None or result.get('document') is None:
+            return None
+        if isinstance(metadata.get('start'), int):
+            start = metadata['start']
+            # The last chunk of a document is shorter than its configured end
+            return (document_id, 'chars'), start, start + len(result['document'])
+        if isinstance(metadata.get('start_sentence'), int) and isinstance(metadata.get('end_sentence'), int):
+            return (document_id, 'sentences'), metadata['start_sentence'], metadata['end_sentence'] + 1
+        if metadata.get('breadcrumb') is not None:
+            section = metadata['breadcrumb'].split(' (part ')[0] + str(metadata.get('heading', ''))
+            return (document_id, 'section', section), 0, 0
+        return None
+
+    def _merge_spans(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        groups: Dict[tuple, List[int]] = {}
+        spans = [self._span(result) for result in results]
+        for rank, span in enumerate(spans):
+            if span is not None:
+                groups.setdefault(span[0], []).append(rank)
+
+        # Rank of the result each hit is merged into, and the merged results by that rank
+        merged_into: Dict[int, int] = {}
+        merged: Dict[int, Dict[str, Any]] = {}
+        for key, ranks in groups.items():
+            if len(ranks) < 2:
+                continue
+            ranks.sort(key=lambda rank: (spans[rank][1], spans[rank][2]))
+            run = [ranks[0]]
+            for rank in ranks[1:]:
+                if spans[rank][1] <= max(spans[r][2] for r in run):
+                    run.append(rank)
+                else:
+                    self._merge_run(results, spans, key, run, merged_into, merged)
+                    run = [rank]
+            self._merge_run(results, spans, key, run, merged_into, merged)
+
+        output = []
+        for rank, result in enumerate(results):
+            target = merged_into.get(rank, rank)
+            if target == rank:
+                output.append(merged.get(rank, result))
+        return output
+
+    @staticmethod
+    def _merge_run(results, spans, key, run, merged_into, merged) -> None:
+        """Merge hits of one document whose spans form a contiguous run, sorted by start."""
+        if len(run) < 2:
+            return
+        kind = key[1]
+        best = min(run)
+        document = results[run[0]]['document']
+        end = spans[run[0]][2]
+        for rank in run[1:]:
+            start, stop = spans[rank][1], spans[rank][2]
+            if stop <= end:
+                continue  # Contained in what is already merged
+            text = results[rank]['document']
+            if kind == 'chars':
+                document += text[end - start:]
+            elif kind == 'sentences':
+                if start < end:
+                    return  # Partly overlapping sentence spans cannot be cut, keep the hits apart
+                document = f"{document} {text}"
+            end = stop
+
+        result = dict(results[best])
+        result['document'] = document
+        if 'content' in result:
+            result['content'] = document
+        metadata = dict(_metadata(result))
+        if kind == 'chars':
+            metadata['start'], metadata['end'] = spans[run[0]][1], end
+        elif kind == 'sentences':
+            metadata['start_sentence'], metadata['end_sentence'] = spans[run[0]][1], end - 1
+        result['metadata'] = [metadata] if isinstance(results[best].get('metadata'), list) else metadata
+        result['merged_ids'] = [results[rank].get('id') or results[rank].get('chunk_id') for rank in sorted(run)]
+
+        merged[best] = result
+        for rank in run:
+            merged_into[rank] = best
+
+    def _drop_duplicates(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        kept: List[Dict[str, Any]] = []
+        kept_texts: Set[str] = set()
+        kept_shingles: List[Set[Tuple[str, ...]]] = []
+        for result in results:
+            text = " ".join((result.get('document') or "").split()).casefold()
+            if text in kept_texts:
+                logger.debug(f"Dropping duplicate result {result.get('id') or result.get('chunk_id')}")
+                continue
+            shingles = _shingles(text)
+            if shingles and any(len(shingles & other) >= self.near_duplicate_threshold * len(shingles) for other in kept_shingles):
+                logger.debug(f"Dropping near duplicate result {result.get('id') or result.get('chunk_id')}")
+                continue
+            kept.append(result)
+            kept_texts.add(text)
+            kept_shingles.append(shingles)
+        return kept
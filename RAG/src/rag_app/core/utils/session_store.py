@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import logging
+import threading
+import time
+
+from ..implementations.conversation.conversation import Conversation
+from ..interfaces.conversation_interface import Message
+from ..interfaces.session_backend_interface import SessionBackendInterface
+
+logger = logging.getLogger(__name__)
+
+# Session of the requests that carry no conversation_id
+DEFAULT_SESSION_ID = "default"
+
+
+class Session:
+    """Per-conversation state: the history, the last search results and the last answer."""
+
+    def __init__(self, conversation_id: str, conversation: Optional[Conversation] = None,
+                 last_results: Optional[List[dict]] = None, last_response: str = "",
+                 updated_at: Optional[float] = None):
+        self.conversation_id = conversation_id
+        self.conversation = conversation or Conversation(persistent=True)
+        self.last_results = last_results or []
+        self.last_response = last_response
+        self.updated_at = updated_at or time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "conversation_id": self.conversation_id,
+            "history": [{"role": message.role, "content": message.content} for message in self.conversation.get_history()],
+            "summary": self.conversation.summary,
+            "summarized_count": self.conversation.summarized_count,
+            "last_results": self.last_results,
+            "last_response": self.last_response,
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Session":
+        return cls(
+            conversation_id=data["conversation_id"],
+            conversation=Conversation(
+                [Message(**message) for message in data.get("history", [])],
+                summary=data.get("summary", ""),
+                summarized_count=data.get("summarized_count", 0),
+                persistent=True
+            ),
+            last_results=data.get("last_results"),
+            last_response=data.get("last_response", ""),
+            updated_at=data.get("updated_at"),
+        )
+
+
+class SessionStore:
+    """
+    Conversation sessions keyed by conversation_id.
+
+    At most ``max_sessions`` sessions are kept in memory, least recently used evicted first,
+    and sessions idle for more than ``ttl_seconds`` start over. A saved session keeps its
+    last ``max_messages`` messages. With a backend, sessions are also saved there, so
+    evicted ones are loaded back and survive restarts.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: Optional[float] = 3600,
+                 backend: Optional[SessionBackendInterface] = None, max_messages: Optional[int] = 100):
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_seconds = ttl_seconds or None
+        self.max_messages = max_messages or None
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, conversation_id: Optional[str] = None) -> Session:
+        """Return the session of a conversation, creating it if unknown or expired."""
+        conversation_id = conversation_id or DEFAULT_SESSION_ID
+        with self._lock:
+            session = self._sessions.get(conversation_id)
+            if session is not None:
+                self._sessions.move_to_end(conversation_id)
+        if session is None and self.backend is not None:
+            data = self.backend.load(conversation_id)
+            session = Session.from_dict(data) if data else None
+        if session is not None and self._expired(session):
+            logger.info(f"Session {conversation_id} expired, starting a new one")
+            self.delete(conversation_id)
+            session = None
+        if session is None:
+            session = Session(conversation_id)
+        self._remember(session)
+        return session
+
+    def save(self, session: Session) -> None:
+        session.updated_at = time.time()
+        if self.max_messages is not None:
+            dropped = session.conversation.trim(self.max_messages)
+            if dropped:
+                logger.debug(f"Dropped the {dropped} oldest message(s) of session {session.conversation_id}")
+        self._remember(session)
+        if self.backend is not None:
+            self.backend.save(session.conversation_id, session.to_dict())
+
+    def reset(self, conversation_id: Optional[str] = None) -> Session:
+        """Replace the session of a conversation with an empty one."""
+        self.delete(conversation_id or DEFAULT_SESSION_ID)
+        return self.get(conversation_id)
+
+    def delete(self, conversation_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(conversation_id, None)
+        if self.backend is not None:
+            self.backend.delete(conversation_id)
+
+    def _expired(self, session: Session) -> bool:
+        return self.ttl_seconds is not None and time.time() - session.updated_at > self.ttl_seconds
+
+    def _remember(self, session: Session) -> None:
+        with self._lock:
+            self._sessions[session.conversation_id] = session
+            self._sessions.move_to_end(session.conversation_id)
+            while len(self._sessions) > self.max_sessions:
+                evicted_id, _ = self._sessions.popitem(last=False)
+                logger.debug(f"Session {evicted_id} evicted from memory")
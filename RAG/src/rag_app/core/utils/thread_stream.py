@@ -0,0 +1,81 @@
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable, Iterator, TypeVar
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_ITEM, _ERROR, _DONE = "item", "error", "done"
+
+
+async def iterate_in_thread(make_iterator: Callable[[], Iterator[T]], executor: Executor,
+                            max_buffered: int = 64, name: str = "stream") -> AsyncIterator[T]:
+    """
+    Consume a blocking iterator on a worker thread and yield its items on the event loop.
+
+    The iterator is created and read on ``executor``, and its items go through an
+    ``asyncio.Queue`` holding at most ``max_buffered`` items: a worker whose consumer falls
+    behind waits for room in the queue instead of buffering the whole stream. When the
+    consumer stops early (it is closed or cancelled, e.g. because the client went away)
+    the worker stops reading and closes the iterator before its next item. Errors of the
+    iterator are raised to the consumer.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    # Room left in the queue, taken by the worker and given back by the consumer
+    room = threading.Semaphore(max(1, max_buffered))
+    stopped = threading.Event()
+    started = time.perf_counter()
+    timings = {"first": None, "items": 0}
+
+    def put(kind: str, value) -> bool:
+        """Hand an item to the event loop, waiting for room in the queue. False once stopped."""
+        while not room.acquire(timeout=0.1):
+            if stopped.is_set():
+                return False
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (kind, value))
+        except RuntimeError:  # Event loop closed
+            return False
+        return True
+
+    def produce() -> None:
+        try:
+            iterator = make_iterator()
+            try:
+                for item in iterator:
+                    if timings["first"] is None:
+                        timings["first"] = time.perf_counter() - started
+                    timings["items"] += 1
+                    if stopped.is_set() or not put(_ITEM, item):
+                        logger.info(f"{name}: stopped by its consumer after {timings['items']} item(s)")
+                        return
+            finally:
+                close = getattr(iterator, "close", None)
+                if close is not None:
+                    close()
+        except BaseException as e:
+            put(_ERROR, e)
+        else:
+            put(_DONE, None)
+
+    worker = loop.run_in_executor(executor, produce)
+    try:
+        while True:
+            kind, value = await queue.get()
+            room.release()
+            if kind == _DONE:
+                break
+            if kind == _ERROR:
+                raise value
+            yield value
+    finally:
+        stopped.set()
+        first = f"{timings['first']:.3f}s" if timings["first"] is not None else "-"
+        logger.info(f"{name}: {timings['items']} item(s) in {time.perf_counter() - started:.3f}s, first after {first}")
+        if worker.done() and not worker.cancelled() and worker.exception() is not None:
+            logger.error(f"{name}: worker failed: {worker.exception()}")
@@ -0,0 +1,27 @@
+import re
+
+# Words and single punctuation marks, the units tokenizers split text into first
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local estimate of the number of tokens of a text, for budgeting prompts without
+    the model's tokenizer: one token per punctuation mark and per 4 characters of a word
+    (at least one per word). Errs on the high side for accented and non-Latin text.
+    """
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN_PIECES.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of text, cut at a whitespace, with at most max_tokens estimated tokens."""
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Characters per token varies little within a text, so a proportional cut is close
+    end = len(text) * max_tokens // max(estimate_tokens(text), 1)
+    while end > 0 and estimate_tokens(text[:end]) > max_tokens:
+        end = end * 9 // 10
+    space = text.rfind(" ", 0, end)
+    return text[:space if space > end // 2 else end].rstrip()
@@ -17,31 +17,117 @@ from rag_app.core.implementations.domain_manager.domain_manager import DomainMan
 from rag_app.core.implementations.embedding_model.cohere_embedding import CohereEmbedding
 from rag_app.core.implementations.embedding_model.oci_embedding import OCIEmbedding
 from rag_app.core.implementations.embedding_model.ollama_embedding import OllamaEmbedding
+from rag_app.core.implementations.embedding_model.embedding_cache import EmbeddingCache
+from rag_app.core.implementations.embedding_model.cached_embedding import CachedEmbedding
+from rag_app.core.implementations.embedding_model.query_embedding_cache import QueryCachedEmbedding
 from rag_app.core.implementations.vector_store.vector_store_factory import VectorStoreFactory
 from rag_app.core.implementations.storage.file_storage import FileStorage
+from rag_app.core.utils.parsed_document_cache import ParsedDocumentCache
+from rag_app.core.utils.lru_cache import LRUCache
+from rag_app.core.utils.answer_cache import SemanticAnswerCache
+from rag_app.core.utils.context_packer import ContextPacker
+from rag_app.core.utils.result_deduplicator import ResultDeduplicator
+from rag_app.core.implementations.query_engine.query_engine import QueryEngine
+from rag_app.core.implementations.query_optimizer.query_optimizer import QueryOptimizer
+from rag_app.core.implementations.reranker.reranker import ResultReRanker
 
 logger = logging.getLogger(__name__)
 
-def initialize_rag_components(config_data: dict):
+# Config sections that determine the contents of the index; the rest only affects serving
+INDEX_CONFIG_KEYS = ("DATA_FOLDER", "chunking", "embedding_model", "vector_store", "document")
+
+def get_changed_index_config(old_config: dict, new_config: dict) -> list:
+    """Index-affecting config sections that differ between two merged configs."""
+    return [key for key in INDEX_CONFIG_KEYS if old_config.get(key) != new_config.get(key)]
+
+def initialize_chat_model(config_data: dict) -> ChatModelInterface:
+    model_id = config_data["chat_model"]["MODEL_ID"].lower()
+    if "command-r" in model_id:
+        chat_model: ChatModelInterface = OCI_CommandRplus(config_data["chat_model"])
+        logger.info(f"OCI_CommandRplus chat model initialized successfully")
+    elif "llama" in model_id:
+        chat_model: ChatModelInterface = OCI_Llama3_70(config_data["chat_model"])
+        logger.info(f"OCI_Llama3_70 chat model initialized successfully")
+    else:
+        raise ValueError(f"Unsupported model ID: {config_data['chat_model']['MODEL_ID']}")
+    return chat_model
+
+def initialize_query_engine(config_data: dict, domain_manager: DomainManager, chat_model: ChatModelInterface) -> QueryEngine:
+    """Build the QueryEngine serving an already ingested domain manager."""
+    query_engine_config = config_data['query_engine']
+    embedding_model = domain_manager.embedding_model
+    # The disk cache is for corpus chunks: questions would be written to disk on the request
+    # path and evict chunk embeddings, so they only go through the in-memory cache below
+    if isinstance(embedding_model, CachedEmbedding):
+        embedding_model = embedding_model.embedding_model
+    # Repeated questions skip the query embedding round trip; 0 disables the cache
+    query_cache_size = query_engine_config.get('QUERY_CACHE_SIZE', 1024)
+    if query_cache_size > 0:
+        query_cache_ttl = query_engine_config.get('QUERY_CACHE_TTL', 3600)
+        embedding_model = QueryCachedEmbedding(embedding_model, LRUCache(query_cache_size, query_cache_ttl))
+
+    answer_cache = None
+    answer_cache_size = query_engine_config.get('ANSWER_CACHE_SIZE', 256)
+    if answer_cache_size > 0:
+        answer_cache = SemanticAnswerCache(
+            max_entries=answer_cache_size,
+            similarity_threshold=query_engine_config.get('ANSWER_CACHE_THRESHOLD', 0.95),
+            ttl_seconds=query_engine_config.get('ANSWER_CACHE_TTL', 86400)
+        )
+
+    # Search results beyond the budget are truncated or left out of the prompt; 0 disables the budget
+    context_token_budget = query_engine_config.get('CONTEXT_TOKEN_BUDGET', 6000)
+    context_packer = ContextPacker(token_budget=context_token_budget) if context_token_budget > 0 else None
+
+    return QueryEngine(
+        domain_manager=domain_manager,
+        vector_stores=domain_manager.vector_stores,
+        embedding_model=embedding_model,
+        chat_model=chat_model,
+        chunk_strategy=domain_manager.chunk_strategy,
+        query_optimizer=QueryOptimizer(chat_model=chat_model) if query_engine_config.get('USE_QUERY_OPTIMIZER', True) else None,
+        result_re_ranker=ResultReRanker() if query_engine_config.get('USE_RESULT_RE_RANKER', True) else None,
+        result_deduplicator=ResultDeduplicator(
+            near_duplicate_threshold=query_engine_config.get('NEAR_DUPLICATE_THRESHOLD', 0.9)
+        ) if query_engine_config.get('DEDUPLICATE_RESULTS', True) else None,
+        max_search_parallelism=query_engine_config.get('MAX_SEARCH_PARALLELISM', 4),
+        search_timeout=query_engine_config.get('SEARCH_TIMEOUT', 10.0),
+        answer_cache=answer_cache,
+        context_packer=context_packer
+    )
+
+def get_index_directories(config_data: dict, index_directory: str = None) -> dict:
+    """
+    Directories making up an index: the vector stores and the chunks with their ingestion
+    manifests. Without an index version directory these are the configured legacy locations.
+    """
+    if index_directory:
+        return {
+            "chroma_db": os.path.join(index_directory, "chroma_db"),
+            "numpy_db": os.path.join(index_directory, "numpy_db"),
+            "chunks": os.path.join(index_directory, "chunks"),
+        }
+    return {
+        "chroma_db": config_data['vector_store'].get('CHROMA_PERSIST_DIRECTORY'),
+        "numpy_db": config_data['vector_store'].get('NUMPY_PERSIST_DIRECTORY'),
+        "chunks": os.path.join(config_data["DATA_FOLDER"], '../chunks'),
+    }
+
+def initialize_rag_components(config_data: dict, index_directory: str = None):
     # Load environment variables from .env file
     load_dotenv()
 
     try:
-        model_id = config_data["chat_model"]["MODEL_ID"].lower()
-        if "command-r" in model_id:
-            chat_model: ChatModelInterface = OCI_CommandRplus(config_data["chat_model"])
-            logger.info(f"OCI_CommandRplus chat model initialized successfully")
-        elif "llama" in model_id:
-            chat_model: ChatModelInterface = OCI_Llama3_70(config_data["chat_model"])
-            logger.info(f"OCI_Llama3_70 chat model initialized successfully")
-        else:
-            raise ValueError(f"Unsupported model ID: {config_data['chat_model']['MODEL_ID']}")
+        chat_model = initialize_chat_model(config_data)
     except Exception as e:
         logger.error(f"Failed to initialize or test chat model: {str(e)}")
         sys.exit(1)
 
+    # Parse results shared by the storage and the chunk strategies, keyed by file content
+    parsed_cache = ParsedDocumentCache(config_data['document'].get('PARSED_CACHE_DIRECTORY'))
+
     try:
-        storage = FileStorage(config_data["DATA_FOLDER"])
+        storage = FileStorage(config_data["DATA_FOLDER"], parsed_cache=parsed_cache)
     except (FileNotFoundError, NotADirectoryError) as e:
         logger.error(f"Failed to initialize storage: {e}")
         sys.exit(1)
@@ -67,7 +153,10 @@ def initialize_rag_components(config_data: dict):
             embedding_model = OllamaEmbedding(
                 model_name=config_data['embedding_model']['MODEL_NAME'],
                 ollama_host=config_data['embedding_model']['OLLAMA_HOST'],
-                ollama_port=config_data['embedding_model']['OLLAMA_PORT']
+                ollama_port=config_data['embedding_model']['OLLAMA_PORT'],
+                batch_size=config_data['embedding_model'].get('OLLAMA_BATCH_SIZE', 32),
+                max_concurrency=config_data['embedding_model'].get('OLLAMA_MAX_CONCURRENCY', 4),
+                keep_alive=config_data['embedding_model'].get('OLLAMA_KEEP_ALIVE', "5m")
             )
             logger.info(f"OllamaEmbedding model '{config_data['embedding_model']['MODEL_NAME']}' initialized successfully with URL: {ollama_url}")
         elif config_data['embedding_model']['PROVIDER'].lower() == "oci":
@@ -78,12 +167,25 @@ def initialize_rag_components(config_data: dict):
     except Exception as e:
         logger.error(f"Failed to initialize embedding model: {str(e)}")
         sys.exit(1)
+
+    cache_directory = config_data['embedding_model'].get('EMBEDDING_CACHE_DIRECTORY')
+    if cache_directory:
+        embedding_cache = EmbeddingCache(
+            cache_directory=cache_directory,
+            provider=config_data['embedding_model']['PROVIDER'].lower(),
+            model_name=embedding_model.model_name,
+            dimension=config_data['embedding_model']['EMBEDDING_DIMENSION'],
+            max_entries=config_data['embedding_model'].get('EMBEDDING_CACHE_MAX_ENTRIES', 200000)
+        )
+        embedding_model = CachedEmbedding(embedding_model, embedding_cache)
+        logger.info(f"Embedding cache enabled with {len(embedding_cache)} cached embeddings")
         
     logger.info("Initializing chunking strategy...")
     if config_data['chunking']['STRATEGY'] == "fixed":
         chunk_strategy = FixedSizeChunkStrategy(
             chunk_size=config_data['chunking']['CHUNK_SIZE'],
-            overlap=config_data['chunking']['CHUNK_OVERLAP']
+            overlap=config_data['chunking']['CHUNK_OVERLAP'],
+            parsed_cache=parsed_cache
         )
         logger.info(f"Using FixedSizeChunkStrategy with chunk size {config_data['chunking']['CHUNK_SIZE']} and overlap {config_data['chunking']['CHUNK_OVERLAP']}")
     elif config_data['chunking']['STRATEGY'] == "semantic":
@@ -97,7 +199,8 @@ def initialize_rag_components(config_data: dict):
             chunk_size=config_data['chunking']['CHUNK_SIZE'],
             overlap=config_data['chunking']['CHUNK_OVERLAP'],
             max_chunk_size=config_data['chunking']['MAX_CHUNK_SIZE'],
-            min_chunk_size=config_data['chunking']['MIN_CHUNK_SIZE']
+            min_chunk_size=config_data['chunking']['MIN_CHUNK_SIZE'],
+            parsed_cache=parsed_cache
         )
     else:
         logger.error(f"Invalid chunking strategy: {config_data['chunking']['STRATEGY']}")
@@ -112,7 +215,12 @@ def initialize_rag_components(config_data: dict):
     vector_store_factory = VectorStoreFactory()
     logger.info("Vector store factory initialized")
 
-    logger.info("Initializing DomainManager...")
+    index_directories = get_index_directories(config_data, index_directory)
+    vector_stores_config = dict(config_data['vector_store'],
+                                CHROMA_PERSIST_DIRECTORY=index_directories["chroma_db"],
+                                NUMPY_PERSIST_DIRECTORY=index_directories["numpy_db"])
+
+    logger.info(f"Initializing DomainManager with index directory {index_directory or 'legacy layout'}...")
     start_time = time.time()
     try:
         domain_manager = DomainManager(
@@ -122,8 +230,9 @@ def initialize_rag_components(config_data: dict):
             domain_factory=domain_factory,
             document_factory=document_factory,
             vector_store_factory=vector_store_factory,
-            vector_stores_config=config_data['vector_store'],
-            embedding_model=embedding_model
+            vector_stores_config=vector_stores_config,
+            embedding_model=embedding_model,
+            chunks_folder=index_directories["chunks"]
         )
     except Exception as e:
         logger.error(f"Failed to initialize DomainManager: {str(e)}")
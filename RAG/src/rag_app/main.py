@@ -1,5 +1,6 @@
 import sys
 import os
+import asyncio
 import logging
 import uvicorn
 import json
@@ -8,10 +9,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from ..api import routes
 from rag_app.private_config import private_settings
-from rag_app.core.implementations.query_engine.query_engine import QueryEngine
-from rag_app.core.implementations.reranker.reranker import ResultReRanker
-from rag_app.initialization import initialize_rag_components
-from rag_app.core.implementations.query_optimizer.query_optimizer import QueryOptimizer
+from rag_app.initialization import initialize_rag_components, initialize_query_engine
+from rag_app.core.utils.engine_holder import EngineGeneration
 from .logger import setup_logging
 from .core.middleware.context import RequestContextMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -88,23 +87,19 @@ async def init_query_engine():
         merged_config = merge_configs(private_settings.dict(), config_data)
         logger.info(f"Using merged config file: {merged_config}")
 
-        # 4. Call initialize_rag_components with the merged config
-        domain_manager, chat_model, embedding_model, chunk_strategy = initialize_rag_components(merged_config)
+        # 4. Call initialize_rag_components with the merged config, on the active index version
+        # (or the legacy layout if /setup_rag has not built one yet). Leftovers of interrupted
+        # builds are removed.
+        routes.index_versions.remove_inactive()
+        version = routes.index_versions.active_version
+        index_directory = routes.index_versions.path(version) if version else None
+        domain_manager, chat_model, embedding_model, chunk_strategy = initialize_rag_components(merged_config, index_directory)
 
         # 5. Initialize the Query Engine
-        query_engine = QueryEngine(
-            domain_manager=domain_manager,
-            vector_stores=domain_manager.vector_stores,
-            embedding_model=embedding_model,
-            chat_model=chat_model,
-            chunk_strategy=chunk_strategy,
-            query_optimizer=QueryOptimizer(chat_model=chat_model) if merged_config['query_engine'].get('USE_QUERY_OPTIMIZER', True) else None,
-            result_re_ranker=ResultReRanker() if merged_config['query_engine'].get('USE_RESULT_RE_RANKER', True) else None
-        )
-
-        # Update the global query_engine in the routes module
-        routes.query_engine = query_engine
-        routes.domain_manager = domain_manager
+        query_engine = initialize_query_engine(merged_config, domain_manager, chat_model)
+
+        # Make it the engine served by the routes module
+        routes.engine_holder.swap(EngineGeneration(query_engine, domain_manager, version, on_drained=routes.retire_index, config=merged_config))
 
         logger.info("Query engine initialized successfully on startup")
     except Exception as e:
@@ -115,5 +110,7 @@ async def init_query_engine():
 @app.on_event("startup")
 async def startup_event():
     await init_query_engine()
+    # Answered in the background, so the server starts serving right away
+    app.state.answer_cache_warmup = asyncio.create_task(routes.warm_answer_cache())
 
 app.mount("/", StaticFiles(directory=os.path.abspath(os.path.join(os.path.dirname(__file__), "../../public")), html=True), name="static")
@@ -16,6 +16,11 @@ class ChatModelSettings(BaseModel):
 class EmbeddingModelSettings(BaseModel):
     OLLAMA_HOST: str
     OLLAMA_PORT: int = 11434
+    OLLAMA_BATCH_SIZE: int = 32
+    OLLAMA_MAX_CONCURRENCY: int = 4
+    OLLAMA_KEEP_ALIVE: str = "5m"
+    EMBEDDING_CACHE_DIRECTORY: Optional[str] = "./embedding_cache"  # None disables the cache
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 200000
     OCI_COMPARTMENT_ID: str
     OCI_GENAI_ENDPOINT: str
     OCI_CONFIG_PROFILE: str
@@ -24,9 +29,11 @@ class EmbeddingModelSettings(BaseModel):
 
 class VectorStoreSettings(BaseModel):
     CHROMA_PERSIST_DIRECTORY: str = "./chroma_db"
+    NUMPY_PERSIST_DIRECTORY: str = "./numpy_db"
 
 class DocumentSettings(BaseModel):
     DB_CONNECTION_STRING: Optional[str] = None
+    PARSED_CACHE_DIRECTORY: Optional[str] = "./parsed_cache"  # None keeps parse results in memory only
 
 class PrivateSettings(BaseSettings):
     # Basic settings
@@ -54,6 +61,13 @@ class PrivateSettings(BaseSettings):
     DATA_FOLDER: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
     DOCS_FOLDER: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "docs")
     CONFIGS_FOLDER: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "configs")
+    INDEX_FOLDER: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "indexes")
+
+    # Conversation sessions, kept in memory and also saved as JSON files in SESSION_FOLDER if set
+    SESSION_MAX_SESSIONS: int = 1000
+    SESSION_TTL: float = 3600  # Seconds of inactivity before a conversation starts over, 0 never expires
+    SESSION_MAX_MESSAGES: int = 100  # Oldest messages of a session are dropped beyond this, 0 keeps all
+    SESSION_FOLDER: Optional[str] = None
 
     # Nested settings with default None
     chat_model: Optional[ChatModelSettings] = None
@@ -63,6 +63,18 @@ class PromptSettings(BaseModel):
     - No markdown, formatting, or explanations - just the JSON array
     """
 
+    HISTORY_SUMMARY: str = """
+    Update the summary of a conversation between a user and an assistant with the new messages below.
+    Keep the facts, names, numbers and open questions the assistant may need to answer follow-up questions.
+    Write at most 150 words, in the language of the conversation, without any introduction.
+
+    Current summary:
+    {summary}
+
+    New messages:
+    {messages}
+    """
+
     NO_RESULTS: str = """
     Aucun chapitre pertinent n'a été trouvé dans le Manuel de Documentation. 
     Veuillez essayer de reformuler votre question différemment ou contacter l'équipe d'assistance.
@@ -1,7 +1,7 @@
 import os
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 class ChunkingSettings(BaseModel):
     STRATEGY: str = "semantic"  # Options: "semantic", "fixed"
@@ -11,6 +11,17 @@ class ChunkingSettings(BaseModel):
 class QueryEngineSettings(BaseModel):
     USE_QUERY_OPTIMIZER: bool = True
     USE_RESULT_RE_RANKER: bool = True
+    MAX_SEARCH_PARALLELISM: int = 4  # Concurrent vector searches across domains
+    SEARCH_TIMEOUT: float = 10.0  # Seconds before a domain search is abandoned
+    QUERY_CACHE_SIZE: int = 1024  # Questions whose embeddings are kept in memory, 0 disables
+    QUERY_CACHE_TTL: float = 3600  # Seconds a cached question stays valid, 0 keeps it until evicted
+    ANSWER_CACHE_SIZE: int = 256  # Answers replayed for paraphrased questions, 0 disables
+    ANSWER_CACHE_THRESHOLD: float = 0.95  # Minimum cosine similarity between a question and a cached one
+    ANSWER_CACHE_TTL: float = 86400  # Seconds a cached answer is replayed, 0 keeps it until the index changes
+    ANSWER_CACHE_WARM_QUESTIONS: List[str] = []  # Questions answered at startup to fill the cache
+    CONTEXT_TOKEN_BUDGET: int = 6000  # Estimated tokens of search results in the prompt, 0 disables the budget
+    DEDUPLICATE_RESULTS: bool = True  # Merge hits with overlapping spans and drop repeated passages
+    NEAR_DUPLICATE_THRESHOLD: float = 0.9  # Share of a result's word trigrams in a better result for it to be dropped
 
 class ChatModelSettings(BaseModel):
     PROVIDER: str = "oci"
@@ -20,6 +31,10 @@ class ChatModelSettings(BaseModel):
     MAX_TOKENS: int = 4000
     TOP_P: float = 0 #previous - 0.75
     TOP_K: int = 1 #default value is 0
+    HISTORY_TOKEN_BUDGET: int = 1500  # Tokens of conversation history sent with a prompt
+    HISTORY_TURNS: int = 4  # Latest turns sent verbatim, older ones are summarized
+    STREAM_WORKERS: int = 16  # Threads reading answer streams from the provider, one per answer being generated
+    STREAM_BUFFER: int = 64  # Chunks of an answer buffered ahead of a slow client
 
 class EmbeddingModelSettings(BaseModel):
     PROVIDER: str = "ollama" # Options: "cohere", "ollama"
@@ -27,7 +42,7 @@ class EmbeddingModelSettings(BaseModel):
     EMBEDDING_DIMENSION: int = 1024
 
 class VectorStoreSettings(BaseModel):
-    DEFAULT_PROVIDER: str = "Chroma" # Options: "OCI_DB", "Python"
+    DEFAULT_PROVIDER: str = "Chroma" # Options: "Chroma", "NumpyFlat", "Oracle23ai"
     DOMAIN_CONFIG: Dict[str, str] = { # Options for values: "OCI_DB", "Python"
         "domain_name1": "Chroma", 
         "domain_name2": "Oracle23ai"
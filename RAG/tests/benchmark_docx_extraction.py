@@ -0,0 +1,151 @@
+"""
+DOCX structure extraction benchmark on generated documents.
+
+Builds DOCX files with headings, body paragraphs, a table every 50 paragraphs and an
+image every 100, then times StructuredDocumentStrategy._extract_docx_structure against
+the previous extractor (which rescanned every paragraph per <w:p> element) and checks
+that both produce the same structure. The previous extractor is quadratic, so it is
+skipped above --max-previous paragraphs.
+
+    python tests/benchmark_docx_extraction.py [--sizes 1000,4000,20000] [--max-previous 4000]
+"""
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Dict
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from docx import Document
+from docx.shared import Inches
+
+from src.rag_app.core.implementations.chunk_strategy.structured_document_chunker import StructuredDocumentStrategy
+
+
+def write_png(path: str) -> None:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    raw = b"".join(b"\x00" + bytes([x % 256, 64, 128]) * 16 for x in range(16))
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 16, 16, 8, 2, 0, 0, 0))
+                + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+def write_docx(path: str, paragraphs: int, image_path: str) -> None:
+    doc = Document()
+    for i in range(paragraphs):
+        if i % 20 == 0:
+            doc.add_heading(f"Section {i // 20}", level=1 + (i // 20) % 3)
+        elif i % 50 == 25:
+            table = doc.add_table(rows=3, cols=3)
+            for r, row in enumerate(table.rows):
+                for c, cell in enumerate(row.cells):
+                    cell.text = f"cell {i}.{r}.{c}"
+        elif i % 100 == 65:
+            doc.add_picture(image_path, width=Inches(1))
+        else:
+            doc.add_paragraph(f"Paragraph {i}: inspect the valve and replace the filter at every interval. " * 3)
+    doc.save(path)
+
+
+def previous_extract_docx_structure(docx_path: str) -> Dict:
+    """The extractor before the single-pass rewrite, kept as the reference output."""
+    doc = Document(docx_path)
+    structure = {"file": docx_path, "sections": []}
+    current_section = None
+
+    def get_default_section():
+        if "default" not in structure:
+            structure["default"] = {"content": [], "tables": [], "images": []}
+        return structure["default"]
+
+    body = doc.element.body
+    current_table_index = 0
+
+    for child in body.iter():
+        if child.tag.endswith('}p'):
+            for paragraph in doc.paragraphs:
+                if paragraph._element is child:
+                    text = paragraph.text.strip()
+                    if not text:
+                        continue
+
+                    style_name = paragraph.style.name
+
+                    if style_name.startswith("Heading"):
+                        heading_level = int(style_name.split()[-1])
+                        current_section = {
+                            "title": text,
+                            "level": heading_level,
+                            "content": [],
+                            "tables": [],
+                            "images": []
+                        }
+                        structure["sections"].append(current_section)
+                    else:
+                        target_section = current_section if current_section else get_default_section()
+                        target_section["content"].append(text)
+                    break
+
+        elif child.tag.endswith('}tbl'):
+            if current_table_index < len(doc.tables):
+                table = doc.tables[current_table_index]
+                table_content = []
+                for row in table.rows:
+                    row_content = [cell.text.strip() for cell in row.cells]
+                    table_content.append(row_content)
+
+                target_section = current_section if current_section else get_default_section()
+                target_section["content"].append(f"[TABLE_{current_table_index}]")
+                target_section["tables"].append({"id": current_table_index, "content": table_content})
+                current_table_index += 1
+
+        elif child.tag.endswith('}drawing'):
+            blip = child.find('.//a:blip', namespaces={'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'})
+            if blip is not None:
+                rel_id = blip.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
+                if rel_id and rel_id in doc.part.rels:
+                    image_path = doc.part.rels[rel_id].target_ref
+                    target_section = current_section if current_section else get_default_section()
+                    target_section["content"].append(f"![Image]({image_path})")
+                    target_section["images"].append({"id": image_path, "content": image_path})
+
+    return structure
+
+
+
+def measure(label: str, extract, path: str):
+    start = time.perf_counter()
+    structure = extract(path)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<10} {elapsed:8.2f}s  {len(structure['sections'])} sections")
+    return structure
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,4000,20000")
+    parser.add_argument("--max-previous", type=int, default=4000)
+    args = parser.parse_args()
+
+    strategy = StructuredDocumentStrategy()
+    with tempfile.TemporaryDirectory() as tmp:
+        image_path = os.path.join(tmp, "image.png")
+        write_png(image_path)
+        for size in (int(size) for size in args.sizes.split(",")):
+            path = os.path.join(tmp, f"document_{size}.docx")
+            write_docx(path, size, image_path)
+            print(f"{size} paragraphs, {os.path.getsize(path) / 1e6:.1f} MB")
+            current = measure("current", strategy._extract_docx_structure, path)
+            if size <= args.max_previous:
+                previous = measure("previous", previous_extract_docx_structure, path)
+                assert previous == current, "structures differ"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Offline throughput benchmark for OllamaEmbedding.
+
+Starts tests/ollama_stub_server.py in-process and embeds the same chunks through the
+per-prompt /api/embeddings path (older servers) and through batched, concurrent
+/api/embed requests, reporting chunks per second.
+
+    python tests/benchmark_ollama_embedding.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from rag_app.core.implementations.embedding_model.ollama_embedding import OllamaEmbedding
+from ollama_stub_server import start_stub_server
+
+N_CHUNKS = 512
+LATENCY = 0.02  # Per request, roughly an HTTP round trip plus model dispatch
+PER_INPUT_LATENCY = 0.002
+CONFIGURATIONS = [
+    # (label, legacy server, batch size, concurrency)
+    ("per-prompt /api/embeddings", True, 32, 1),
+    ("/api/embed, batch 32", False, 32, 1),
+    ("/api/embed, batch 32 x 4", False, 32, 4),
+    ("/api/embed, batch 64 x 4", False, 64, 4),
+]
+
+
+def run(label: str, legacy: bool, batch_size: int, concurrency: int, chunks: list) -> None:
+    server = start_stub_server(latency=LATENCY, per_input_latency=PER_INPUT_LATENCY, legacy=legacy)
+    try:
+        model = OllamaEmbedding("stub", ollama_host="127.0.0.1", ollama_port=server.server_address[1],
+                                batch_size=batch_size, max_concurrency=concurrency)
+        start = time.perf_counter()
+        embeddings = model.generate_embedding(chunks)
+        elapsed = time.perf_counter() - start
+        assert len(embeddings) == len(chunks)
+        print(f"{label:<30} {elapsed:>8.2f}s {len(chunks) / elapsed:>10.1f} {server.requests_served:>9}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    chunks = [f"Chunk {i}: " + "lorem ipsum dolor sit amet " * 20 for i in range(N_CHUNKS)]
+    print(f"{'configuration':<30} {'time':>9} {'chunks/s':>10} {'requests':>9}")
+    for label, legacy, batch_size, concurrency in CONFIGURATIONS:
+        run(label, legacy, batch_size, concurrency, chunks)
+
+
+if __name__ == "__main__":
+    main()
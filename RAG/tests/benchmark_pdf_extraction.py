@@ -0,0 +1,120 @@
+"""
+PDF extraction benchmark on a generated 500-page manual.
+
+Every page holds about 3 KB of text and two embedded 256x256 images. Compares the
+previous per-page extraction (PyPDF2 text, as FileStorage and FixedSizeChunkStrategy did,
+and pypdf text plus page.images, as StructuredDocumentStrategy did) with extract_pdf run
+in-process and on a process pool.
+
+    python tests/benchmark_pdf_extraction.py [pages] [workers]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.utils.pdf_extraction import extract_pdf
+
+WORDS = ("pump valve pressure sensor calibration procedure maintenance interval filter "
+         "warning operator manual section replace inspect torque bolt housing seal").split()
+
+
+def write_manual(path: str, pages: int, images_per_page: int = 2, seed: int = 7) -> None:
+    """Write a PDF without third-party writers: Helvetica text lines and Flate RGB images."""
+    rng = random.Random(seed)
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    def stream(header: str, data: bytes) -> bytes:
+        return f"<< {header} /Length {len(data)} >>\nstream\n".encode() + data + b"\nendstream"
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = len(objects) + 1
+    add(b"")  # Pages, filled in below
+    page_ids = []
+    for page_number in range(pages):
+        image_ids = []
+        for _ in range(images_per_page):
+            pixels = bytes(rng.getrandbits(8) for _ in range(256 * 3)) * 256
+            image_ids.append(add(stream("/Type /XObject /Subtype /Image /Width 256 /Height 256 "
+                                        "/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode",
+                                        zlib.compress(pixels))))
+        lines = [f"{page_number + 1}. Section {page_number + 1}"]
+        lines += [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(40)]
+        content = "BT /F1 9 Tf 40 800 Td 11 TL " + " ".join(f"({line}) Tj T*" for line in lines) + " ET"
+        content += "".join(f" q 100 0 0 100 {50 + 120 * i} 50 cm /Im{i} Do Q" for i in range(images_per_page))
+        content_id = add(stream("", content.encode()))
+        xobjects = " ".join(f"/Im{i} {image_id} 0 R" for i, image_id in enumerate(image_ids))
+        page_ids.append(add(f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 595 842] "
+                            f"/Resources << /Font << /F1 {font} 0 R >> /XObject << {xobjects} >> >> "
+                            f"/Contents {content_id} 0 R >>".encode()))
+    objects[pages_id - 1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {pages} >>".encode()
+    catalog = add(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode())
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.7\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+        f.write("".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode())
+        f.write(f"trailer\n<< /Size {len(objects) + 1} /Root {catalog} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+def previous_text(path: str) -> str:
+    from PyPDF2 import PdfReader
+    with open(path, 'rb') as f:
+        return '\n'.join(page.extract_text() or '' for page in PdfReader(f).pages)
+
+
+def previous_structured(path: str) -> int:
+    from pypdf import PdfReader
+    images = 0
+    for page in PdfReader(path).pages:
+        page.extract_text()
+        images += len([image for image in page.images])  # Decodes every image
+    return images
+
+
+def measure(label: str, function, *args) -> None:
+    start = time.perf_counter()
+    try:
+        result = function(*args)
+    except Exception as e:
+        print(f"{label:<44} failed: {e.__class__.__name__}: {e}")
+        return
+    print(f"{label:<44} {time.perf_counter() - start:7.2f}s  {result}")
+
+
+def main() -> None:
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else max(os.cpu_count() or 1, 2)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "manual.pdf")
+        write_manual(path, pages)
+        print(f"{pages} pages, {os.path.getsize(path) / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+
+        measure("previous: PyPDF2 text", lambda: f"{len(previous_text(path))} chars")
+        measure("previous: pypdf text + page.images", lambda: f"{previous_structured(path)} images")
+        measure("extract_pdf, in-process", lambda: summary(extract_pdf(path, max_workers=1)))
+        # The first parallel run pays for starting the pool, which is then reused
+        measure(f"extract_pdf, {workers} processes (pool start)", lambda: summary(extract_pdf(path, max_workers=workers)))
+        measure(f"extract_pdf, {workers} processes", lambda: summary(extract_pdf(path, max_workers=workers)))
+
+
+def summary(extraction) -> str:
+    return f"{len(extraction.text)} chars, {sum(len(page.images) for page in extraction.pages)} images"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark of the /ask repetition check.
+
+Compares re-running has_consecutive_repetition on the whole response after every
+streamed chunk (the previous behaviour) with feeding each chunk to RepetitionDetector.
+
+    python tests/benchmark_repetition.py
+"""
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.utils.repetition import RepetitionDetector, has_consecutive_repetition
+
+SIZES = [2000, 5000, 10000, 20000]
+CHUNK_SIZE = 4  # Roughly one LLM token
+SAMPLES = 8  # Prefix lengths timed for the full-text check
+
+
+def generate_response(n_chars: int, seed: int = 42) -> str:
+    """Generate prose-like text without consecutive repetitions."""
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < n_chars:
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 9)))
+        words.append(word + (". " if rng.random() < 0.08 else " "))
+        length += len(words[-1])
+    return "".join(words)[:n_chars]
+
+
+def time_detector(text: str) -> float:
+    detector = RepetitionDetector()
+    start = time.perf_counter()
+    for i in range(0, len(text), CHUNK_SIZE):
+        detector.feed(text[i:i + CHUNK_SIZE])
+    return time.perf_counter() - start
+
+
+def estimate_full_check(text: str) -> float:
+    """
+    Estimate the cost of calling has_consecutive_repetition after every chunk.
+
+    Calling it thousands of times on 20k characters takes far too long, so the per-call
+    cost is measured at a few prefix lengths and integrated over all chunk positions.
+    """
+    n_chunks = (len(text) + CHUNK_SIZE - 1) // CHUNK_SIZE
+    points = []
+    for s in range(1, SAMPLES + 1):
+        chunk_index = n_chunks * s // SAMPLES
+        prefix = text[:chunk_index * CHUNK_SIZE]
+        start = time.perf_counter()
+        has_consecutive_repetition(prefix)
+        points.append((chunk_index, time.perf_counter() - start))
+
+    total = 0.0
+    previous_index, previous_cost = 0, 0.0
+    for chunk_index, cost in points:
+        total += (chunk_index - previous_index) * (previous_cost + cost) / 2
+        previous_index, previous_cost = chunk_index, cost
+    return total
+
+
+def main():
+    print(f"{'chars':>8} {'chunks':>8} {'full check (est.)':>18} {'detector':>10} {'speed-up':>9}")
+    for size in SIZES:
+        text = generate_response(size)
+        detector_time = time_detector(text)
+        full_time = estimate_full_check(text)
+        assert RepetitionDetector().feed(text) == has_consecutive_repetition(text)
+        n_chunks = (len(text) + CHUNK_SIZE - 1) // CHUNK_SIZE
+        print(f"{size:>8} {n_chunks:>8} {full_time:>17.2f}s {detector_time:>9.3f}s {full_time / detector_time:>8.0f}x")
+
+    # A degenerate answer that starts looping half way through
+    looping = generate_response(1000) + generate_response(200, seed=7) * 10
+    detector = RepetitionDetector()
+    for i in range(0, len(looping), CHUNK_SIZE):
+        if detector.feed(looping[i:i + CHUNK_SIZE]):
+            print(f"\nLoop detected after {len(detector)} of {len(looping)} characters")
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Semantic chunking benchmark on generated documents.
+
+Builds documents of short sentences drawn from a handful of topics and chunks them with
+SemanticChunkStrategy, using a local embedding model (hashed bag of words, 384
+dimensions) so only the chunker is measured. Compares against the previous chunker,
+which embedded one sentence per call, logged every step at WARNING and re-scanned the
+similarities of every range it split recursively, and checks both produce the same chunks.
+The previous chunker is quadratic in the worst case and recurses once per split, so it
+is skipped above --max-previous sentences.
+
+    python tests/benchmark_semantic_chunking.py [--sizes 1000,4000,10000] [--max-previous 4000]
+"""
+import argparse
+import hashlib
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.rag_app.core.interfaces.document_interface import Chunk
+from src.rag_app.core.interfaces.embedding_model_interface import EmbeddingModelInterface
+from src.rag_app.core.implementations.chunk_strategy.semantic_strategy import SemanticChunkStrategy
+
+TOPICS = [
+    "pump valve pressure seal gasket flow".split(),
+    "sensor calibration signal drift offset reading".split(),
+    "filter maintenance interval replace inspect clean".split(),
+    "operator warning safety lockout guard procedure".split(),
+    "torque bolt housing flange thread mount".split(),
+]
+
+
+class HashedBagOfWords(EmbeddingModelInterface):
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+        self.calls = 0
+
+    @property
+    def model_name(self) -> str:
+        return "hashed-bag-of-words"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimensions] += 1.0
+        vector[0] += 0.01  # Whitespace-only pieces still get a non-zero vector
+        return vector.tolist()
+
+    def generate_embedding(self, chunks):
+        self.calls += 1
+        if isinstance(chunks, str):
+            chunks = [chunks]
+        embeddings = [self._embed(chunk) for chunk in chunks]
+        return embeddings[0] if len(embeddings) == 1 else embeddings
+
+
+def write_document(sentences: int, seed: int = 11) -> str:
+    rng = random.Random(seed)
+    parts = []
+    topic = rng.choice(TOPICS)
+    for i in range(sentences):
+        if rng.random() < 0.15:
+            topic = rng.choice(TOPICS)
+        words = [rng.choice(topic) for _ in range(rng.randint(5, 14))]
+        parts.append(" ".join(words).capitalize() + rng.choice(".!?"))
+    return " ".join(parts)
+
+
+def previous_chunk_text(strategy: SemanticChunkStrategy, content: str, document_id: str) -> List[Chunk]:
+    """The sentence embedding and splitting of the previous chunker, kept as the reference output."""
+    # Sentences are shorter than max_chunk_size, so the long-sentence handling is skipped
+    sentences = [s for s in re.split(r'(?<=[.!?])(\s+)', content.strip()) if s]
+    logger = logging.getLogger("previous_semantic_chunker")
+
+    embeddings = [strategy.embedding_model.generate_embedding(sentence) for sentence in sentences]
+    similarities = [
+        strategy.embedding_model.calculate_cosine_similarity(embeddings[i], embeddings[i - 1])
+        for i in range(1, len(embeddings))
+    ]
+    current_chunk_seq = [0]
+
+    def recursive_split(start_idx, end_idx):
+        logger.warning(f"Start index: {start_idx}, End index:{end_idx} ")
+        if start_idx < end_idx:
+            logger.warning(f"Similarities: {similarities[start_idx:end_idx]}")
+            logger.warning(f"Similarities max: {max(similarities[start_idx:end_idx])}")
+        chunk_content = ' '.join(sentences[start_idx:end_idx + 1])
+        logger.warning(f"Chunk content: {chunk_content} ")
+        if len(chunk_content) <= strategy.max_chunk_size or start_idx == end_idx:
+            chunk_seq = current_chunk_seq[0]
+            current_chunk_seq[0] += 1
+            return [Chunk(document_id=document_id, chunk_id=f"{document_id}_{chunk_seq}", content=chunk_content,
+                          metadata={"start_sentence": start_idx, "end_sentence": end_idx,
+                                    "forced_split": len(chunk_content) > strategy.max_chunk_size})]
+        max_similarity_idx = start_idx + similarities[start_idx:end_idx].index(max(similarities[start_idx:end_idx]))
+        return recursive_split(start_idx, max_similarity_idx) + recursive_split(max_similarity_idx + 1, end_idx)
+
+    return recursive_split(0, len(sentences) - 1)
+
+
+def as_tuples(chunks: List[Chunk]):
+    return [(chunk.chunk_id, chunk.content, chunk.metadata) for chunk in chunks]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,4000,10000")
+    parser.add_argument("--max-previous", type=int, default=4000)
+    parser.add_argument("--max-chunk-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    # The previous chunker's WARNING logs are dropped rather than written, which flatters it
+    logging.basicConfig(level=logging.ERROR)
+    sys.setrecursionlimit(100000)
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        content = write_document(size)
+        # Whitespace between sentences is kept as pieces of its own, doubling the count
+        print(f"{size} sentences ({len(content) / 1e3:.0f} KB)")
+
+        model = HashedBagOfWords()
+        strategy = SemanticChunkStrategy(model, max_chunk_size=args.max_chunk_size)
+        start = time.perf_counter()
+        chunks = strategy.chunk_text(content, "doc", "doc.txt")
+        print(f"  current:  {time.perf_counter() - start:7.2f}s  {len(chunks)} chunks, {model.calls} embedding call(s)")
+
+        if size > args.max_previous:
+            print("  previous: skipped")
+            continue
+        model = HashedBagOfWords()
+        strategy = SemanticChunkStrategy(model, max_chunk_size=args.max_chunk_size)
+        start = time.perf_counter()
+        previous = previous_chunk_text(strategy, content, "doc")
+        print(f"  previous: {time.perf_counter() - start:7.2f}s  {len(previous)} chunks, {model.calls} embedding call(s)")
+        assert as_tuples(chunks) == as_tuples(previous), "chunks differ from the previous chunker"
+        print("  identical chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+# Modules import both rag_app.* and src.rag_app.*
+sys.path[:0] = [str(ROOT / "src"), str(ROOT)]
+
+# Placeholders for the settings private_config reads from .env, so modules using it can be imported
+for name, value in {
+    "APP_NAME": "rag-tests",
+    "APP_VERSION": "0",
+    "COHERE_API_KEY": "-",
+    "BACKEND_PORT": "8000",
+    "FRONTEND_URL": "http://localhost:8000",
+    "OCI_COMPARTMENT_ID": "-",
+    "OCI_GENAI_ENDPOINT": "-",
+    "OCI_CONFIG_PROFILE": "-",
+    "OCI_CONFIG_PATH": "-",
+    "OCI_CHAT_DEFAULT_MODEL": "-",
+    "OCI_EMBEDDINGS_DEFAULT_MODEL": "-",
+    "OLLAMA_HOST": "localhost",
+}.items():
+    os.environ.setdefault(name, value)
+os.environ.setdefault("DATA_FOLDER", tempfile.mkdtemp(prefix="rag-tests-data-"))
@@ -0,0 +1,107 @@
+"""
+Minimal stand-in for an Ollama server, used to benchmark OllamaEmbedding offline.
+
+Implements /api/embed (batched) and /api/embeddings (one prompt per request) with
+deterministic fake vectors and a configurable per-request and per-input latency.
+
+    python tests/ollama_stub_server.py --port 11435 --latency 0.02
+    python tests/ollama_stub_server.py --legacy   # /api/embed answers 404, like Ollama < 0.3
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def fake_embedding(text: str, dimension: int, normalize: bool = True) -> list:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimension)
+    # Like Ollama, /api/embed returns unit vectors and /api/embeddings the raw ones
+    return (vector / np.linalg.norm(vector) if normalize else vector).tolist()
+
+
+class StubOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, dimension: int = 1024, latency: float = 0.02,
+                 per_input_latency: float = 0.002, legacy: bool = False):
+        super().__init__(address, StubOllamaHandler)
+        self.dimension = dimension
+        self.latency = latency
+        self.per_input_latency = per_input_latency
+        self.legacy = legacy
+        self.requests_served = 0
+        self._counter_lock = threading.Lock()
+
+    def count_request(self) -> None:
+        with self._counter_lock:
+            self.requests_served += 1
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real server
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        server: StubOllamaServer = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        server.count_request()
+
+        if self.path == "/api/embed" and not server.legacy:
+            inputs = payload.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            time.sleep(server.latency + server.per_input_latency * len(inputs))
+            body = {"model": payload.get("model"),
+                    "embeddings": [fake_embedding(text, server.dimension) for text in inputs]}
+            self._reply(200, json.dumps(body).encode("utf-8"), "application/json")
+        elif self.path == "/api/embeddings":
+            time.sleep(server.latency + server.per_input_latency)
+            body = {"embedding": fake_embedding(payload.get("prompt", ""), server.dimension, normalize=False)}
+            self._reply(200, json.dumps(body).encode("utf-8"), "application/json")
+        else:
+            self._reply(404, b"404 page not found", "text/plain")
+
+    def _reply(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port: int = 0, **kwargs) -> StubOllamaServer:
+    """Start the stub in a daemon thread; port 0 picks a free port."""
+    server = StubOllamaServer(("127.0.0.1", port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every request")
+    parser.add_argument("--per-input-latency", type=float, default=0.002, help="Seconds added per embedded input")
+    parser.add_argument("--legacy", action="store_true", help="Only serve the per-prompt /api/embeddings endpoint")
+    args = parser.parse_args()
+
+    server = StubOllamaServer(("127.0.0.1", args.port), dimension=args.dimension, latency=args.latency,
+                              per_input_latency=args.per_input_latency, legacy=args.legacy)
+    print(f"Stub Ollama server listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
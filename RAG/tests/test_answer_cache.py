@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.utils.answer_cache import SemanticAnswerCache
+
+
+def test_similar_question_replays_answer():
+    cache = SemanticAnswerCache(max_entries=2, similarity_threshold=0.95)
+    assert cache.store("How do I reset the pump?", [1.0, 0.0, 0.1], ["Hold ", "reset."], [{"id": "doc_1"}], cache.revision)
+
+    answer = cache.lookup([0.98, 0.02, 0.1])
+    assert answer.question == "How do I reset the pump?"
+    assert answer.text == "Hold reset."
+    assert answer.sources == [{"id": "doc_1"}]
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+
+
+def test_clear_discards_answers_generated_before_it():
+    cache = SemanticAnswerCache()
+    revision = cache.revision
+    cache.store("first", [1.0, 0.0], ["a"], [], revision)
+    cache.clear()
+
+    assert cache.lookup([1.0, 0.0]) is None
+    # Generation started before the index changed
+    assert not cache.store("second", [0.0, 1.0], ["b"], [], revision)
+    assert cache.store("second", [0.0, 1.0], ["b"], [], cache.revision)
+    assert cache.lookup([0.0, 1.0]).text == "b"
@@ -0,0 +1,109 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from chromadb.api.client import SharedSystemClient
+from src.rag_app.core.implementations.vector_store.vector_store import ChromaVectorStore
+
+
+class SpyCollection:
+    """Records the size of every upsert and the order of the writes of a Chroma collection."""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.calls = []
+
+    def upsert(self, **kwargs):
+        self.calls.append(("upsert", len(kwargs["ids"])))
+        return self._collection.upsert(**kwargs)
+
+    def delete(self, **kwargs):
+        self.calls.append(("delete", len(kwargs["ids"])))
+        return self._collection.delete(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+@pytest.fixture
+def make_store(tmp_path, monkeypatch):
+    monkeypatch.setenv("ANONYMIZED_TELEMETRY", "False")
+
+    def make_store(**kwargs):
+        store = ChromaVectorStore("manuals", str(tmp_path / "chroma_db"), **kwargs)
+        store.collection = SpyCollection(store.collection)
+        return store
+    yield make_store
+    SharedSystemClient.clear_system_cache()
+
+
+def rows(start, end):
+    ids = [f"doc_{i}" for i in range(start, end)]
+    embeddings = [[float(i), 1.0, 0.0] for i in range(start, end)]
+    return embeddings, [{"n": i} for i in range(start, end)], ids, [f"chunk {i}" for i in range(start, end)]
+
+
+def test_writes_are_buffered_until_flush(make_store):
+    store = make_store(write_buffer_size=10)
+    store.store_embeddings(*rows(0, 4))
+
+    assert store.collection.calls == []
+    assert store.collection.count() == 0
+    assert store.count() == 4
+
+    store.flush()
+    assert store.collection.calls == [("upsert", 4)]
+    assert store.collection.count() == 4 and store.count() == 4
+    store.flush()
+    assert store.collection.calls == [("upsert", 4)]
+
+
+def test_buffer_is_flushed_at_write_buffer_size(make_store):
+    store = make_store(write_buffer_size=5)
+    store.store_embeddings(*rows(0, 3))
+    assert store.collection.calls == []
+
+    store.store_embeddings(*rows(3, 6))
+    assert store.collection.calls == [("upsert", 6)]
+    assert store.collection.count() == 6
+
+    store.store_embeddings(*rows(6, 7))
+    assert store.count() == 7
+
+
+def test_upserts_are_split_by_max_batch_size(make_store):
+    store = make_store(write_buffer_size=100)
+    store.max_batch_size = 4
+    store.store_embeddings(*rows(0, 10))
+    store.flush()
+
+    assert store.collection.calls == [("upsert", 4), ("upsert", 4), ("upsert", 2)]
+    assert store.count() == 10
+    assert store.query([9.0, 1.0, 0.0], n_results=1)[0] == {
+        "id": "doc_9", "distance": pytest.approx(0.0, abs=1e-6), "metadata": {"n": 9}, "document": "chunk 9"
+    }
+
+
+def test_pending_writes_are_flushed_before_delete(make_store):
+    store = make_store(write_buffer_size=100)
+    store.max_batch_size = 2
+    store.store_embeddings(*rows(0, 5))
+
+    store.delete(["doc_1", "doc_2", "doc_4"])
+
+    assert store.collection.calls == [("upsert", 2), ("upsert", 2), ("upsert", 1), ("delete", 2), ("delete", 1)]
+    assert store.count() == 2
+    assert sorted(result["id"] for result in store.query([0.0, 1.0, 0.0], n_results=5)) == ["doc_0", "doc_3"]
+
+
+def test_upserts_overwrite_existing_ids(make_store):
+    store = make_store(write_buffer_size=1)
+    store.store_embeddings(*rows(0, 2))
+    store.store_embeddings([[0.0, 1.0, 0.0]], [{"n": 10}], ["doc_0"], ["chunk 0 v2"])
+
+    assert store.count() == 2
+    result = store.query([0.0, 1.0, 0.0], n_results=1)[0]
+    assert result["id"] == "doc_0" and result["document"] == "chunk 0 v2" and result["metadata"] == {"n": 10}
@@ -0,0 +1,91 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.implementations.chunk_store.chunk_store import ChunkStore
+from rag_app.core.implementations.query_engine.query_engine import QueryEngine
+
+
+def chunk(chunk_id, content="", breadcrumb="Manual", heading=""):
+    return {"chunk_id": chunk_id, "content": content,
+            "metadata": {"document_id": "doc", "breadcrumb": breadcrumb, "heading": heading}}
+
+
+def section_ids(store, chunk_id):
+    section = store.get_section(chunk_id)
+    return [part["chunk_id"] for part in section] if section is not None else None
+
+
+def test_sections_group_consecutive_parts_by_breadcrumb_and_heading():
+    store = ChunkStore()
+    store.add_chunks("manuals", "doc", [
+        chunk("doc_0", breadcrumb="Manual > Pumps (part 1/3)", heading="Pumps"),
+        chunk("doc_1", breadcrumb="Manual > Pumps (part 2/3)", heading="Pumps"),
+        chunk("doc_2", breadcrumb="Manual > Pumps (part 3/3)", heading="Pumps"),
+        # Same breadcrumb under another heading is another section
+        chunk("doc_3", breadcrumb="Manual > Pumps (part 2/2)", heading="Valves"),
+        chunk("doc_4", breadcrumb="Manual > Pumps (part 2/2)", heading="Valves"),
+        # A new part 1 starts a new section even with the same key
+        chunk("doc_5", breadcrumb="Manual > Pumps (part 1/2)", heading="Valves"),
+        chunk("doc_6", breadcrumb="Manual > Pumps (part 2/2)", heading="Valves"),
+        chunk("doc_7", breadcrumb="Manual > Filters", heading="Filters"),
+        chunk("doc_8", breadcrumb="Manual > Filters (part 2/2)", heading="Filters"),
+    ])
+
+    assert len(store) == 9
+    assert section_ids(store, "doc_1") == ["doc_0", "doc_1", "doc_2"]
+    assert section_ids(store, "doc_3") == ["doc_3", "doc_4"]
+    assert section_ids(store, "doc_6") == ["doc_5", "doc_6"]
+    assert section_ids(store, "doc_7") is None
+    # A chunk without part information ends the section before it
+    assert section_ids(store, "doc_8") == ["doc_8"]
+    assert section_ids(store, "unknown") is None
+
+
+def test_reloaded_documents_replace_their_chunks(tmp_path):
+    store = ChunkStore()
+    store.add_chunks("manuals", "doc", [chunk("doc_0", breadcrumb="A (part 1/2)"), chunk("doc_1", breadcrumb="A (part 2/2)")])
+    (tmp_path / "doc.json").write_text(json.dumps([chunk("doc_0", "new")]), encoding="utf-8")
+
+    assert store.load_directory("manuals", str(tmp_path)) == 1
+    assert store.get("doc_0")["content"] == "new"
+    assert "doc_1" not in store and store.get_section("doc_0") is None
+
+
+class FakeChunkStrategy:
+    def __init__(self, overlap):
+        self.overlap = overlap
+
+    def get_parameters(self):
+        return {"overlap": self.overlap}
+
+
+class FakeDomainManager:
+    def __init__(self, chunk_store):
+        self.chunk_store = chunk_store
+
+
+def make_query_engine(overlap):
+    store = ChunkStore()
+    store.add_chunks("manuals", "doc", [chunk("doc_0", "aaaaXYZ"), chunk("doc_1", "XYZbbbbUVW"), chunk("doc_2", "UVWcccc")])
+    return QueryEngine(FakeDomainManager(store), {}, None, None, FakeChunkStrategy(overlap), None, None)
+
+
+def test_adjacent_chunks_are_combined_without_their_overlap():
+    result = make_query_engine(3)._combine_adjacent_chunks(None, "doc_1", distance=0.5)
+
+    assert result["document"] == "aaaa\n\nXYZbbbbUVW\n\ncccc"
+    assert result["id"] == "doc_1" and result["distance"] == 0.5
+    assert result["metadata"] == [{"document_id": "doc", "breadcrumb": "Manual", "heading": ""}]
+
+
+def test_missing_or_zero_overlap_keeps_adjacent_chunks_whole():
+    for overlap in (0, None):
+        query_engine = make_query_engine(overlap)
+        assert query_engine._get_chunk_overlap() == 0
+        assert query_engine._combine_adjacent_chunks(None, "doc_1")["document"] == "aaaaXYZ\n\nXYZbbbbUVW\n\nUVWcccc"
+
+    # The first chunk has no previous chunk to trim
+    assert make_query_engine(3)._combine_adjacent_chunks(None, "doc_0")["document"] == "\n\naaaaXYZ\n\nbbbbUVW"
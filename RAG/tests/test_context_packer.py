@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.utils.context_packer import ContextPacker, TRUNCATION_MARKER
+from rag_app.core.utils.tokens import estimate_tokens, truncate_to_tokens
+
+
+def words(n):
+    return " ".join(f"mot{i}" for i in range(n))
+
+
+def test_estimate_and_truncate():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("un deux, trois") == 5
+    text = words(500)
+    truncated = truncate_to_tokens(text, 100)
+    assert estimate_tokens(truncated) <= 100
+    assert text.startswith(truncated) and not truncated.endswith(" ")
+    assert truncate_to_tokens(text, 10_000) == text
+
+
+def test_results_are_kept_by_rank_within_budget():
+    packer = ContextPacker(token_budget=300, min_part_tokens=20)
+    parts = [("#### Partie 1", words(100)), ("#### Partie 2", words(100)), ("#### Partie 3", words(100)),
+             ("#### Partie 4", words(10))]
+    packed = packer.pack(parts)
+
+    assert [part.status for part in packed] == ["included", "truncated", "omitted", "omitted"]
+    assert packed[1].text.endswith(TRUNCATION_MARKER)
+    assert sum(part.tokens for part in packed) <= 300
+    assert packed[3].report() == {"rank": 4, "status": "omitted", "tokens": 0,
+                                  "original_tokens": estimate_tokens("#### Partie 4") + estimate_tokens(words(10))}
+
+
+def test_top_result_header_is_always_kept():
+    packed = ContextPacker(token_budget=3).pack([("#### Partie 1 (plus pertinente)", words(50)), ("#### Partie 2", "x")])
+
+    assert packed[0].status == "truncated"
+    assert packed[0].header == "#### Partie 1 (plus pertinente)"
+    assert packed[1].status == "omitted"
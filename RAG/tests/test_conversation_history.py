@@ -0,0 +1,75 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.implementations.conversation.conversation import Conversation
+from rag_app.core.utils.conversation_history import SUMMARY_LABEL, ConversationHistoryManager
+
+
+def test_old_turns_are_summarized_off_the_request_path():
+    summarized = []
+
+    async def summarize(summary, messages):
+        summarized.append(messages)
+        return f"{len(messages.splitlines())} earlier messages"
+
+    async def run():
+        manager = ConversationHistoryManager(token_budget=1000, max_turns=2, summarize=summarize)
+        conversation = Conversation(persistent=True)
+        for turn in range(4):
+            conversation.add_message("User", f"question {turn}")
+            conversation.add_message("Assistant", f"answer {turn}")
+
+        # The two latest turns are sent, the older ones are summarized in the background
+        assert manager.format_history(conversation) == "\n".join(conversation.get_formatted_lines()[4:])
+        await asyncio.sleep(0)
+        await asyncio.gather(*manager._tasks)
+
+        assert summarized == ["Utilisateur: question 0\nAssistant: answer 0\nUtilisateur: question 1\nAssistant: answer 1"]
+        assert conversation.summarized_count == 4
+        assert manager.format_history(conversation).splitlines() == [
+            f"{SUMMARY_LABEL}: 4 earlier messages",
+            "Utilisateur: question 2", "Assistant: answer 2", "Utilisateur: question 3", "Assistant: answer 3",
+        ]
+
+    asyncio.run(run())
+
+
+def test_history_fits_token_budget():
+    manager = ConversationHistoryManager(token_budget=30, max_turns=4)
+    conversation = Conversation()
+    conversation.add_message("User", "x" * 200)
+    conversation.add_message("Assistant", "short answer")
+
+    assert manager.format_history(conversation) == "Assistant: short answer"
+    assert conversation.get_formatted_history() == f"Utilisateur: {'x' * 200}\nAssistant: short answer"
+
+
+def test_request_histories_are_budgeted_but_never_summarized():
+    summarized = []
+
+    async def summarize(summary, messages):
+        summarized.append(messages)
+        return "summary"
+
+    async def run():
+        manager = ConversationHistoryManager(token_budget=1000, max_turns=2, summarize=summarize)
+        for _ in range(3):
+            # /ask rebuilds the conversation sent by the front end on every request
+            conversation = Conversation()
+            for turn in range(6):
+                conversation.add_message("User", f"question {turn}")
+                conversation.add_message("Assistant", f"answer {turn}")
+
+            assert manager.format_history(conversation) == conversation.get_formatted_history()
+            await asyncio.sleep(0)
+
+        assert summarized == [] and not manager._tasks
+
+        small = ConversationHistoryManager(token_budget=20, max_turns=2, summarize=summarize)
+        assert small.format_history(conversation).splitlines() == ["Utilisateur: question 5", "Assistant: answer 5"]
+        assert summarized == []
+
+    asyncio.run(run())
@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.implementations.chunk_strategy.fixed_size_strategy import FixedSizeChunkStrategy
+from rag_app.core.implementations.document.document_factory import DocumentFactory
+from rag_app.core.implementations.domain.domain_factory import DomainFactory
+from rag_app.core.implementations.domain_manager.domain_manager import DomainManager
+from rag_app.core.implementations.storage.file_storage import FileStorage
+from rag_app.core.implementations.vector_store.vector_store_factory import VectorStoreFactory
+from rag_app.core.interfaces.embedding_model_interface import EmbeddingModelInterface
+
+
+class LengthEmbedding(EmbeddingModelInterface):
+    model_name = "length"
+
+    def generate_embedding(self, chunks):
+        if isinstance(chunks, str):
+            return [float(len(chunks)), float(sum(map(ord, chunks)) % 97), 1.0]
+        vectors = [[float(len(chunk)), float(sum(map(ord, chunk)) % 97), 1.0] for chunk in chunks]
+        return vectors[0] if len(vectors) == 1 else vectors
+
+
+def make_domain_manager(tmp_path):
+    return DomainManager(
+        FileStorage(str(tmp_path / "data")), FixedSizeChunkStrategy(chunk_size=200, overlap=20), None,
+        DomainFactory(), DocumentFactory("Python"),
+        {"DEFAULT_PROVIDER": "NumpyFlat", "NUMPY_PERSIST_DIRECTORY": str(tmp_path / "numpy_db")},
+        LengthEmbedding(), VectorStoreFactory(), chunks_folder=str(tmp_path / "chunks")
+    )
+
+
+@pytest.fixture
+def data(tmp_path):
+    folder = tmp_path / "data" / "manuals"
+    folder.mkdir(parents=True)
+    for name in ("a.txt", "b.txt"):
+        (folder / name).write_text(f"Manual {name}. " + "The pump resets after three long presses. " * 20)
+    return tmp_path
+
+
+def test_failed_flush_leaves_documents_out_of_the_manifest(data):
+    domain_manager = make_domain_manager(data)
+    store = domain_manager.vector_stores["manuals"]
+    flush = store.flush
+
+    def failing_flush():
+        raise OSError("disk full")
+
+    store.flush = failing_flush
+    with pytest.raises(OSError):
+        domain_manager.apply_chunking_strategy()
+    assert domain_manager.manifests["manuals"].documents == {}
+
+    # The next run ingests them again and records them once their vectors are written
+    store.flush = flush
+    rerun = make_domain_manager(data)
+    stages = []
+    rerun.apply_chunking_strategy(lambda domain, document, stage, **details: stages.append((document, stage)))
+    assert ("a.txt", "stored") in stages and ("b.txt", "stored") in stages
+    assert set(rerun.manifests["manuals"].documents) == {"a.txt", "b.txt"}
+    assert rerun.vector_stores["manuals"].count() == sum(len(entry["chunk_ids"]) for entry in rerun.manifests["manuals"].documents.values())
@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.implementations.embedding_model.cached_embedding import CachedEmbedding
+from rag_app.core.implementations.embedding_model.embedding_cache import EmbeddingCache
+from rag_app.core.interfaces.embedding_model_interface import EmbeddingModelInterface
+
+
+class CountingEmbedding(EmbeddingModelInterface):
+    def __init__(self):
+        self.embedded = []
+
+    @property
+    def model_name(self) -> str:
+        return "counting"
+
+    def generate_embedding(self, chunks):
+        if isinstance(chunks, str):
+            chunks = [chunks]
+        self.embedded.extend(chunks)
+        embeddings = [[float(len(chunk)), float(sum(map(ord, chunk)) % 101), 1.0] for chunk in chunks]
+        return embeddings[0] if len(embeddings) == 1 else embeddings
+
+
+def test_unchanged_corpus_is_not_re_embedded(tmp_path):
+    corpus = [[f"document {d} chunk {i}" for i in range(5)] for d in range(4)]
+
+    first_model = CountingEmbedding()
+    first = CachedEmbedding(first_model, EmbeddingCache(str(tmp_path), "ollama", "counting", 3))
+    expected = [first.generate_embedding(document) for document in corpus]
+    assert len(first_model.embedded) == 20
+
+    second_model = CountingEmbedding()
+    second = CachedEmbedding(second_model, EmbeddingCache(str(tmp_path), "ollama", "counting", 3))
+    assert [second.generate_embedding(document) for document in corpus] == expected
+    assert second_model.embedded == []
+    assert second.cache.stats()["hits"] == 20
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "ollama", "counting", 3, max_entries=3)
+    keys = [EmbeddingCache.key(text) for text in "abcd"]
+    cache.put_many([(key, [1.0, 2.0, 3.0]) for key in keys[:3]])
+    cache.get_many([keys[0]])
+    cache.put_many([(keys[3], [4.0, 5.0, 6.0])])
+
+    assert set(cache.get_many(keys)) == {keys[0], keys[2], keys[3]}
+    assert cache.evictions == 1
+
+    reloaded = EmbeddingCache(str(tmp_path), "ollama", "counting", 3, max_entries=3)
+    assert reloaded.get_many([keys[3]]) == {keys[3]: [4.0, 5.0, 6.0]}
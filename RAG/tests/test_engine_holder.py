@@ -0,0 +1,59 @@
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.utils.engine_holder import EngineGeneration, EngineHolder
+from rag_app.core.utils.index_versions import IndexVersions
+
+
+def test_previous_generation_drains_after_last_release():
+    drained = threading.Event()
+    holder = EngineHolder()
+    old = EngineGeneration("old engine", "old manager", "v1", on_drained=lambda generation: drained.set())
+    holder.swap(old)
+
+    lease = holder.acquire()
+    holder.swap(EngineGeneration("new engine", "new manager", "v2"))
+    assert holder.current.version == "v2"
+    assert lease.query_engine == "old engine"
+    assert not drained.wait(0.1)
+
+    lease.release()
+    lease.release()
+    assert drained.wait(1)
+    assert old.refcount == 0
+
+
+def test_index_versions_keep_only_active(tmp_path):
+    legacy = tmp_path / "chroma_db"
+    legacy.mkdir()
+    (legacy / "chroma.sqlite3").write_text("data")
+    versions = IndexVersions(str(tmp_path / "indexes"))
+    assert versions.active_version is None
+
+    first = versions.create(seed={"chroma_db": str(legacy), "chunks": str(tmp_path / "missing")})
+    assert (Path(versions.path(first)) / "chroma_db" / "chroma.sqlite3").read_text() == "data"
+    versions.activate(first)
+    second = versions.create()
+
+    versions.remove(first)
+    assert versions.active_version == first
+    versions.remove_inactive()
+    assert not Path(versions.path(second)).exists()
+    assert Path(versions.path(first)).exists()
+
+
+def test_replace_only_swaps_the_expected_generation():
+    holder = EngineHolder()
+    first = EngineGeneration("first engine", "manager", "v1")
+    holder.swap(first)
+    second = EngineGeneration("second engine", "manager", "v2")
+    holder.swap(second)
+
+    assert not holder.replace(first, EngineGeneration("rebuilt from first", "manager", "v1"))
+    assert holder.current is second and not second.retired
+    rebuilt = EngineGeneration("rebuilt from second", "manager", "v2")
+    assert holder.replace(second, rebuilt)
+    assert holder.current is rebuilt and second.retired
@@ -0,0 +1,115 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.initialization import initialize_rag_components
+from rag_app.core.utils.ingestion_jobs import (
+    CANCELLED, COMPLETED, FAILED, IngestionJobManager, IngestionJobRunning
+)
+
+
+def wait_finished(job, timeout=2):
+    deadline = time.time() + timeout
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.finished
+
+
+def fake_ingest(documents, started=None, proceed=None):
+    """Ingests the documents of one domain, reporting each like DomainManager does."""
+    def ingest(job):
+        job.set_stage("ingesting")
+        for document in documents:
+            job.report("manuals", document, "chunked", chunks=3)
+            if started is not None:
+                started.set()
+                proceed.wait(2)
+            job.report("manuals", document, "embedded")
+        return {"domains": ["manuals"]}
+    return ingest
+
+
+def test_progress_is_recorded_as_events_and_documents():
+    job = IngestionJobManager().submit("setup_rag", fake_ingest(["a.pdf", "b.pdf"]))
+    wait_finished(job)
+
+    assert job.status == COMPLETED and job.result == {"domains": ["manuals"]}
+    events = job.events_since(0)
+    assert [event["seq"] for event in events] == list(range(len(events)))
+    assert [(event["type"], event.get("document"), event["stage"] if "stage" in event else event["status"]) for event in events] == [
+        ("status", None, None),
+        ("status", None, "ingesting"),
+        ("progress", "a.pdf", "chunked"),
+        ("progress", "a.pdf", "embedded"),
+        ("progress", "b.pdf", "chunked"),
+        ("progress", "b.pdf", "embedded"),
+        ("done", None, COMPLETED),
+    ]
+    assert job.events_since(events[-2]["seq"]) == events[-2:]
+    assert job.events_since(events[-1]["seq"] + 1) == []
+
+    data = job.to_dict()
+    assert data["documents_by_stage"] == {"embedded": 2}
+    assert data["documents"][0] == {"domain": "manuals", "document": "a.pdf", "chunks": 3,
+                                     "stage": "embedded", "updated_at": data["documents"][0]["updated_at"]}
+    assert "documents" not in job.to_dict(include_documents=False)
+
+
+def test_cancel_stops_the_job_at_its_next_report():
+    started, proceed = threading.Event(), threading.Event()
+    job = IngestionJobManager().submit("setup_rag", fake_ingest(["a.pdf", "b.pdf"], started, proceed))
+    assert started.wait(2)
+
+    job.cancel()
+    assert job.cancel_requested and not job.finished
+    proceed.set()
+    wait_finished(job)
+
+    assert job.status == CANCELLED and job.result is None
+    assert list(job.documents) == ["manuals/a.pdf"]
+    assert job.events_since(0)[-1]["status"] == CANCELLED
+
+
+def test_only_one_job_runs_at_a_time():
+    manager = IngestionJobManager()
+    started, proceed = threading.Event(), threading.Event()
+    first = manager.submit("setup_rag", fake_ingest(["a.pdf"], started, proceed))
+    assert started.wait(2)
+
+    assert manager.active_job is first
+    with pytest.raises(IngestionJobRunning):
+        manager.submit("setup_rag", fake_ingest(["b.pdf"]))
+
+    proceed.set()
+    wait_finished(first)
+    assert manager.active_job is None
+    second = manager.submit("setup_rag", fake_ingest(["b.pdf"]))
+    wait_finished(second)
+    assert [job.id for job in manager.list()] == [first.id, second.id]
+
+
+def test_configuration_errors_exiting_the_worker_fail_the_job():
+    # initialize_rag_components calls sys.exit on an unsupported chat model
+    config = {"chat_model": {"MODEL_ID": "unknown-model"}}
+    manager = IngestionJobManager()
+    job = manager.submit("setup_rag", lambda job: initialize_rag_components(config))
+    wait_finished(job)
+
+    assert job.status == FAILED and job.error == "1"
+    assert manager.active_job is None
+
+
+def test_finished_jobs_are_forgotten_oldest_first():
+    manager = IngestionJobManager(max_jobs=2)
+    jobs = []
+    for _ in range(3):
+        jobs.append(manager.submit("setup_rag", fake_ingest([])))
+        wait_finished(jobs[-1])
+
+    assert manager.get(jobs[0].id) is None
+    assert [job.id for job in manager.list()] == [jobs[1].id, jobs[2].id]
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.implementations.domain_manager.ingestion_manifest import IngestionManifest
+
+FINGERPRINT = {"chunk_strategy": "fixed", "chunk_parameters": {"chunk_size": 500, "overlap": 50},
+               "embedding_model": "mxbai-embed-large", "vector_store": "Chroma"}
+STAT = {"path": "/data/manuals/a.pdf", "size": 100, "mtime": 1}
+
+
+def test_only_changed_content_is_reported(tmp_path):
+    manifest = IngestionManifest(str(tmp_path / "manuals.manifest.json"), FINGERPRINT)
+    assert not manifest.is_compatible
+    manifest.record("a.pdf", "manuals_1", STAT, "hash-a", ["manuals_1_chunk_0"])
+    manifest.save()
+
+    reloaded = IngestionManifest(str(tmp_path / "manuals.manifest.json"), FINGERPRINT)
+    assert reloaded.is_compatible
+    assert reloaded.is_unchanged("a.pdf", STAT, lambda: None)
+    # Touched but identical content
+    assert reloaded.is_unchanged("a.pdf", dict(STAT, mtime=2), lambda: "hash-a")
+    assert reloaded.get("a.pdf")["mtime"] == 2
+    assert not reloaded.is_unchanged("a.pdf", dict(STAT, size=120, mtime=3), lambda: "hash-b")
+    assert not reloaded.is_unchanged("b.pdf", STAT, lambda: "hash-a")
+
+
+def test_fingerprint_change_invalidates_entries(tmp_path):
+    manifest = IngestionManifest(str(tmp_path / "manuals.manifest.json"), FINGERPRINT)
+    manifest.record("a.pdf", "manuals_1", STAT, "hash-a", ["manuals_1_chunk_0"])
+    manifest.save()
+
+    changed = dict(FINGERPRINT, chunk_parameters={"chunk_size": 800, "overlap": 50})
+    reloaded = IngestionManifest(str(tmp_path / "manuals.manifest.json"), changed)
+    assert not reloaded.is_compatible
+    assert reloaded.previous_fingerprint == FINGERPRINT
+    reloaded.reset()
+    assert reloaded.is_compatible and reloaded.documents == {}
@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.implementations.embedding_model.cached_embedding import CachedEmbedding
+from rag_app.core.implementations.embedding_model.embedding_cache import EmbeddingCache
+from rag_app.initialization import INDEX_CONFIG_KEYS, get_changed_index_config, initialize_query_engine
+
+
+CONFIG = {
+    "DATA_FOLDER": "/data",
+    "chunking": {"STRATEGY": "fixed", "CHUNK_SIZE": 500},
+    "embedding_model": {"MODEL_ID": "cohere.embed-multilingual-v3.0"},
+    "vector_store": {"DEFAULT_PROVIDER": "Chroma"},
+    "document": {"PDF_ENGINE": "pypdf"},
+    "chat_model": {"MODEL_ID": "cohere.command-r-plus"},
+    "query_engine": {"N_RESULTS": 10},
+}
+
+
+def test_serving_settings_do_not_change_the_index():
+    new_config = {**CONFIG, "chat_model": {"MODEL_ID": "meta.llama-3-70b"}, "query_engine": {"N_RESULTS": 5}}
+
+    assert get_changed_index_config(CONFIG, new_config) == []
+
+
+def test_changed_index_sections_are_reported_in_order():
+    new_config = {**CONFIG, "vector_store": {"DEFAULT_PROVIDER": "NumpyFlat"}, "chunking": {"STRATEGY": "fixed", "CHUNK_SIZE": 800}}
+
+    assert get_changed_index_config(CONFIG, new_config) == ["chunking", "vector_store"]
+
+
+def test_missing_sections_count_as_changed():
+    assert get_changed_index_config({}, CONFIG) == list(INDEX_CONFIG_KEYS)
+    assert get_changed_index_config({key: value for key, value in CONFIG.items() if key != "document"}, CONFIG) == ["document"]
+
+
+class CountingEmbedding:
+    model_name = "counting"
+
+    def __init__(self):
+        self.embedded = []
+
+    def generate_embedding(self, chunks):
+        chunks = [chunks] if isinstance(chunks, str) else chunks
+        self.embedded.extend(chunks)
+        embeddings = [[float(len(chunk)), 1.0, 0.0] for chunk in chunks]
+        return embeddings[0] if len(embeddings) == 1 else embeddings
+
+
+class FakeDomainManager:
+    def __init__(self, embedding_model):
+        self.embedding_model = embedding_model
+        self.vector_stores = {}
+        self.chunk_strategy = None
+
+
+def test_questions_bypass_the_corpus_embedding_cache(tmp_path):
+    provider = CountingEmbedding()
+    corpus_cache = EmbeddingCache(str(tmp_path), "ollama", "counting", 3)
+    config = {"query_engine": {"USE_QUERY_OPTIMIZER": False, "USE_RESULT_RE_RANKER": False}}
+    query_engine = initialize_query_engine(config, FakeDomainManager(CachedEmbedding(provider, corpus_cache)), None)
+    try:
+        query_engine.embedding_model.generate_embedding("Where is the filter?")
+        query_engine.embedding_model.generate_embedding("where is the  filter?")
+
+        assert provider.embedded == ["Where is the filter?"]
+        assert len(corpus_cache) == 0
+    finally:
+        query_engine.close()
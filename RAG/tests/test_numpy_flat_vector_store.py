@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.implementations.vector_store.numpy_flat import NumpyFlatVectorStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = NumpyFlatVectorStore("manuals", str(tmp_path))
+    store.store_embeddings([[1, 0, 0], [0, 1, 0], [0, 0, 1]], [{"n": 1}, {"n": 2}, {"n": 3}],
+                           ["a", "b", "c"], ["alpha", "beta", "gamma"])
+    return store
+
+
+def test_query_returns_nearest_first(store):
+    results = store.query([0.9, 0.1, 0], n_results=2)
+
+    assert [result["id"] for result in results] == ["a", "b"]
+    assert results[0]["document"] == "alpha" and results[0]["metadata"] == {"n": 1}
+    assert results[0]["distance"] < results[1]["distance"]
+    assert store.query([1, 0, 0], n_results=10)[-1]["distance"] == pytest.approx(2.0)
+
+
+def test_queries_do_not_write_to_disk(store):
+    store.query([1, 0, 0])
+
+    assert not Path(store.embeddings_path).exists()
+    store.flush()
+    assert Path(store.embeddings_path).exists()
+
+
+def test_persisted_index_is_reloaded(store, tmp_path):
+    store.flush()
+    reloaded = NumpyFlatVectorStore("manuals", str(tmp_path))
+
+    assert reloaded.count() == 3
+    assert reloaded.query([0, 0, 1], n_results=1)[0]["id"] == "c"
+
+
+def test_existing_ids_are_overwritten(store, tmp_path):
+    store.flush()
+    store.store_embeddings([[0, 0, 1], [1, 1, 0]], [{"n": 10}, {"n": 4}], ["a", "d"], ["alpha 2", "delta"])
+    store.flush()
+    reloaded = NumpyFlatVectorStore("manuals", str(tmp_path))
+
+    assert reloaded.count() == 4
+    top = reloaded.query([0, 0, 1], n_results=2)
+    assert {result["id"] for result in top} == {"a", "c"}
+    assert next(result for result in top if result["id"] == "a")["document"] == "alpha 2"
+
+
+def test_duplicate_ids_in_one_call_keep_the_last(tmp_path):
+    store = NumpyFlatVectorStore("manuals", str(tmp_path))
+    store.store_embeddings([[1, 0], [0, 1]], [{}, {"last": True}], ["a", "a"], ["x", "y"])
+
+    assert store.count() == 1
+    result = store.query([0, 1], n_results=5)
+    assert len(result) == 1 and result[0]["document"] == "y" and result[0]["metadata"] == {"last": True}
+    assert result[0]["distance"] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_delete(store, tmp_path):
+    store.flush()
+    store.delete(["b", "unknown"])
+    store.flush()
+    reloaded = NumpyFlatVectorStore("manuals", str(tmp_path))
+
+    assert reloaded.count() == 2
+    assert "b" not in {result["id"] for result in reloaded.query([0, 1, 0], n_results=5)}
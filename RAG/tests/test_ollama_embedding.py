@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from ollama_stub_server import start_stub_server
+from rag_app.core.implementations.embedding_model.ollama_embedding import OllamaEmbedding
+
+
+@pytest.fixture
+def embed():
+    servers = []
+
+    def embed(texts, legacy):
+        server = start_stub_server(dimension=16, latency=0, per_input_latency=0, legacy=legacy)
+        servers.append(server)
+        model = OllamaEmbedding("stub", "127.0.0.1", server.server_address[1], batch_size=2, keep_alive=None)
+        return model.generate_embedding(texts)
+    yield embed
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_legacy_endpoint_gives_the_same_unit_vectors(embed):
+    texts = ["pump", "valve", "filter"]
+    batched = np.array(embed(texts, legacy=False))
+    legacy = np.array(embed(texts, legacy=True))
+
+    assert legacy == pytest.approx(batched)
+    assert np.linalg.norm(legacy, axis=1) == pytest.approx(np.ones(3))
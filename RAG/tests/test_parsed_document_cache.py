@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.utils.parsed_document_cache import ParsedDocumentCache
+
+
+def test_parse_once_per_content_across_instances(tmp_path):
+    document = tmp_path / "manual.txt"
+    document.write_text("first version")
+    calls = []
+
+    def parse(path):
+        calls.append(path)
+        return {"text": Path(path).read_text(), "sections": [{"title": "a", "content": []}]}
+
+    cache = ParsedDocumentCache(str(tmp_path / "cache"))
+    first = cache.get_or_parse(str(document), "structure", parse)
+    first["sections"].append("modified by the caller")
+    assert cache.get_or_parse(str(document), "structure", parse)["sections"] == [{"title": "a", "content": []}]
+
+    # A new process, or a new strategy, reads the entry from disk
+    reloaded = ParsedDocumentCache(str(tmp_path / "cache"))
+    assert reloaded.get_or_parse(str(document), "structure", parse)["text"] == "first version"
+    assert len(calls) == 1
+
+    # Same content under another name is a hit, other content or another kind a miss
+    copy = tmp_path / "copy.txt"
+    copy.write_text("first version")
+    reloaded.get_or_parse(str(copy), "structure", parse)
+    reloaded.get_or_parse(str(copy), "text", parse)
+    document.write_text("second version")
+    assert reloaded.get_or_parse(str(document), "structure", parse)["text"] == "second version"
+    assert len(calls) == 3
+
+
+def test_failed_parse_is_not_cached(tmp_path):
+    document = tmp_path / "broken.pdf"
+    document.write_bytes(b"not a pdf")
+    cache = ParsedDocumentCache(None)
+
+    def fail(path):
+        raise ValueError("cannot parse")
+
+    with pytest.raises(ValueError):
+        cache.get_or_parse(str(document), "pdf_text", fail)
+    assert cache.get_or_parse(str(document), "pdf_text", lambda path: "parsed") == "parsed"
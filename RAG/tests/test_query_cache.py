@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.implementations.embedding_model.query_embedding_cache import QueryCachedEmbedding
+from rag_app.core.interfaces.embedding_model_interface import EmbeddingModelInterface
+from rag_app.core.utils import lru_cache
+from rag_app.core.utils.lru_cache import LRUCache
+
+
+class CountingEmbedding(EmbeddingModelInterface):
+    def __init__(self):
+        self.embedded = []
+
+    @property
+    def model_name(self) -> str:
+        return "counting"
+
+    def generate_embedding(self, chunks):
+        if isinstance(chunks, str):
+            chunks = [chunks]
+        self.embedded.extend(chunks)
+        embeddings = [[float(len(chunk)), 1.0] for chunk in chunks]
+        return embeddings[0] if len(embeddings) == 1 else embeddings
+
+
+def test_repeated_question_is_not_re_embedded():
+    model = CountingEmbedding()
+    cached = QueryCachedEmbedding(model, LRUCache(max_entries=8))
+
+    first = cached.generate_embedding("How do I reset the pump?")
+    again = cached.generate_embedding("  how do I reset   the PUMP? ")
+    batch = cached.generate_embedding(["How do I reset the pump?", "Where is the filter?"])
+
+    assert again == first
+    assert batch == [first, [20.0, 1.0]]
+    assert model.embedded == ["How do I reset the pump?", "Where is the filter?"]
+    assert cached.cache.stats()["hits"] == 2
+
+
+def test_entries_expire_and_least_recently_used_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(lru_cache.time, "monotonic", lambda: now[0])
+    cache = LRUCache(max_entries=2, ttl_seconds=60)
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # Evicts "b", the least recently used
+    assert cache.get("b") is None
+
+    now[0] += 61
+    assert cache.get("a") is None
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 2, "evictions": 1}
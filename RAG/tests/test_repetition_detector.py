@@ -0,0 +1,81 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.utils.repetition import RepetitionDetector, has_consecutive_repetition
+
+
+def stream(text: str, k: int, chunk_size: int = 3) -> RepetitionDetector:
+    detector = RepetitionDetector(k)
+    for i in range(0, len(text), chunk_size):
+        if detector.feed(text[i:i + chunk_size]):
+            break
+    return detector
+
+
+def smallest_period(word: str) -> int:
+    return (word + word).find(word, 1)
+
+
+def ends_with_square(text: str, k: int) -> bool:
+    """Brute force: text ends with uu where the smallest period of u is at least k."""
+    n = len(text)
+    return any(text[n - 2 * d:n - d] == text[n - d:] and smallest_period(text[n - d:]) >= k
+               for d in range(k, n // 2 + 1))
+
+
+def test_detector_fires_on_the_first_square_of_period_at_least_k():
+    """Exactly the documented behavior, including squares has_consecutive_repetition misses"""
+    rng = random.Random(1)
+    missed_by_reference = 0
+    for _ in range(4000):
+        k = rng.randint(1, 5)
+        text = "".join(rng.choice("abc") for _ in range(rng.randint(0, 30)))
+        detector = RepetitionDetector(k)
+        fired = next((i for i, char in enumerate(text, start=1) if detector.feed(char)), None)
+        first_square = next((i for i in range(1, len(text) + 1) if ends_with_square(text[:i], k)), None)
+
+        assert fired == first_square, (text, k)
+        if fired is not None and not has_consecutive_repetition(text[:fired], k):
+            missed_by_reference += 1
+    # The superset is real, and every extra hit above is a square of period >= k
+    assert missed_by_reference > 0
+
+
+def test_detector_fires_no_later_than_full_check():
+    """Every prefix flagged by has_consecutive_repetition is flagged by the detector"""
+    rng = random.Random(0)
+    for _ in range(3000):
+        k = rng.randint(1, 4)
+        text = "".join(rng.choice("abc") for _ in range(rng.randint(0, 24)))
+        detector = RepetitionDetector(k)
+        for i, char in enumerate(text, start=1):
+            detector.feed(char)
+            if has_consecutive_repetition(text[:i], k):
+                assert detector.detected, (text[:i], k)
+                break
+
+
+@pytest.mark.parametrize("text", [
+    "Hello world, Hello world, ",
+    "| Col A | Col B |\n|----------|----------|",
+    "Please restart the service. Please restart the service. ",
+])
+def test_detects_consecutive_repetition(text):
+    assert has_consecutive_repetition(text)
+    assert stream(text, k=10).detected
+
+
+@pytest.mark.parametrize("text", [
+    "=" * 60,
+    " " * 40 + "indented code",
+    "ab" * 30,
+    "1. Click Save.\n2. Click Save.\n",
+])
+def test_ignores_short_period_runs(text):
+    assert not has_consecutive_repetition(text)
+    assert not stream(text, k=10).detected
@@ -0,0 +1,25 @@
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.utils.request_metrics import RequestMetrics
+
+
+def test_counters_from_several_threads():
+    metrics = RequestMetrics()
+
+    def count():
+        for _ in range(1000):
+            metrics.increment("ask.completed")
+        metrics.increment("ask.cancelled")
+
+    threads = [threading.Thread(target=count) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert metrics.snapshot() == {"ask.completed": 4000, "ask.cancelled": 4}
+    assert metrics.get("init.cancelled") == 0
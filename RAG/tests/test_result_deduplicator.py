@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.implementations.chunk_strategy.fixed_size_strategy import FixedSizeChunkStrategy
+from rag_app.core.utils.result_deduplicator import ResultDeduplicator
+
+TEXT = " ".join(f"mot{i}" for i in range(200))
+
+
+def fixed_size_hits(domain="d1"):
+    chunks = FixedSizeChunkStrategy(chunk_size=300, overlap=50).chunk_text(TEXT, "doc", "doc.txt")
+    return [{"id": chunk.chunk_id, "distance": 0.5 + i / 10, "document": chunk.content, "domain": domain,
+             "metadata": dict(chunk.metadata, document_id="doc", document_name="doc.txt")}
+            for i, chunk in enumerate(chunks)]
+
+
+def test_overlapping_chunks_are_merged_without_their_overlap():
+    hits = fixed_size_hits()
+    # Best hit in the middle of the document, its neighbours ranked after it
+    ranked = [hits[2], hits[1], hits[3], hits[0]]
+    deduplicated = ResultDeduplicator().deduplicate(ranked)
+
+    assert len(deduplicated) == 1
+    merged = deduplicated[0]
+    assert merged["document"] == TEXT[:hits[3]["metadata"]["end"]]
+    assert merged["id"] == hits[2]["id"] and merged["distance"] == hits[2]["distance"]
+    assert merged["merged_ids"] == [hits[2]["id"], hits[1]["id"], hits[3]["id"], hits[0]["id"]]
+    assert ranked[0]["document"] == hits[2]["document"]  # Inputs are left untouched
+
+
+def test_distant_chunks_and_other_documents_are_kept():
+    hits = fixed_size_hits()
+    other = dict(hits[1], id="other_chunk_1", metadata=dict(hits[1]["metadata"], document_id="other"),
+                 document="un tout autre passage sur la pompe et son réglage")
+    deduplicated = ResultDeduplicator().deduplicate([hits[0], hits[3], other])
+
+    assert [result["id"] for result in deduplicated] == [hits[0]["id"], hits[3]["id"], "other_chunk_1"]
+
+
+def test_duplicates_across_domains_are_dropped():
+    passage = "La pompe se réinitialise après trois pressions longues sur le bouton de service."
+    first = {"id": "a_1", "distance": 0.4, "document": passage, "metadata": {"document_id": "a"}, "domain": "d1"}
+    copy = {"id": "b_7", "distance": 0.5, "document": passage.upper() + "  ", "metadata": {"document_id": "b"}, "domain": "d2"}
+    near = {"id": "c_2", "distance": 0.6, "document": "Note: " + passage, "metadata": {"document_id": "c"}, "domain": "d3"}
+    deduplicated = ResultDeduplicator(near_duplicate_threshold=0.8).deduplicate([first, copy, near])
+
+    assert [result["id"] for result in deduplicated] == ["a_1"]
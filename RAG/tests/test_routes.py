@@ -0,0 +1,339 @@
+import json
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import api.routes as routes
+from rag_app.core.implementations.query_engine.query_engine import QueryEngine
+from rag_app.core.utils.answer_cache import SemanticAnswerCache
+from rag_app.core.utils.engine_holder import EngineGeneration, EngineHolder
+from rag_app.core.utils.session_store import SessionStore
+
+
+class WordEmbedding:
+    model_name = "words"
+
+    def generate_embedding(self, text):
+        vector = [0.0] * 32
+        for word in text.lower().split():
+            vector[zlib.crc32(word.strip("?.,").encode()) % 32] += 1.0
+        return vector
+
+
+class FakeQueryEngine:
+    """Answers every question with a numbered answer, so replays can be told apart."""
+
+    def __init__(self):
+        self.answer_cache = SemanticAnswerCache(similarity_threshold=0.95)
+        self.embedding_model = WordEmbedding()
+        self.questions = []
+        self.conversations = []
+
+    async def ask_question(self, question, model_name=None, conversation=None, domain_names=None,
+                           stream=True, session=None):
+        self.questions.append(question)
+        self.conversations.append(conversation)
+        answer = f"answer {len(self.questions)}"
+
+        async def chunks():
+            yield answer, None
+            yield "", [{"document": "source"}]
+        return chunks()
+
+
+@pytest.fixture
+def query_engine(monkeypatch):
+    query_engine = FakeQueryEngine()
+    holder = EngineHolder()
+    holder.swap(EngineGeneration(query_engine, None, "test"))
+    monkeypatch.setattr(routes, "engine_holder", holder)
+    monkeypatch.setattr(routes, "session_store", SessionStore())
+    return query_engine
+
+
+@pytest.fixture
+def client(query_engine):
+    app = FastAPI()
+    app.include_router(routes.router)
+    return TestClient(app)
+
+
+def ask(client, message, conversation_id=None, conversation=None):
+    response = client.post("/ask", json={"message": message, "genModel": "test", "conversation_id": conversation_id,
+                                         "conversation": conversation or []})
+    events = [json.loads(line[6:]) for line in response.text.split("\n\n") if line.startswith("data: ")]
+    answer = "".join(event["content"] for event in events if event["type"] == "content")
+    return answer, events[-1]["cached"]
+
+
+def test_answer_cache_ignores_questions_asked_after_earlier_turns(client, query_engine):
+    assert ask(client, "Which pumps are there?", "alice") == ("answer 1", False)
+    # A follow-up in the same session depends on its history
+    assert ask(client, "And the second one?", "alice") == ("answer 2", False)
+    # Another session starting with the same question gets the cached answer
+    assert ask(client, "which pumps are there", "bob") == ("answer 1", True)
+    # The follow-up was not stored, a new session asking it goes to the model
+    assert ask(client, "And the second one?", "carol") == ("answer 3", False)
+    # Nor is a first question replayed into a session that already has history
+    assert ask(client, "Which pumps are there?", "alice") == ("answer 4", False)
+    assert query_engine.questions == ["Which pumps are there?", "And the second one?", "And the second one?", "Which pumps are there?"]
+
+
+def test_only_session_conversations_are_summarized(client, query_engine):
+    history = [{"role": "User", "content": f"question {n}"} for n in range(12)]
+    ask(client, "Which pumps are there?", "alice", conversation=history)
+    ask(client, "And the second one?", "alice")
+
+    request_conversation, session_conversation = query_engine.conversations
+    assert not request_conversation.persistent
+    assert [message.content for message in request_conversation.get_history()[:12]] == [message["content"] for message in history]
+    assert session_conversation.persistent
+    assert session_conversation is routes.session_store.get("alice").conversation
+
+
+class FakeDomainManager:
+    def __init__(self, result=True):
+        self.vector_stores = {"manuals": object()}
+        self.result = result
+        self.documents = []
+
+    def add_or_update_document(self, domain, document_name):
+        self.documents.append((domain, document_name))
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+@pytest.fixture
+def data_folder(monkeypatch, tmp_path):
+    data_folder = tmp_path / "data"
+    (data_folder / "manuals").mkdir(parents=True)
+    (data_folder / "manuals" / "pump.pdf").write_bytes(b"version 1")
+    monkeypatch.setattr(routes.private_settings, "DATA_FOLDER", str(data_folder))
+    monkeypatch.setattr(routes, "ingestion_jobs", routes.IngestionJobManager())
+    return data_folder
+
+
+def serve(monkeypatch, domain_manager):
+    holder = EngineHolder()
+    holder.swap(EngineGeneration(FakeQueryEngine(), domain_manager, "test"))
+    monkeypatch.setattr(routes, "engine_holder", holder)
+
+
+def upload(client, domain, content=b"version 2", filename="pump.pdf"):
+    return client.post("/update_RAG_document", data={"domain": domain},
+                       files={"file": (filename, content, "application/pdf")})
+
+
+@pytest.mark.parametrize("domain", ["..", ".", "unknown", "manuals/.."])
+def test_update_document_rejects_unknown_domains(monkeypatch, client, data_folder, domain):
+    domain_manager = FakeDomainManager()
+    serve(monkeypatch, domain_manager)
+
+    assert upload(client, domain).status_code == 400
+    assert domain_manager.documents == []
+    assert sorted(path.name for path in data_folder.parent.rglob("*")) == ["data", "manuals", "pump.pdf"]
+
+
+def test_update_document_indexes_the_new_version(monkeypatch, client, data_folder):
+    domain_manager = FakeDomainManager()
+    serve(monkeypatch, domain_manager)
+
+    response = upload(client, "manuals")
+
+    assert response.status_code == 200
+    assert domain_manager.documents == [("manuals", "pump.pdf")]
+    assert (data_folder / "manuals" / "pump.pdf").read_bytes() == b"version 2"
+    archived = list((data_folder.parent / "old_data" / "manuals").iterdir())
+    assert len(archived) == 1 and archived[0].read_bytes() == b"version 1"
+
+
+def test_update_document_accepts_domain_folders_before_setup(monkeypatch, client, data_folder):
+    monkeypatch.setattr(routes, "engine_holder", EngineHolder())
+
+    response = upload(client, "manuals")
+
+    assert response.status_code == 200
+    assert "setup_rag" in response.json()["message"]
+    assert (data_folder / "manuals" / "pump.pdf").read_bytes() == b"version 2"
+
+
+@pytest.mark.parametrize("result", [False, RuntimeError("embedding service down")])
+def test_update_document_keeps_previous_version_when_indexing_fails(monkeypatch, client, data_folder, result):
+    serve(monkeypatch, FakeDomainManager(result))
+
+    assert upload(client, "manuals").status_code == 500
+    assert (data_folder / "manuals" / "pump.pdf").read_bytes() == b"version 1"
+
+
+def test_update_document_removes_new_document_when_indexing_fails(monkeypatch, client, data_folder):
+    serve(monkeypatch, FakeDomainManager(False))
+
+    assert upload(client, "manuals", filename="valve.pdf").status_code == 500
+    assert not (data_folder / "manuals" / "valve.pdf").exists()
+
+
+def test_drained_generation_closes_its_query_engine(monkeypatch):
+    holder = EngineHolder()
+    monkeypatch.setattr(routes, "engine_holder", holder)
+    drained = threading.Event()
+    query_engine = QueryEngine(None, {}, None, None, None, None, None)
+    holder.swap(EngineGeneration(query_engine, None, None,
+                                 on_drained=lambda generation: (routes.retire_index(generation), drained.set())))
+    lease = holder.acquire()
+
+    holder.swap(EngineGeneration(FakeQueryEngine(), None, None))
+    assert not query_engine._search_executor._shutdown
+
+    lease.release()
+    assert drained.wait(1)
+    assert query_engine._search_executor._shutdown
+
+
+@pytest.fixture
+def setup_folders(monkeypatch, tmp_path):
+    monkeypatch.setattr(routes.private_settings, "DOCS_FOLDER", str(tmp_path))
+    monkeypatch.setattr(routes.private_settings, "CONFIGS_FOLDER", str(tmp_path))
+    monkeypatch.setattr(routes, "ingestion_jobs", routes.IngestionJobManager())
+    return tmp_path
+
+
+def serve_config(monkeypatch, config_data):
+    domain_manager = FakeDomainManager()
+    domain_manager.chat_model = "chat model v1"
+    holder = EngineHolder()
+    holder.swap(EngineGeneration(FakeQueryEngine(), domain_manager, "v1",
+                                 config=routes.merge_configs(routes.private_settings.dict(), config_data)))
+    monkeypatch.setattr(routes, "engine_holder", holder)
+    return holder.current
+
+
+BASE_CONFIG = {"chat_model": {"MODEL_ID": "cohere.command-r-plus", "TEMPERATURE": 0.0},
+               "query_engine": {"N_RESULTS": 10}, "chunking": {"STRATEGY": "fixed"}}
+
+
+def test_setup_rag_rebuilds_only_the_query_engine_for_serving_changes(monkeypatch, client, setup_folders):
+    current = serve_config(monkeypatch, BASE_CONFIG)
+    built = []
+    monkeypatch.setattr(routes, "initialize_chat_model", lambda config: f"chat model {config['chat_model']['TEMPERATURE']}")
+    monkeypatch.setattr(routes, "initialize_query_engine",
+                        lambda config, domain_manager, chat_model: built.append((domain_manager, chat_model)) or FakeQueryEngine())
+    monkeypatch.setattr(routes, "run_setup_job", lambda job, config_data, merged_config: pytest.fail("reindexed"))
+
+    response = client.post("/setup_rag", json={**BASE_CONFIG, "chat_model": {"TEMPERATURE": 0.5}})
+
+    assert response.status_code == 200
+    assert response.json()["path"] == "serving" and response.json()["index_version"] == "v1"
+    assert built == [(current.domain_manager, "chat model 0.5")]
+    assert routes.engine_holder.current is not current
+    assert routes.engine_holder.current.domain_manager is current.domain_manager
+    assert current.domain_manager.chat_model == "chat model v1"
+    assert list(setup_folders.glob("config_*.json"))
+
+
+def test_setup_rag_keeps_the_current_generation_if_the_rebuild_fails(monkeypatch, client, setup_folders):
+    current = serve_config(monkeypatch, BASE_CONFIG)
+    monkeypatch.setattr(routes, "initialize_chat_model", lambda config: "chat model v2")
+
+    def fail(config, domain_manager, chat_model):
+        raise ValueError("Unsupported model ID")
+    monkeypatch.setattr(routes, "initialize_query_engine", fail)
+
+    response = client.post("/setup_rag", json={**BASE_CONFIG, "chat_model": {"TEMPERATURE": 0.5}})
+
+    assert response.status_code == 400
+    assert routes.engine_holder.current is current
+    assert current.domain_manager.chat_model == "chat model v1"
+    assert not list(setup_folders.glob("config_*.json"))
+
+
+def test_setup_rag_reindexes_when_index_settings_change(monkeypatch, client, setup_folders):
+    current = serve_config(monkeypatch, BASE_CONFIG)
+    monkeypatch.setattr(routes, "run_setup_job", lambda job, config_data, merged_config: {"index_version": "v2"})
+
+    response = client.post("/setup_rag", json={**BASE_CONFIG, "chunking": {"STRATEGY": "semantic"}})
+
+    assert response.status_code == 202
+    assert response.json()["path"] == "reindex" and response.json()["changed_sections"] == ["chunking"]
+    job = routes.ingestion_jobs.get(response.json()["job_id"])
+    deadline = time.time() + 1
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.result == {"index_version": "v2"}
+    assert routes.engine_holder.current is current
+
+
+def test_setup_rag_and_document_updates_wait_for_the_running_job(monkeypatch, client, data_folder, setup_folders):
+    serve(monkeypatch, FakeDomainManager())
+    started, proceed = threading.Event(), threading.Event()
+    monkeypatch.setattr(routes, "run_setup_job", lambda job, config_data, merged_config: started.set() or proceed.wait(2))
+
+    assert client.post("/setup_rag", json=BASE_CONFIG).status_code == 202
+    assert started.wait(2)
+    try:
+        assert client.post("/setup_rag", json=BASE_CONFIG).status_code == 409
+        assert upload(client, "manuals").status_code == 409
+    finally:
+        proceed.set()
+
+
+def test_answer_cache_serves_first_questions_after_the_greeting(client, query_engine):
+    # The front end sends the /init greeting back as the conversation of its first question
+    greeting = [{"role": "Assistant", "content": "Bonjour, comment puis-je vous aider ?"}]
+
+    assert ask(client, "Which pumps are there?", conversation=greeting) == ("answer 1", False)
+    assert ask(client, "which pumps are there", conversation=greeting) == ("answer 1", True)
+    follow_up = greeting + [{"role": "User", "content": "Which pumps are there?"}, {"role": "Assistant", "content": "answer 1"}]
+    assert ask(client, "which pumps are there", conversation=follow_up) == ("answer 2", False)
+
+
+def test_reindex_waits_for_a_running_serving_rebuild(monkeypatch, client, setup_folders):
+    current = serve_config(monkeypatch, BASE_CONFIG)
+    started, proceed = threading.Event(), threading.Event()
+    monkeypatch.setattr(routes, "initialize_chat_model", lambda config: started.set() or proceed.wait(2) and "chat model v2")
+    monkeypatch.setattr(routes, "initialize_query_engine", lambda config, domain_manager, chat_model: FakeQueryEngine())
+    monkeypatch.setattr(routes, "run_setup_job", lambda job, config_data, merged_config: pytest.fail("reindexed"))
+
+    responses = []
+    rebuild = threading.Thread(target=lambda: responses.append(
+        client.post("/setup_rag", json={**BASE_CONFIG, "chat_model": {"TEMPERATURE": 0.5}})))
+    rebuild.start()
+    assert started.wait(2)
+    try:
+        assert client.post("/setup_rag", json={**BASE_CONFIG, "chunking": {"STRATEGY": "semantic"}}).status_code == 409
+    finally:
+        proceed.set()
+        rebuild.join(2)
+
+    assert responses[0].status_code == 200
+    assert routes.engine_holder.current is not current and not routes.serving_rebuild_lock.locked()
+
+
+def test_serving_rebuild_does_not_replace_a_newer_generation(monkeypatch, client, setup_folders):
+    serve_config(monkeypatch, BASE_CONFIG)
+    newer = EngineGeneration(FakeQueryEngine(), FakeDomainManager(), "v2")
+    rebuilt = []
+
+    def initialize_query_engine(config, domain_manager, chat_model):
+        # A reindex finishing while the chat model was being built
+        routes.engine_holder.swap(newer)
+        rebuilt.append(QueryEngine(domain_manager, {}, None, chat_model, None, None, None))
+        return rebuilt[0]
+    monkeypatch.setattr(routes, "initialize_chat_model", lambda config: "chat model v2")
+    monkeypatch.setattr(routes, "initialize_query_engine", initialize_query_engine)
+
+    response = client.post("/setup_rag", json={**BASE_CONFIG, "chat_model": {"TEMPERATURE": 0.5}})
+
+    assert response.status_code == 409
+    assert routes.engine_holder.current is newer
+    assert rebuilt[0]._search_executor._shutdown
+    assert not list(setup_folders.glob("config_*.json"))
+    assert not routes.serving_rebuild_lock.locked()
@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.implementations.session.file_session_backend import FileSessionBackend
+from rag_app.core.utils import session_store as session_store_module
+from rag_app.core.utils.session_store import SessionStore
+
+
+def test_conversations_are_isolated_and_bounded():
+    store = SessionStore(max_sessions=2)
+    first = store.get("first")
+    first.conversation.add_message("User", "Where is the filter?")
+    store.save(first)
+    store.get("second")
+    store.get("third")  # Evicts "first", there is no backend to reload it from
+
+    assert len(store) == 2
+    assert store.get("second").conversation.get_history() == []
+    assert store.get("first").conversation.get_history() == []
+
+
+def test_sessions_persist_and_expire(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_store_module.time, "time", lambda: now[0])
+    backend = FileSessionBackend(str(tmp_path))
+    session = SessionStore(ttl_seconds=60, backend=backend).get("kiosk-1")
+    session.conversation.add_message("User", "Where is the filter?")
+    session.last_results = [{"id": "manual_3", "distance": 0.25}]
+    session.last_response = "Behind the panel."
+    SessionStore(backend=backend).save(session)
+
+    restored = SessionStore(ttl_seconds=60, backend=backend).get("kiosk-1")
+    assert [message.content for message in restored.conversation.get_history()] == ["Where is the filter?"]
+    assert restored.last_results == [{"id": "manual_3", "distance": 0.25}]
+    assert restored.last_response == "Behind the panel."
+
+    now[0] += 61
+    assert SessionStore(ttl_seconds=60, backend=backend).get("kiosk-1").last_response == ""
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_saved_sessions_keep_their_last_messages(tmp_path):
+    backend = FileSessionBackend(str(tmp_path))
+    store = SessionStore(backend=backend, max_messages=4)
+    session = store.get()
+    session.conversation.summary = "Asked about filters."
+    session.conversation.summarized_count = 3
+    for turn in range(3):
+        session.conversation.add_message("User", f"question {turn}")
+        session.conversation.add_message("Assistant", f"answer {turn}")
+    store.save(session)
+
+    restored = SessionStore(backend=backend).get()
+    assert [message.content for message in restored.conversation.get_history()] == ["question 1", "answer 1", "question 2", "answer 2"]
+    assert restored.conversation.get_formatted_lines()[0].endswith("question 1")
+    assert restored.conversation.summarized_count == 1
+    assert restored.conversation.summary == "Asked about filters."
@@ -0,0 +1,77 @@
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_app.core.utils.thread_stream import iterate_in_thread
+
+executor = ThreadPoolExecutor(max_workers=4)
+
+
+def slow_tokens(n, delay, produced=None, closed=None):
+    try:
+        for i in range(n):
+            time.sleep(delay)  # A blocking SDK read
+            if produced is not None:
+                produced.append(i)
+            yield i
+    finally:
+        if closed is not None:
+            closed.set()
+
+
+def test_items_arrive_in_order_without_blocking_the_loop():
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        items = [item async for item in iterate_in_thread(lambda: slow_tokens(10, 0.02), executor)]
+        task.cancel()
+        return items, ticks
+
+    items, ticks = asyncio.run(run())
+    assert items == list(range(10))
+    assert ticks >= 10
+
+
+def test_errors_are_raised_to_the_consumer():
+    def failing():
+        yield "a"
+        raise ValueError("provider error")
+
+    async def run():
+        received = []
+        try:
+            async for item in iterate_in_thread(failing, executor):
+                received.append(item)
+        except ValueError as e:
+            return received, str(e)
+
+    assert asyncio.run(run()) == (["a"], "provider error")
+
+
+def test_slow_consumer_applies_backpressure_and_closing_stops_the_worker():
+    produced, closed = [], threading.Event()
+
+    async def run():
+        async with aclosing(iterate_in_thread(lambda: slow_tokens(1000, 0, produced, closed), executor,
+                                              max_buffered=4)) as items:
+            async for item in items:
+                await asyncio.sleep(0.05)
+                break
+
+    asyncio.run(run())
+    assert closed.wait(2)
+    # The worker never ran more than the buffer ahead of the consumer
+    assert len(produced) <= 8